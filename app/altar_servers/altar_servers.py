@@ -1,6 +1,7 @@
 """A module that contains the altar server wrapper class."""
 
 import copy
+import datetime
 import itertools
 import statistics
 from decimal import Decimal
@@ -8,11 +9,13 @@ from fractions import Fraction
 from typing import Any
 
 from altar_servers.altar_server import AltarServer
+from altar_servers.running_statistics import RunningStatistics
 from altar_servers.scheduling_unit import SchedulingUnit
 from dates.day import Day
 from dates.holy_mass import HolyMass
 from events.event_calendar import EventCalendar
 from pydantic import BaseModel
+from utils import instrumentation
 
 
 def get_distribution(altar_servers: list) -> list:
@@ -39,11 +42,23 @@ class AltarServers(BaseModel):
 
         :param context: The pydantic context
         """
+        self.__servers_by_name: dict[str, AltarServer] = {}
+        for server in self.altar_servers:
+            self.__servers_by_name.setdefault(server.name, server)
+
         self.__add_siblings_to_objects()
         self.__scheduling_units = []
+        self.__units_by_name: dict[str, SchedulingUnit] = {}
         self.__create_scheduling_units()
+        self.__units_by_index = list(self.__scheduling_units)
+
+        self.__already_chosen_this_round = 0
+        self.__n_already_chosen_this_round = 0
 
-        self.__already_chosen_this_round = []
+        self.__server_indices = {id(server): i for i, server in enumerate(self.altar_servers)}
+        self.__statistics = RunningStatistics(len(self.altar_servers))
+        self.__available_units: dict[datetime.date, int] = {}
+        self.__unavailable_units: dict[datetime.date, list[SchedulingUnit]] = {}
 
     @property
     def scheduling_units(self: "AltarServers") -> list:
@@ -53,16 +68,48 @@ class AltarServers(BaseModel):
         """
         return self.__scheduling_units
 
+    def rank_scheduling_units(self: "AltarServers") -> None:
+        """Set the rank of every scheduling unit to its position in the list of scheduling units.
+
+        The already chosen list is a bitset of the ranks, so the list must be empty when the
+        scheduling units are ranked again.
+        """
+        for rank, unit in enumerate(self.__scheduling_units):
+            unit.rank = rank
+
     def empty_already_chosen_list(self: "AltarServers") -> None:
-        """Delete all entries from the already chosen list."""
-        self.__already_chosen_this_round = []
+        """Delete all entries from the already chosen list.
+
+        The list is a bitset of the ranks of the scheduling units, so emptying it is O(1).
+        """
+        self.__already_chosen_this_round = 0
+        self.__n_already_chosen_this_round = 0
+
+    def get_already_chosen_state(self: "AltarServers") -> tuple[int, int]:
+        """Get the state of the already chosen list, so it can be restored later.
+
+        :return: The bitset of the chosen scheduling units and the number of chosen units.
+        """
+        return self.__already_chosen_this_round, self.__n_already_chosen_this_round
+
+    def set_already_chosen_state(self: "AltarServers", state: tuple[int, int]) -> None:
+        """Restore a state of the already chosen list.
+
+        :param state: The state returned by get_already_chosen_state.
+        """
+        self.__already_chosen_this_round, self.__n_already_chosen_this_round = state
 
     def get_server_by_name(self, name: str) -> AltarServer:
         """Get the server object by its name."""
-        for server in self.altar_servers:
-            if server.name == name:
-                return server
-        raise KeyError(name)
+        return self.__servers_by_name[name]
+
+    def get_scheduling_unit_by_name(self: "AltarServers", name: str) -> SchedulingUnit:
+        """Get the scheduling unit that was created for the server with the given name."""
+        return self.__units_by_name[name]
+
+    def get_server_index(self: "AltarServers", server: AltarServer) -> int:
+        """Get the position of a server in the list of altar servers."""
+        return self.__server_indices[id(server)]
 
     def clear_state(self: "AltarServers") -> None:
         """Reset all variables marking the state of the assignment process.
@@ -76,6 +123,55 @@ class AltarServers(BaseModel):
 
         for server in self.altar_servers:
             server.services = []
+        self.__statistics.reset()
+
+    def build_availability(
+        self: "AltarServers", start_date: datetime.date, end_date: datetime.date
+    ) -> None:
+        """Precompute which scheduling units are available on each date of the plan.
+
+        The vacations do not change while a plan is created, so they are converted once into a
+        bitset of the indices of the available scheduling units per date.
+
+        :param start_date: The first date of the plan.
+        :param end_date: The last date of the plan.
+        """
+        n_days = (end_date - start_date).days + 1
+        available_units = [(1 << len(self.__scheduling_units)) - 1] * n_days
+        for unit in self.__scheduling_units:
+            for server in unit.servers:
+                for vacation in server.vacations:
+                    first = (max(vacation.start, start_date) - start_date).days
+                    last = (min(vacation.end, end_date) - start_date).days
+                    for offset in range(first, last + 1):
+                        available_units[offset] &= ~(1 << unit.index)
+
+        self.__available_units = {
+            start_date + datetime.timedelta(days=offset): units
+            for offset, units in enumerate(available_units)
+        }
+        self.__unavailable_units = {}
+
+    def get_unavailable_units(self: "AltarServers", date: datetime.date) -> list[SchedulingUnit]:
+        """Get the scheduling units with a server on vacation at a date.
+
+        :param date: The date.
+        :return: The scheduling units.
+        """
+        units = self.__unavailable_units.get(date)
+        if units is not None:
+            return units
+        available_units = self.__available_units.get(date)
+        if available_units is None:
+            return [unit for unit in self.__scheduling_units if not unit.is_available_on(date)]
+        units = []
+        unavailable_units = ~available_units & ((1 << len(self.__units_by_index)) - 1)
+        while unavailable_units:
+            unit = unavailable_units & -unavailable_units
+            units.append(self.__units_by_index[unit.bit_length() - 1])
+            unavailable_units ^= unit
+        self.__unavailable_units[date] = units
+        return units
 
     def su_is_available_at(
         self: "AltarServers",
@@ -91,31 +187,73 @@ class AltarServers(BaseModel):
         with a weekday mass.
         :return:
         """
+        available_units = self.__available_units.get(day.date)
         return (
-            su not in self.__already_chosen_this_round
-            and su.is_available_on(day.date)
+            not (self.__already_chosen_this_round >> su.rank) & 1
+            and (
+                (available_units >> su.index) & 1
+                if available_units is not None
+                else su.is_available_on(day.date)
+            )
             and day.servers_of_su_not_assigned(su)
             and (mass.event.location is None or mass.event.location in su.locations)
             and (mass.event.id not in su.avoid)  # this is necessary because of special masses
         )
 
+    def get_unavailability_reason(
+        self: "AltarServers",
+        su: SchedulingUnit,
+        day: Day,
+        mass: HolyMass,
+        *,
+        already_chosen: bool = True,
+    ) -> str | None:
+        """Get the first reason why su_is_available_at rejects a scheduling unit.
+
+        :param su: The scheduling unit to check.
+        :param day: The day to check.
+        :param mass: The mass to check.
+        :param already_chosen: If False, the already chosen list is not checked.
+        :return: The reason, or None, if the scheduling unit is available.
+        """
+        available_units = self.__available_units.get(day.date)
+        if already_chosen and (self.__already_chosen_this_round >> su.rank) & 1:
+            return "already_chosen"
+        if not (
+            (available_units >> su.index) & 1
+            if available_units is not None
+            else su.is_available_on(day.date)
+        ):
+            return "vacation"
+        if not day.servers_of_su_not_assigned(su):
+            return "same_day"
+        if mass.event.location is not None and mass.event.location not in su.locations:
+            return "location"
+        if mass.event.id in su.avoid:
+            return "avoid"
+        return None
+
     def __create_scheduling_units(self: "AltarServers") -> None:
         """Create scheduling units which group siblings and servers that want to server together."""
+        servers_in_units = set()
         for altar_server in self.altar_servers:
-            if not any(altar_server in unit.servers for unit in self.__scheduling_units):
-                self.__scheduling_units.append(
-                    SchedulingUnit([altar_server, *altar_server.sibling_names])
+            if id(altar_server) not in servers_in_units:
+                unit = SchedulingUnit(
+                    [altar_server, *altar_server.sibling_names], len(self.__scheduling_units)
                 )
+                self.__scheduling_units.append(unit)
+                for server in unit.servers:
+                    servers_in_units.add(id(server))
+                    self.__units_by_name.setdefault(server.name, unit)
 
     def __add_siblings_to_objects(self: "AltarServers") -> None:
         """Get the sibling objects from the list and add them to the individual sibling lists."""
         for altar_server in self.altar_servers:
             if altar_server.has_siblings():
-                object_list = [
-                    next(filter(lambda x: x.name == sibling_name, self.altar_servers))
+                altar_server.sibling_names = [
+                    self.__servers_by_name[sibling_name]
                     for sibling_name in altar_server.sibling_names
                 ]
-                altar_server.sibling_names = object_list
 
     def get_available_scheduling_units(self: "AltarServers", event_id: str) -> list:
         """Get the scheduling units available at a certain event.
@@ -147,10 +285,31 @@ class AltarServers(BaseModel):
         :param su: The scheduling unit to add extend the list for.
         """
         for server in su.servers:
-            server.services.append(mass)
-        self.__already_chosen_this_round.append(su)
-        if len(self.__already_chosen_this_round) == len(self.altar_servers):
+            self.add_service(server, mass)
+        if su.rank is not None:
+            self.__already_chosen_this_round |= 1 << su.rank
+        self.__n_already_chosen_this_round += 1
+        if self.__n_already_chosen_this_round == len(self.altar_servers):
             self.empty_already_chosen_list()
+            if instrumentation.active is not None:
+                instrumentation.active.count("already_chosen_resets.all_chosen")
+
+    def add_service(self: "AltarServers", server: AltarServer, mass: HolyMass) -> None:
+        """Add a mass to the services of a server and to the running statistics.
+
+        :param server: The server.
+        :param mass: The mass the server is assigned to.
+        """
+        server.services.append(mass)
+        self.__statistics.add_service(self.__server_indices[id(server)], mass)
+
+    def remove_last_service(self: "AltarServers", server: AltarServer) -> None:
+        """Remove the service of a server that was added last.
+
+        :param server: The server.
+        """
+        mass = server.services.pop()
+        self.__statistics.remove_last_service(self.__server_indices[id(server)], mass)
 
     def get_copy(self: "AltarServers") -> list[AltarServer]:
         """Get a copy of the altar server list.
@@ -159,10 +318,21 @@ class AltarServers(BaseModel):
         """
         return copy.deepcopy(self.altar_servers)
 
-    def calculate_statistics(
+    def calculate_statistics(self: "AltarServers", event_calendar: EventCalendar) -> list[float]:
+        """Get the variance of the number of services and of the distances between the services.
+
+        The variances are taken from the running statistics, which are updated with every assigned
+        service. They are equal to the ones calculated by recalculate_statistics.
+
+        :param event_calendar: The event calendar containing the weekday ids.
+        :return: The variance of the number of services and of the distances between the services.
+        """
+        return self.__statistics.variances(event_calendar.get_list_of_weekday_ids())
+
+    def recalculate_statistics(
         self: "AltarServers", event_calendar: EventCalendar
     ) -> list[float | Decimal | Fraction | Any]:
-        """Get the variance of the number of services and of the distances between the services.
+        """Calculate the variances of calculate_statistics from the services of the servers.
 
         :param event_calendar:
         :param altar_servers: The altar servers object.
@@ -1,42 +1,123 @@
 """The queue manager module."""
 
 import random
-from collections import deque
+from typing import TYPE_CHECKING
 
 from altar_servers.altar_servers import AltarServers
 from altar_servers.scheduling_unit import SchedulingUnit
 from dates.day import Day
 from dates.holy_mass import HolyMass
 from events.event_calendar import EventCalendar
+from utils import instrumentation
 from utils.exceptions import BadSituationError
 
+if TYPE_CHECKING:
+    import datetime
 
-def list_to_queue(collection1: list, collection: deque) -> None:
-    """Add all elements from the list to a queue."""
-    for item in collection1:
-        collection.append(item)
+
+def get_rank_mask(units: list[SchedulingUnit]) -> int:
+    """Get the bitset of the ranks of scheduling units.
+
+    :param units: The scheduling units.
+    :return: The bitset.
+    """
+    mask = 0
+    for unit in units:
+        mask |= 1 << unit.rank
+    return mask
+
+
+class UnitQueue:
+    """A round-robin queue of scheduling units, which finds the next eligible unit directly.
+
+    The members of the queue are a bitset of the ranks of the scheduling units, so they are in the
+    order of the shuffled list of scheduling units, like the queues are filled. Instead of moving
+    the first unit to the end until one is eligible, the queue keeps the rank at which the next
+    search starts. The next eligible unit is the lowest eligible rank from there on, or the lowest
+    eligible rank at all, if the search has to wrap around. Finding it takes a few operations on
+    integers, no matter how many units are rejected.
+    """
+
+    def __init__(self: "UnitQueue") -> None:
+        """Create an empty queue."""
+        self.members = 0
+        self.head = 0
+
+    def fill(self: "UnitQueue", members: int) -> None:
+        """Replace the members of the queue and start from the first one.
+
+        :param members: The bitset of the ranks of the members.
+        """
+        self.members = members
+        self.head = 0
+
+    def find(self: "UnitQueue", units: int) -> int | None:
+        """Find the first of the given units in the order of the queue, starting at the head.
+
+        :param units: The bitset of the ranks of the units.
+        :return: The rank of the first unit that is a member, or None, if there is none.
+        """
+        units &= self.members
+        following = units >> self.head
+        if following:
+            return self.head + (following & -following).bit_length() - 1
+        if units:
+            return (units & -units).bit_length() - 1
+        return None
+
+    def advance(self: "UnitQueue", rank: int) -> None:
+        """Move the head behind a unit, like moving the units up to it to the end of a deque.
+
+        :param rank: The rank of the unit.
+        """
+        self.head = rank + 1
+
+    def __len__(self: "UnitQueue") -> int:
+        """Get the number of members of the queue.
+
+        :return: The number of members.
+        """
+        return self.members.bit_count()
 
 
 class QueueManager:
     """The queue manager."""
 
     def __init__(
-        self: "QueueManager", event_calendar: EventCalendar, altar_servers: AltarServers
+        self: "QueueManager",
+        event_calendar: EventCalendar,
+        altar_servers: AltarServers,
+        rng: random.Random | None = None,
     ) -> None:
         """Create a QueueManager.
 
         :param event_calendar: The event calendar.
         :param altar_servers: The altar servers.
+        :param rng: The random number generator that shuffles the queues. If None, the global
+        generator of the random module is used until the first round is started with a seed.
         """
         self.event_calendar = event_calendar
         self.__altar_servers = altar_servers
+        self.__rng = rng
 
-        self.__regular_queues: dict[str, deque] = {}
-        self.__other_queue = deque()  # All servers get refilled
+        self.__regular_queues: dict[str, UnitQueue] = {}
+        self.__other_queue = UnitQueue()  # All servers get refilled
 
         for event_day in event_calendar.weekday.values():
             for event in event_day.events:
-                self.__regular_queues[event.id] = deque()
+                self.__regular_queues[event.id] = UnitQueue()
+
+        units = altar_servers.scheduling_units
+        self.__excluded_from_queues = {
+            event_id: [unit for unit in units if event_id in unit.avoid or unit.no_regular]
+            for event_id in self.__regular_queues
+        }
+        self.__excluded_from_other_queue = [unit for unit in units if unit.no_special]
+        self.__excluded_from_events: dict[tuple[str, str | None], list[SchedulingUnit]] = {}
+
+        self.__all_units = 0
+        self.__available_units: dict[datetime.date, int] = {}
+        self.__event_units: dict[int, int] = {}
 
         self.__shuffle_clear_and_fill_queues()
 
@@ -46,23 +127,23 @@ class QueueManager:
         This is done to maintain an order over the different queues. The alternative
         would be to shuffle before assigning the servers to the individual queues, but then some
         could be assigned in rapid succession. This way we are keeping rounds of assignments.
+        The members of the queues do not change between rounds, only their ranks do. So each
+        queue is filled with all units except the few that were excluded from it once.
+        The bitsets of the vacations and the events are built again once they are needed.
         """
-        random.shuffle(self.__altar_servers.scheduling_units)
-
-        for event_id in self.__regular_queues:
-            self.__regular_queues[event_id].clear()
-            list_to_queue(
-                self.__altar_servers.get_available_scheduling_units(event_id),
-                self.__regular_queues[event_id],
-            )
-
-        self.__other_queue.clear()
-        list_to_queue(
-            list(filter(lambda x: not x.no_special, self.__altar_servers.scheduling_units)),
-            self.__other_queue,
-        )
+        shuffle = random.shuffle if self.__rng is None else self.__rng.shuffle
+        shuffle(self.__altar_servers.scheduling_units)
+        self.__altar_servers.rank_scheduling_units()
+        self.__all_units = (1 << len(self.__altar_servers.scheduling_units)) - 1
+
+        for event_id, queue in self.__regular_queues.items():
+            queue.fill(self.__all_units & ~get_rank_mask(self.__excluded_from_queues[event_id]))
+        self.__other_queue.fill(self.__all_units & ~get_rank_mask(self.__excluded_from_other_queue))
 
-    def __get_queue_for_event(self: "AltarServers", identifier: str) -> deque:
+        self.__available_units.clear()
+        self.__event_units.clear()
+
+    def __get_queue_for_event(self: "QueueManager", identifier: str) -> UnitQueue:
         """Get the queue from which the servers must be taken for a given event.
 
         :param treated_as_id: The event object.
@@ -73,48 +154,206 @@ class QueueManager:
 
         return self.__other_queue
 
+    def __get_eligible_units(self: "QueueManager", day: Day, mass: HolyMass) -> int:
+        """Get the units that are available at a mass, apart from the already chosen list.
+
+        The servers that are already assigned on the day are not excluded either. The units
+        excluded by the location and the avoided event of a mass are found once. Their bitset and
+        the bitset of the vacations of a date are built once per order of the scheduling units.
+
+        :param day: The day of the mass.
+        :param mass: The mass.
+        :return: The bitset of the ranks of the units.
+        """
+        available_units = self.__available_units.get(day.date)
+        if available_units is None:
+            unavailable_units = self.__altar_servers.get_unavailable_units(day.date)
+            available_units = self.__all_units & ~get_rank_mask(unavailable_units)
+            self.__available_units[day.date] = available_units
+
+        event_units = self.__event_units.get(id(mass.event))
+        if event_units is None:
+            key = (mass.event.id, mass.event.location)
+            excluded_units = self.__excluded_from_events.get(key)
+            if excluded_units is None:
+                excluded_units = [
+                    unit
+                    for unit in self.__altar_servers.scheduling_units
+                    if mass.event.id in unit.avoid
+                    or (
+                        mass.event.location is not None
+                        and mass.event.location not in unit.locations
+                    )
+                ]
+                self.__excluded_from_events[key] = excluded_units
+            event_units = self.__all_units & ~get_rank_mask(excluded_units)
+            self.__event_units[id(mass.event)] = event_units
+        return available_units & event_units
+
     def get_su_from_queues(
         self: "QueueManager", day: Day, mass: HolyMass, did_not_fit: list
     ) -> SchedulingUnit:
         """Get a server from the correct queue.
 
-        If the queue for an event is empty, it is refilled. The server is only chosen, if it has not
-        been chosen this round. This mechanism is required, because of the sibling mechanism. It is
-        possible that a server was already assigned because of its sibling. The counter ensures that
-        if all servers in the queue have been assigned already, the already assigned list is
-        cleared.
-        :param did_not_fit:
+        The server is only chosen, if it has not been chosen this round. This mechanism is
+        required, because of the sibling mechanism. It is possible that a server was already
+        assigned because of its sibling. If no server of the queue is available, the already
+        chosen list is cleared and only the server after the first one is checked again, like
+        rotating a deque once more than its length did before. Only the units that would be taken
+        except for a server that is already assigned on the day are checked one by one.
+        :param did_not_fit: The units that were chosen for the mass before, but did not fit. If one
+        of them comes first, the mass cannot be completed.
         :param day: Holds the information about the day.
         :param mass: Holds the information about the mass.
         :return: The chosen server.
         """
-        count = 0
-        emptied = False
-        day_queue = self.__get_queue_for_event(
+        queue = self.__get_queue_for_event(
             mass.event.treated_as if mass.event.treated_as is not None else mass.event.id
         )
+        if not queue.members:
+            msg = f"No scheduling unit can serve at {mass.event.id}"
+            raise IndexError(msg)
 
+        units = self.__altar_servers.scheduling_units
+        eligible_units = self.__get_eligible_units(day, mass)
+        did_not_fit_units = get_rank_mask(did_not_fit) if did_not_fit else 0
+        candidates = eligible_units & ~self.__altar_servers.get_already_chosen_state()[0]
+        candidates |= did_not_fit_units
         while True:
-            next_su: SchedulingUnit = day_queue.popleft()
-            day_queue.append(next_su)  # Re-insert
+            rank = queue.find(candidates)
+            if (
+                rank is None
+                or (did_not_fit_units >> rank) & 1
+                or day.servers_of_su_not_assigned(units[rank])
+            ):
+                break
+            candidates &= ~(1 << rank)
 
-            if next_su in did_not_fit:
-                raise BadSituationError
+        rotations = 0
+        if instrumentation.active is not None:
+            rotations = self.__record_rejections(queue, rank, day, mass) + 1
 
-            if self.__altar_servers.su_is_available_at(next_su, day, mass):
-                break
+        if rank is None:
+            return self.__retry_after_emptying(queue, eligible_units, day, mass)
+
+        queue.advance(rank)
+        if (did_not_fit_units >> rank) & 1:
+            raise BadSituationError
+        if instrumentation.active is not None:
+            instrumentation.active.observe("queue_rotations_per_call", rotations)
+        return units[rank]
 
-            count += 1
-            if count > len(day_queue):
-                if emptied:
-                    raise BadSituationError
-                self.__altar_servers.empty_already_chosen_list()
-                emptied = True
+    def get_rejection_reason(
+        self: "QueueManager", su: SchedulingUnit, day: Day, mass: HolyMass
+    ) -> str | None:
+        """Get why a scheduling unit cannot be taken for a mass, apart from the already chosen list.
 
-        return next_su
+        :param su: The scheduling unit.
+        :param day: The day of the mass.
+        :param mass: The mass.
+        :return: "excluded", if the unit is not a member of the queue of the mass, another reason
+        of AltarServers.get_unavailability_reason, or None, if the unit can be taken.
+        """
+        queue = self.__get_queue_for_event(
+            mass.event.treated_as if mass.event.treated_as is not None else mass.event.id
+        )
+        if not (queue.members >> su.rank) & 1:
+            return "excluded"
+        return self.__altar_servers.get_unavailability_reason(su, day, mass, already_chosen=False)
+
+    def __retry_after_emptying(
+        self: "QueueManager", queue: UnitQueue, eligible_units: int, day: Day, mass: HolyMass
+    ) -> SchedulingUnit:
+        """Empty the already chosen list and check the unit after the first one of the queue.
+
+        :param queue: The queue, in which no unit is available.
+        :param eligible_units: The units that are available apart from the already chosen list.
+        :param day: The day of the mass.
+        :param mass: The mass.
+        :return: The unit, if it is available now.
+        """
+        queue.advance(queue.find(queue.members))
+        self.__altar_servers.empty_already_chosen_list()
+        if instrumentation.active is not None:
+            instrumentation.active.count("already_chosen_resets.queue_exhausted")
+        rank = queue.find(queue.members)
+        queue.advance(rank)
+        unit = self.__altar_servers.scheduling_units[rank]
+        available = (eligible_units >> rank) & 1 and day.servers_of_su_not_assigned(unit)
+        if instrumentation.active is not None:
+            self.__record_retry(queue, rank, day, mass, available=available)
+        if not available:
+            raise BadSituationError
+        return unit
+
+    def __record_rejections(
+        self: "QueueManager", queue: UnitQueue, rank: int | None, day: Day, mass: HolyMass
+    ) -> int:
+        """Count the units that a deque would have been rotated past before reaching a unit.
+
+        If no unit is reached, the deque would have been rotated once more than its length.
+
+        :param queue: The queue before it is advanced.
+        :param rank: The rank of the reached unit, or None, if no unit is available.
+        :param day: The day of the mass.
+        :param mass: The mass.
+        :return: The number of rejected units.
+        """
+        members = [
+            member for member in range(queue.members.bit_length()) if (queue.members >> member) & 1
+        ]
+        ordered = [member for member in members if member >= queue.head] + [
+            member for member in members if member < queue.head
+        ]
+        skipped = ordered + ordered[:1] if rank is None else ordered[: ordered.index(rank)]
+        for member in skipped:
+            unit = self.__altar_servers.scheduling_units[member]
+            reason = self.__altar_servers.get_unavailability_reason(unit, day, mass)
+            instrumentation.active.count(f"rejected_candidates.{reason}")
+        return len(skipped)
+
+    def __record_retry(
+        self: "QueueManager",
+        queue: UnitQueue,
+        rank: int,
+        day: Day,
+        mass: HolyMass,
+        *,
+        available: bool,
+    ) -> None:
+        """Count the unit that is checked again after the already chosen list was emptied.
+
+        :param queue: The queue.
+        :param rank: The rank of the unit.
+        :param day: The day of the mass.
+        :param mass: The mass.
+        :param available: If True, the unit is available.
+        """
+        if available:
+            instrumentation.active.observe("queue_rotations_per_call", len(queue) + 2)
+        else:
+            unit = self.__altar_servers.scheduling_units[rank]
+            reason = self.__altar_servers.get_unavailability_reason(unit, day, mass)
+            instrumentation.active.count(f"rejected_candidates.{reason}")
 
     def clear_state(self: "QueueManager") -> None:
         """Remove all information in the object that is added during one round."""
         self.__altar_servers.clear_state()
 
         self.__shuffle_clear_and_fill_queues()
+
+    def start_round(self: "QueueManager", seed: int) -> None:
+        """Prepare the queues for a round that only depends on the given seed.
+
+        The scheduling units are put back into their original order before they are shuffled by a
+        generator seeded with the seed. Restarts during the round continue with this generator,
+        so the same seed always creates the same plan.
+
+        :param seed: The seed of the round.
+        """
+        self.__altar_servers.scheduling_units.sort(key=lambda x: x.index)
+        if self.__rng is None:
+            self.__rng = random.Random(seed)  # noqa: S311
+        else:
+            self.__rng.seed(seed)
+        self.clear_state()
@@ -0,0 +1,136 @@
+"""A module that contains the running statistics of the services assigned during a round."""
+
+import statistics
+
+from dates.holy_mass import HolyMass
+
+
+def population_variance(total: int, square_total: int, n: int) -> float:
+    """Calculate the population variance from the sum and the sum of squares of integers.
+
+    The numerator and the denominator are integers, so the exact variance is rounded only once.
+
+    :param total: The sum of the values.
+    :param square_total: The sum of the squares of the values.
+    :param n: The number of values.
+    :return: The population variance.
+    """
+    if n < 1:
+        msg = "pvariance requires at least one data point"
+        raise statistics.StatisticsError(msg)
+    numerator = n * square_total - total * total
+    denominator = n * n
+    if numerator % denominator == 0:
+        return numerator // denominator
+    return numerator / denominator
+
+
+class _Distribution:
+    """The number of services per server, together with its sum and sum of squares."""
+
+    def __init__(self: "_Distribution", n_servers: int) -> None:
+        self.counts = [0] * n_servers
+        self.total = 0
+        self.square_total = 0
+
+    def increment(self: "_Distribution", server_index: int) -> None:
+        count = self.counts[server_index]
+        self.counts[server_index] = count + 1
+        self.total += 1
+        self.square_total += 2 * count + 1
+
+    def decrement(self: "_Distribution", server_index: int) -> None:
+        count = self.counts[server_index]
+        self.counts[server_index] = count - 1
+        self.total -= 1
+        self.square_total -= 2 * count - 1
+
+    def variance(self: "_Distribution") -> float:
+        return population_variance(self.total, self.square_total, len(self.counts))
+
+
+class RunningStatistics:
+    """The statistics of a plan that are updated with every assigned service.
+
+    The statistics are the same as the ones calculated by AltarServers.recalculate_statistics
+    from the services of the servers. Both calculate the exact rational variance and round it
+    once, so the results are equal, not only close. This requires that the services of a server
+    are added in chronological order, which is the order in which the plan is created.
+    """
+
+    def __init__(self: "RunningStatistics", n_servers: int) -> None:
+        """Create the running statistics.
+
+        :param n_servers: The number of servers.
+        """
+        self.__n_servers = n_servers
+        self.reset()
+
+    def reset(self: "RunningStatistics") -> None:
+        """Remove all services from the statistics."""
+        self.__services = _Distribution(self.__n_servers)
+        self.__event_services: dict[str, _Distribution] = {}
+        self.__dates: list[list[int]] = [[] for _ in range(self.__n_servers)]
+        self.__n_distances = 0
+        self.__distance_total = 0
+        self.__distance_square_total = 0
+
+    def add_service(self: "RunningStatistics", server_index: int, mass: HolyMass) -> None:
+        """Add a service of a server to the statistics.
+
+        :param server_index: The index of the server.
+        :param mass: The mass the server is assigned to.
+        """
+        self.__services.increment(server_index)
+
+        event_id = mass.event.id
+        if event_id not in self.__event_services:
+            self.__event_services[event_id] = _Distribution(self.__n_servers)
+        self.__event_services[event_id].increment(server_index)
+
+        date = mass.day.date.toordinal()
+        dates = self.__dates[server_index]
+        if dates:
+            self.__change_distance(date - dates[-1], 1)
+        dates.append(date)
+
+    def remove_last_service(self: "RunningStatistics", server_index: int, mass: HolyMass) -> None:
+        """Remove the service of a server that was added last from the statistics.
+
+        :param server_index: The index of the server.
+        :param mass: The mass of the last service of the server.
+        """
+        self.__services.decrement(server_index)
+        self.__event_services[mass.event.id].decrement(server_index)
+
+        dates = self.__dates[server_index]
+        date = dates.pop()
+        if dates:
+            self.__change_distance(date - dates[-1], -1)
+
+    def __change_distance(self: "RunningStatistics", distance: int, sign: int) -> None:
+        """Add a distance between two services to the statistics or remove it.
+
+        :param distance: The distance in days.
+        :param sign: 1 to add the distance, -1 to remove it.
+        """
+        self.__n_distances += sign
+        self.__distance_total += sign * distance
+        self.__distance_square_total += sign * distance * distance
+
+    def variances(self: "RunningStatistics", event_ids: list[str]) -> list[float]:
+        """Get the variance of the number of services and of the distances between the services.
+
+        :param event_ids: The ids of the events, whose distributions are considered separately.
+        :return: The variance of the number of services, the variance of the distances between the
+        services and the variance of the number of services for each event id.
+        """
+        return [
+            self.__services.variance(),
+            population_variance(
+                self.__distance_total, self.__distance_square_total, self.__n_distances
+            ),
+        ] + [
+            self.__event_services[event_id].variance() if event_id in self.__event_services else 0
+            for event_id in dict.fromkeys(event_ids)
+        ]
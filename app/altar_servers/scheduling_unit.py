@@ -10,18 +10,24 @@ class SchedulingUnit:
     """
 
     servers = None
+    index = None
+    rank = None
     avoid = set()
     no_special = False
     no_regular = False
 
-    def __init__(self: "SchedulingUnit", minis: list) -> None:
+    def __init__(self: "SchedulingUnit", minis: list, index: int | None = None) -> None:
         """Create a scheduling unit object. It contains one or multiple minis.
 
         Multiple siblings are grouped in a scheduling unit.
 
         :param minis: The list of minis.
+        :param index: The position of the unit in the list of all scheduling units. None for units
+        that are only created to pre-assign a server.
         """
         self.servers: list = minis
+        self.index = index
+        self.rank = index
         for server in self.servers:
             self.avoid = self.avoid.union(set(server.avoid))
             self.no_special = self.no_special or server.no_special
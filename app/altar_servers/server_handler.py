@@ -8,31 +8,118 @@ from altar_servers.scheduling_unit import SchedulingUnit
 from dates.calendar import Calendar
 from dates.day import Day
 from dates.holy_mass import HolyMass
+from utils import instrumentation
 from utils.exceptions import BadSituationError
 
 logger = logging.getLogger("root")
 
+MAX_BACKTRACKING_ATTEMPTS = 6
+
+
+class Backtracker:
+    """Resolves a BadSituationError by rolling back the last days instead of the whole plan.
+
+    Before each day, the state of the already chosen list is stored in a journal. If the day
+    cannot be completed, the assignments of the day and of the days before it are removed and the
+    journaled state is restored. The queues are not rolled back, so the retry takes other servers.
+    Every further failure before the failing day is passed doubles the number of rolled back days.
+    After too many failures, the plan is started again from scratch.
+    """
+
+    def __init__(self: "Backtracker") -> None:
+        """Create a backtracker with empty counters."""
+        self.avoided_restarts = 0
+        self.full_restarts = 0
+
+    def assign_servers(
+        self: "Backtracker",
+        calendar: Calendar,
+        queue_manager: QueueManager,
+        altar_servers: AltarServers,
+    ) -> None:
+        """Create a single plan by assigning servers until all masses are covered.
+
+        :param calendar: The event calendar.
+        :param queue_manager: The queue manager.
+        :param altar_servers: The altar servers object.
+        """
+        journal = []
+        day_index = 0
+        failed_day_index = -1
+        attempts = 0
+        while day_index < len(calendar.days):
+            if day_index == len(journal):
+                journal.append(altar_servers.get_already_chosen_state())
+            try:
+                _assign_day(calendar.days[day_index], queue_manager, altar_servers)
+            except BadSituationError:
+                attempts += 1
+                if attempts > MAX_BACKTRACKING_ATTEMPTS:
+                    calendar.clear()
+                    queue_manager.clear_state()
+                    self.full_restarts += 1
+                    if instrumentation.active is not None:
+                        instrumentation.active.count("full_restarts")
+                    journal = []
+                    day_index = 0
+                    failed_day_index = -1
+                    attempts = 0
+                    continue
+
+                failed_day_index = max(failed_day_index, day_index)
+                first_day_index = max(0, day_index + 1 - 2 ** (attempts - 1))
+                for index in range(day_index, first_day_index - 1, -1):
+                    _remove_day(calendar.days[index], altar_servers)
+                altar_servers.set_already_chosen_state(journal[first_day_index])
+                del journal[first_day_index + 1 :]
+                day_index = first_day_index
+                self.avoided_restarts += 1
+                if instrumentation.active is not None:
+                    instrumentation.active.count("avoided_restarts")
+                continue
+
+            day_index += 1
+            if day_index > failed_day_index:
+                attempts = 0
+
 
 def assign_servers(
-    calendar: Calendar, queue_manager: QueueManager, altar_servers: AltarServers
+    calendar: Calendar,
+    queue_manager: QueueManager,
+    altar_servers: AltarServers,
+    backtracker: Backtracker | None = None,
 ) -> None:
     """Create a single plan by assigning servers until all masses are covered.
 
     :param queue_manager:
     :param calendar: The event calendar.
     :param altar_servers: The altar servers object.
+    :param backtracker: If given, conflicts are resolved by rolling back only the last days.
     """
+    if backtracker is not None:
+        backtracker.assign_servers(calendar, queue_manager, altar_servers)
+        return
+
     while True:
         try:
             _assign_altar_servers(calendar, queue_manager, altar_servers)
         except BadSituationError:
             calendar.clear()
             queue_manager.clear_state()
+            if instrumentation.active is not None:
+                instrumentation.active.count("full_restarts")
             continue
         break
 
 
-def _pre_assign(mass: HolyMass, day: Day, altar_servers: AltarServers) -> int:
+def pre_assign(mass: HolyMass, day: Day, altar_servers: AltarServers) -> int:
+    """Assign the servers that the event of a mass names for its date.
+
+    :param mass: The mass.
+    :param day: The day of the mass.
+    :param altar_servers: The altar servers object.
+    :return: The number of assigned servers.
+    """
     assigned = 0
     if mass.event.servers is not None:
         if isinstance(mass.event.servers, dict):
@@ -67,12 +154,51 @@ def _assign_altar_servers(
     :param servers: Wrapper object of all servers.
     """
     for day in calendar.days:
-        for mass in sorted(day.masses, key=lambda x: x.event.time):
-            n_servers_assigned = _pre_assign(mass, day, altar_servers)
-            did_not_fit = []
-            while n_servers_assigned < mass.event.n_servers:
-                chosen_su = queue_manager.get_su_from_queues(day, mass, did_not_fit)
-                if n_servers_assigned + len(chosen_su) <= mass.event.n_servers:
-                    n_servers_assigned += altar_servers.assign_scheduling_unit(chosen_su, mass)
-                else:
-                    did_not_fit.append(chosen_su)
+        _assign_day(day, queue_manager, altar_servers)
+
+
+def _assign_day(day: Day, queue_manager: QueueManager, altar_servers: AltarServers) -> None:
+    """Assign altar servers to all masses of a day.
+
+    :param day: The day.
+    :param queue_manager: The queue manager.
+    :param altar_servers: The altar servers object.
+    """
+    for mass in sorted(day.masses, key=lambda x: x.event.time):
+        fill_mass(day, mass, queue_manager, altar_servers, pre_assign(mass, day, altar_servers))
+
+
+def fill_mass(
+    day: Day,
+    mass: HolyMass,
+    queue_manager: QueueManager,
+    altar_servers: AltarServers,
+    n_servers_assigned: int,
+) -> None:
+    """Take scheduling units from the queues until a mass has all of its servers.
+
+    :param day: The day of the mass.
+    :param mass: The mass.
+    :param queue_manager: The queue manager.
+    :param altar_servers: The altar servers object.
+    :param n_servers_assigned: The number of servers that are already assigned to the mass.
+    """
+    did_not_fit = []
+    while n_servers_assigned < mass.event.n_servers:
+        chosen_su = queue_manager.get_su_from_queues(day, mass, did_not_fit)
+        if n_servers_assigned + len(chosen_su) <= mass.event.n_servers:
+            n_servers_assigned += altar_servers.assign_scheduling_unit(chosen_su, mass)
+        else:
+            did_not_fit.append(chosen_su)
+
+
+def _remove_day(day: Day, altar_servers: AltarServers) -> None:
+    """Remove the servers assigned to the masses of the last assigned day.
+
+    :param day: The day.
+    :param altar_servers: The altar servers object.
+    """
+    for mass in sorted(day.masses, key=lambda x: x.event.time, reverse=True):
+        for server in reversed(mass.servers):
+            altar_servers.remove_last_service(server)
+    day.clear()
@@ -24,5 +24,4 @@ class Calendar:
     def clear(self: "Calendar") -> None:
         """Remove the assigned servers from the calendar."""
         for day in self.days:
-            for mass in day.masses:
-                mass.servers = []
+            day.clear()
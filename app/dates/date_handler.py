@@ -1,6 +1,6 @@
 """A module that contains functions to create day objects which are printed to the plan."""
 
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from dates.calendar import Calendar
 from dates.day import Day
@@ -20,13 +20,8 @@ def create_calendar(
     :return: The list of day objects.
     """
     calendar = Calendar()
-    date = start_date
-    while date <= end_date:
-        event_day = event_calendar.get_event_day_by_date(date)
-        if event_day is not None:
-            calendar.add_day(create_calendar_day(date, event_day))
-
-        date += timedelta(days=1)
+    for date, event_day in event_calendar.get_event_days(start_date, end_date).items():
+        calendar.add_day(create_calendar_day(date, event_day))
     return calendar
 
 
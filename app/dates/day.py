@@ -20,6 +20,7 @@ class Day:
         self.date = date
         self.event_day = event_day
         self.masses = []
+        self.__assigned_server_names: set[str] = set()
 
     def add_mass(self: "Day", mass: HolyMass) -> None:
         """Add a mass to the day.
@@ -29,15 +30,30 @@ class Day:
         mass.day = self
         self.masses.append(mass)
 
+    def mark_assigned(self: "Day", servers: list) -> None:
+        """Remember that servers have been assigned to a mass of this day.
+
+        :param servers: The assigned servers.
+        """
+        self.__assigned_server_names.update(server.name for server in servers)
+
     def servers_of_su_not_assigned(self: "Day", su: SchedulingUnit) -> bool:
         """Check if a server has been assigned on this day already.
 
         That can be due to pre-assignments or custom masses that take place on the same
         day as normal masses or if a round ends during a day that demands a lot of servers.
+        The check uses the set of servers assigned on this day, so it does not depend on the
+        number of masses.
         :param su: The scheduling unit to check.
         :return: True, if the server has not been assigned on this day yet. False otherwise.
         """
-        return all(all(server not in mass.servers for mass in self.masses) for server in su.servers)
+        return self.__assigned_server_names.isdisjoint(server.name for server in su.servers)
+
+    def clear(self: "Day") -> None:
+        """Remove the assigned servers from the masses of the day."""
+        for mass in self.masses:
+            mass.servers = []
+        self.__assigned_server_names.clear()
 
     def get_mass_at(self: "Day", time: datetime.time) -> HolyMass | None:
         for mass in self.masses:
@@ -22,7 +22,15 @@ class HolyMass:
 
         :param scheduling_unit: The scheduling unit to add the minis from.
         """
-        self.servers.extend(scheduling_unit.servers)
+        self.add_servers(scheduling_unit.servers)
+
+    def add_servers(self: "HolyMass", servers: list) -> None:
+        """Add servers to the holy mass and mark them as assigned on its day.
+
+        :param servers: The servers to add.
+        """
+        self.servers.extend(servers)
+        self.day.mark_assigned(servers)
 
     def __str__(self: "HolyMass") -> str:
         """Return a string representation of the holy mass."""
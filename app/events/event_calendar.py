@@ -1,19 +1,29 @@
 """A module that contains the Event Calendar class."""
 
-import copy
 import datetime
+import functools
 
 from dateutil import easter
 from events.event_day import EventDay
 from pydantic import BaseModel
 
-EASTER_SUNDAY = easter.easter(
-    datetime.datetime.now(tz=datetime.timezone(datetime.timedelta(hours=2))).year
-)
+
+@functools.lru_cache(maxsize=16)
+def easter_sunday(year: int) -> datetime.date:
+    """Get the date of Easter Sunday of a year.
+
+    :param year: The year.
+    :return: The date of Easter Sunday.
+    """
+    return easter.easter(year)
 
 
 class EventCalendar(BaseModel):
-    """The Event calendar class that contains all events and their information."""
+    """The Event calendar class that contains all events and their information.
+
+    The event days of the calendar are shared by all dates they take place on, so they must not be
+    changed. A day with custom events gets a new event day containing the events of both.
+    """
 
     weekday: dict[int, EventDay]
     easter: dict[int, EventDay]
@@ -30,24 +40,72 @@ class EventCalendar(BaseModel):
     def get_event_day_by_date(self: "EventCalendar", date: datetime.date) -> EventDay | None:
         """Get the event day object if there are any events on a specific date.
 
+        Movable feasts are placed relative to Easter Sunday of the year of the date.
+
         :param date: The date to get the event day object for.
         :return: The event day object if there are any events, else None.
         """
-        event_day = None
-        if date.weekday() in self.weekday:
-            event_day = copy.deepcopy(self.weekday[date.weekday()])
+        event_day = self.weekday.get(date.weekday())
 
         if date in self.date:
             event_day = self.date[date]
 
-        days_to_easter: int = (date - EASTER_SUNDAY).days
+        days_to_easter: int = (date - easter_sunday(date.year)).days
         if days_to_easter in self.easter:
             event_day = self.easter[days_to_easter]
 
         if date in self.custom:
-            if event_day is None:
-                return self.custom[date]
-
-            event_day.events.extend(self.custom[date].events)
+            return self.__merge_custom(event_day, self.custom[date])
 
         return event_day
+
+    def get_event_days(
+        self: "EventCalendar", start_date: datetime.date, end_date: datetime.date
+    ) -> dict[datetime.date, EventDay]:
+        """Get the event days of all dates of a period that have any events.
+
+        The result is equal to calling get_event_day_by_date for every date, but the dates of the
+        easter, date and custom events are looked up once per period instead of once per date.
+
+        :param start_date: The first date of the period.
+        :param end_date: The last date of the period.
+        :return: The event day of each date with events, ordered by date.
+        """
+        n_dates = (end_date - start_date).days + 1
+        first_weekday = start_date.weekday()
+        event_days = {}
+        for i in range(n_dates):
+            event_day = self.weekday.get((first_weekday + i) % 7)
+            if event_day is not None:
+                event_days[start_date + datetime.timedelta(days=i)] = event_day
+
+        event_days.update(
+            (date, event_day)
+            for date, event_day in self.date.items()
+            if start_date <= date <= end_date
+        )
+
+        for year in range(start_date.year, end_date.year + 1):
+            easter_date = easter_sunday(year)
+            for days_to_easter, event_day in self.easter.items():
+                date = easter_date + datetime.timedelta(days=days_to_easter)
+                if date.year == year and start_date <= date <= end_date:
+                    event_days[date] = event_day
+
+        for date, custom_day in self.custom.items():
+            if start_date <= date <= end_date:
+                event_days[date] = self.__merge_custom(event_days.get(date), custom_day)
+
+        return dict(sorted(event_days.items()))
+
+    @staticmethod
+    def __merge_custom(event_day: EventDay | None, custom_day: EventDay) -> EventDay:
+        """Add the custom events of a date to its event day.
+
+        :param event_day: The event day of the date without the custom events, if there is any.
+        :param custom_day: The custom event day of the date.
+        :return: A new event day with the events of both, or the custom event day.
+        """
+        if event_day is None:
+            return custom_day
+        return event_day.model_copy(update={"events": [*event_day.events, *custom_day.events]})
@@ -0,0 +1 @@
+"""A package containing the exporters of the final plan."""
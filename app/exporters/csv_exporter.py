@@ -0,0 +1,32 @@
+"""A module that writes the final plan to a CSV file."""
+
+import csv
+from pathlib import Path
+
+from exporters.exported_plan import ExportedPlan
+
+CSV_COLUMNS = ("date", "time", "event_id", "day_name", "comment", "location", "server")
+
+
+def export_csv(plan: ExportedPlan, directory: Path) -> None:
+    """Write the plan to plan.csv with one row per service.
+
+    :param plan: The plan.
+    :param directory: The output directory.
+    """
+    with (directory / "plan.csv").open("w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_COLUMNS)
+        for mass in plan.masses:
+            for server in mass.servers:
+                writer.writerow(
+                    (
+                        mass.date.isoformat(),
+                        mass.time.strftime("%H:%M"),
+                        mass.event_id,
+                        mass.day_name or "",
+                        mass.comment or "",
+                        mass.location or "",
+                        server,
+                    )
+                )
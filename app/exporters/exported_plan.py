@@ -0,0 +1,62 @@
+"""A module that contains the structured form of the final plan, which the exporters write."""
+
+import datetime
+
+from dates.calendar import Calendar
+from pydantic import BaseModel
+
+
+class ExportedMass(BaseModel):
+    """A mass of the final plan with the names of its servers."""
+
+    date: datetime.date
+    time: datetime.time
+    event_id: str
+    day_name: str | None = None
+    comment: str | None = None
+    location: str | None = None
+    servers: list[str]
+
+
+class ExportedPlan(BaseModel):
+    """The masses of the final plan, ordered by date and time."""
+
+    start_date: datetime.date
+    end_date: datetime.date
+    masses: list[ExportedMass]
+
+    @classmethod
+    def from_calendar(
+        cls: type["ExportedPlan"],
+        calendar: Calendar,
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ) -> "ExportedPlan":
+        """Collect the masses and the assigned servers of a calendar.
+
+        :param calendar: The calendar with the assigned servers.
+        :param start_date: The start date of the plan.
+        :param end_date: The end date of the plan.
+        :return: The plan.
+        """
+        masses = [
+            ExportedMass(
+                date=day.date,
+                time=mass.event.time,
+                event_id=mass.event.id,
+                day_name=day.event_day.name,
+                comment=mass.event.comment,
+                location=mass.event.location,
+                servers=sorted(server.name for server in mass.servers),
+            )
+            for day in calendar.days
+            for mass in sorted(day.masses, key=lambda x: x.event.time)
+        ]
+        return cls(start_date=start_date, end_date=end_date, masses=masses)
+
+    def servers(self: "ExportedPlan") -> list[str]:
+        """Get the names of all servers that have a service on the plan.
+
+        :return: The sorted names.
+        """
+        return sorted({server for mass in self.masses for server in mass.servers})
@@ -0,0 +1,41 @@
+"""A module that contains the exporters of the final plan, which do not need LaTeX."""
+
+import datetime
+from collections.abc import Callable
+from pathlib import Path
+
+from dates.calendar import Calendar
+from exporters.csv_exporter import export_csv
+from exporters.exported_plan import ExportedPlan
+from exporters.ics_exporter import export_ics, export_ics_per_server
+from exporters.json_exporter import export_json
+
+EXPORTERS: dict[str, Callable[[ExportedPlan, Path], None]] = {
+    "json": export_json,
+    "csv": export_csv,
+    "ics": export_ics,
+    "ics-servers": export_ics_per_server,
+}
+
+
+def export_plan(
+    calendar: Calendar,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    formats: list[str],
+    directory: Path,
+) -> None:
+    """Write the final plan in the given formats.
+
+    :param calendar: The calendar with the assigned servers.
+    :param start_date: The start date of the plan.
+    :param end_date: The end date of the plan.
+    :param formats: The names of the exporters.
+    :param directory: The output directory.
+    """
+    if not formats:
+        return
+    plan = ExportedPlan.from_calendar(calendar, start_date, end_date)
+    directory.mkdir(parents=True, exist_ok=True)
+    for export_format in formats:
+        EXPORTERS[export_format](plan, directory)
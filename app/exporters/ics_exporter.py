@@ -0,0 +1,124 @@
+"""A module that writes the final plan to iCalendar files.
+
+The masses are written as events in floating local time, so calendar apps show them at the time of
+the mass wherever they are. The duration of a mass is not part of the config, so every event lasts
+one hour.
+"""
+
+import datetime
+import re
+from pathlib import Path
+
+from exporters.exported_plan import ExportedMass, ExportedPlan
+
+MASS_DURATION = "PT1H"
+MAX_LINE_LENGTH = 75
+
+
+def escape_text(text: str) -> str:
+    """Escape a text value of iCalendar.
+
+    :param text: The text.
+    :return: The escaped text.
+    """
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def fold_line(line: str) -> str:
+    """Fold a content line, so no line is longer than 75 octets.
+
+    :param line: The content line.
+    :return: The folded line, whose continuation lines start with a space.
+    """
+    parts = []
+    part = ""
+    part_length = 0
+    for character in line:
+        length = len(character.encode())
+        if part_length + length > MAX_LINE_LENGTH:
+            parts.append(part)
+            part = " "
+            part_length = 1
+        part += character
+        part_length += length
+    parts.append(part)
+    return "\r\n".join(parts)
+
+
+def get_uid(mass: ExportedMass) -> str:
+    """Get the unique id of the event of a mass.
+
+    The id is built from the date, the time, the event id and the location of the mass only, so a
+    calendar app updates the event instead of adding another one when the plan is exported again.
+    The event id and the location are escaped like any other text value.
+
+    :param mass: The mass.
+    :return: The unique id.
+    """
+    uid = f"{mass.date:%Y%m%d}T{mass.time:%H%M%S}-{escape_text(mass.event_id)}"
+    if mass.location is not None:
+        uid += f"-{escape_text(mass.location)}"
+    return f"{uid}@mini-plan"
+
+
+def render_event(mass: ExportedMass, uid: str, timestamp: str) -> list[str]:
+    """Render a mass as an iCalendar event.
+
+    :param mass: The mass.
+    :param uid: The unique id of the event.
+    :param timestamp: The time of the export in UTC.
+    :return: The content lines of the event.
+    """
+    start = datetime.datetime.combine(mass.date, mass.time)
+    summary = "Ministrieren" if mass.comment is None else f"Ministrieren ({mass.comment})"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{timestamp}",
+        f"DTSTART:{start:%Y%m%dT%H%M%S}",
+        f"DURATION:{MASS_DURATION}",
+        f"SUMMARY:{escape_text(summary)}",
+        f"DESCRIPTION:{escape_text('Ministranten: ' + ', '.join(mass.servers))}",
+    ]
+    if mass.location is not None:
+        lines.append(f"LOCATION:{escape_text(mass.location)}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def render_calendar(plan: ExportedPlan, server: str | None = None) -> str:
+    """Render the masses of a plan as an iCalendar file.
+
+    :param plan: The plan.
+    :param server: If given, only the masses of this server are rendered.
+    :return: The content of the file.
+    """
+    timestamp = f"{datetime.datetime.now(tz=datetime.UTC):%Y%m%dT%H%M%SZ}"
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Mini-Plan-Ersteller//DE"]
+    for mass in plan.masses:
+        if server is None or server in mass.servers:
+            lines.extend(render_event(mass, get_uid(mass), timestamp))
+    lines.append("END:VCALENDAR")
+    return "".join(fold_line(line) + "\r\n" for line in lines)
+
+
+def export_ics(plan: ExportedPlan, directory: Path) -> None:
+    """Write all masses of the plan to plan.ics.
+
+    :param plan: The plan.
+    :param directory: The output directory.
+    """
+    (directory / "plan.ics").write_bytes(render_calendar(plan).encode())
+
+
+def export_ics_per_server(plan: ExportedPlan, directory: Path) -> None:
+    """Write the masses of each server to a file named after the server in the folder ics.
+
+    :param plan: The plan.
+    :param directory: The output directory.
+    """
+    ics_directory = directory / "ics"
+    ics_directory.mkdir(parents=True, exist_ok=True)
+    for server in plan.servers():
+        file_name = re.sub(r"[^\w\- ]", "_", server)
+        (ics_directory / f"{file_name}.ics").write_bytes(render_calendar(plan, server).encode())
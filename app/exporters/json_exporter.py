@@ -0,0 +1,14 @@
+"""A module that writes the final plan to a JSON file."""
+
+from pathlib import Path
+
+from exporters.exported_plan import ExportedPlan
+
+
+def export_json(plan: ExportedPlan, directory: Path) -> None:
+    """Write the plan to plan.json.
+
+    :param plan: The plan.
+    :param directory: The output directory.
+    """
+    (directory / "plan.json").write_text(plan.model_dump_json(indent=2), encoding="utf-8")
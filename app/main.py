@@ -1,116 +1,228 @@
-"""A module that contains the high level function calls of the altar server plan creator."""
+"""A module that contains the high level function calls of the altar server plan creator.
 
-import copy
+Only the standard library is imported at start-up. The modules that create a plan or run the plan
+service are imported once they are needed, so recompiling an unchanged plan starts instantly.
+"""
+
+import argparse
+import hashlib
+import json
 import logging
+import os
 import subprocess
 import sys
 from pathlib import Path
 
 logger = logging.getLogger("root")
 
-from altar_servers.altar_servers import AltarServers, get_distribution
-from altar_servers.queue_manager import QueueManager
-from altar_servers.server_handler import assign_servers
-from dates.calendar import Calendar
-from dates.date_handler import create_calendar
-from events.event_calendar import EventCalendar
-from plan_info.plan_info import PlanInfo
-from tqdm import tqdm
-from utils.latex_handler import generate_pdf
+CONFIG_PATH = Path("config")
+CONFIG_FILES = ("altar_servers.json", "holy_masses.json", "plan_info.json")
+PLAN_PATH = Path("output/plan.tex")
+PLAN_KEY_PATH = Path("output/plan.key")
+FORMATS = ("pdf", "json", "csv", "ics", "ics-servers")
+PLAN_OPTIONS = (
+    "max_rounds",
+    "time_budget",
+    "target_score",
+    "stagnation_rounds",
+    "local_search_iterations",
+    "backtracking",
+    "batch_size",
+    "seed",
+)
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command line arguments.
+
+    :return: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Mini-Plan-Ersteller")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes that create plans in parallel (0: one per CPU core).",
+    )
+    parser.add_argument("--max-rounds", type=int, help="Stop after this number of rounds.")
+    parser.add_argument("--time-budget", type=float, help="Stop after this number of seconds.")
+    parser.add_argument("--target-score", type=float, help="Stop once a plan reaches this score.")
+    parser.add_argument(
+        "--stagnation-rounds",
+        type=int,
+        help="Stop once this number of rounds in a row did not find a better plan.",
+    )
+    parser.add_argument(
+        "--local-search-iterations",
+        type=int,
+        help="Improve the best plan with this number of local search moves.",
+    )
+    parser.add_argument(
+        "--backtracking",
+        action="store_true",
+        default=None,
+        help="Roll back only the last days instead of the whole plan if servers do not fit.",
+    )
+    parser.add_argument(
+        "--seed", type=int, help="Seed of the run, from which every round gets its seed."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the run of the checkpoint in the output folder instead of starting anew.",
+    )
+    parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="Keep the last plan and only replace the assignments that the changed config files "
+        "made invalid.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        help="Create this number of plans at once instead of one plan per round.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Optimize again even if the result of the same configs is cached.",
+    )
+    parser.add_argument(
+        "--format",
+        nargs="+",
+        choices=FORMATS,
+        default=["pdf"],
+        help="Write the plan in these formats to the output folder (ics-servers: one .ics file "
+        "per server).",
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="Measure the phases of the run and write a performance report to "
+        "output/performance.json.",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Start the plan service, which creates plans for HTTP requests, instead of one plan.",
+    )
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        metavar="MANIFEST",
+        help="Create the plans of all jobs of this manifest on one shared pool of processes.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Host of the plan service.")
+    parser.add_argument("--port", type=int, default=8080, help="Port of the plan service.")
+    parser.add_argument(
+        "--config-root",
+        type=Path,
+        default=Path(),
+        help="Directory of the config directories that clients of the plan service may use "
+        "(default: the working directory).",
+    )
+    return parser.parse_args()
+
+
+def get_input_key(arguments: argparse.Namespace) -> str:
+    """Get a key of the raw config files and the options that change the plan.
+
+    The key is stored next to the .tex file of the plan, so an unchanged plan can be compiled
+    again without validating the config files.
+
+    :param arguments: The parsed command line arguments.
+    :return: The key.
+    """
+    digest = hashlib.sha256()
+    for file_name in CONFIG_FILES:
+        digest.update((CONFIG_PATH / file_name).read_bytes())
+    options = {name: getattr(arguments, name) for name in PLAN_OPTIONS}
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    return digest.hexdigest()
+
 
-TOTAL_OPTIMIZE_ROUNDS = 5000
+def is_plan_unchanged(arguments: argparse.Namespace) -> bool:
+    """Check if the plan in the output folder can be compiled again instead of being created.
+
+    A plan without a key was not created by a run with the key, e.g. it was edited by hand, so it
+    is compiled again like before. The same holds if the config files cannot be read.
+
+    :param arguments: The parsed command line arguments.
+    :return: True, if the plan exists and was created from the same config files and options or
+    has no key.
+    """
+    if not PLAN_PATH.exists():
+        return False
+    if not PLAN_KEY_PATH.exists():
+        return True
+    try:
+        return PLAN_KEY_PATH.read_text() == get_input_key(arguments)
+    except OSError:
+        return True
+
+
+def compile_plan() -> None:
+    """Compile the LaTeX file of the plan in the output folder again."""
+    try:
+        subprocess.run(
+            [
+                "/usr/bin/pdflatex",
+                "-interaction=nonstopmode",
+                "-output-directory=output",
+                "output/plan.tex",
+            ],
+            check=True,
+        )
+        logger.info("Abgeschlossen")
+    except subprocess.CalledProcessError as e:
+        logger.info("Fehler: %s", e)
 
 
 def main() -> None:
     """Load the config files and call the individual steps."""
+    arguments = parse_arguments()
+
     logging.basicConfig(level=logging.INFO, stream=sys.stdout, format="%(levelname)s - %(message)s")
     logger.info("Willkommen beim Mini-Plan-Ersteller")
 
-    if Path.exists(Path("output/plan.tex")):
-        logger.info("Plan existiert bereits. Kompilere erneut ...")
-        try:
-            subprocess.run(
-                [
-                    "/usr/bin/pdflatex",
-                    "-interaction=nonstopmode",
-                    "-output-directory=output",
-                    "output/plan.tex",
-                ],
-                check=True,
-            )
-            logger.info("Abgeschlossen")
-        except subprocess.CalledProcessError as e:
-            logger.info("Fehler: %s", e)
-    else:
-        logger.info("Konfiguration wird geladen...")
-        raw_event_calendar = Path("config/holy_masses.json").read_text()
-        event_calendar = EventCalendar.model_validate_json(raw_event_calendar)
-
-        raw_plan_info = Path("config/plan_info.json").read_text()
-        plan_info = PlanInfo.model_validate_json(raw_plan_info)
-
-        logger.info("Kalender wird erstellet...")
-        calendar = create_calendar(plan_info.start_date, plan_info.end_date, event_calendar)
-        logger.info("Abgeschlossen")
-        logger.info("Ministranten werden erstellt...")
-        raw_altar_servers = Path("config/altar_servers.json").read_text()
-        altar_servers = AltarServers.model_validate_json(raw_altar_servers)
-        logger.info("Abgeschlossen")
-        logger.info("Warteschlangen werden erstellt...")
-        queue_manager = QueueManager(event_calendar, altar_servers)
-        logger.info("Abgeschlossen")
-
-        logger.info("Ministranten werden eingeteilt...")
+    if arguments.serve:
+        from optimization.result_cache import ResultCache  # noqa: PLC0415
+        from service.http_server import serve  # noqa: PLC0415
+        from service.plan_service import PlanService  # noqa: PLC0415
 
-        final_altar_servers, final_calendar = optimize_assignments(
-            calendar, queue_manager, altar_servers, event_calendar
+        plan_service = PlanService(
+            arguments.workers or os.cpu_count(), None if arguments.no_cache else ResultCache()
         )
+        serve(arguments.host, arguments.port, plan_service, arguments.config_root)
+        return
 
-        logger.info("Statistik")
-        for server in get_distribution(final_altar_servers):
-            logger.info(server)
+    if arguments.batch is not None:
+        from optimization.result_cache import ResultCache  # noqa: PLC0415
+        from service.batch import run_batch  # noqa: PLC0415
+        from service.plan_service import PlanService  # noqa: PLC0415
 
-        logger.info("PDF wird erstellt")
-        generate_pdf(
-            final_calendar, plan_info.start_date, plan_info.end_date, plan_info.welcome_text
-        )
-        logger.info("Abgeschlossen")
+        workers = arguments.workers or os.cpu_count()
+        plan_service = PlanService(workers, None if arguments.no_cache else ResultCache())
+        try:
+            run_batch(arguments.batch, plan_service, workers)
+        finally:
+            plan_service.close()
+        return
+
+    if (
+        not arguments.no_cache
+        and not arguments.instrument
+        and not arguments.repair
+        and set(arguments.format) == {"pdf"}
+        and is_plan_unchanged(arguments)
+    ):
+        logger.info("Plan existiert bereits. Kompilere erneut ...")
+        compile_plan()
+        return
 
+    from plan_run import run_plan  # noqa: PLC0415
 
-def optimize_assignments(
-    calendar: Calendar,
-    queue_manager: QueueManager,
-    altar_servers: AltarServers,
-    event_calendar: EventCalendar,
-) -> tuple:
-    """Create multiple plans until keep the one with the lowest score in number of services.
-
-    :param event_calendar:
-    :param queue_manager:
-    :param calendar: The calendar.
-    :param altar_servers: The raw altar server dictionary.
-    :return: The resulting altar servers object and the calendar object with all altar servers
-    assigned.
-    """
-    final_calendar = None
-    final_altar_servers = None
-    sum_of_variances_final = sys.maxsize
-    iterations = tqdm(total=TOTAL_OPTIMIZE_ROUNDS)
-    for i in range(TOTAL_OPTIMIZE_ROUNDS):
-        assign_servers(calendar, queue_manager, altar_servers)
-        sum_of_variances = sum(altar_servers.calculate_statistics(event_calendar))
-        if sum_of_variances < sum_of_variances_final:
-            logger.info("%d WAS BETTER %d", i, sum_of_variances)
-            final_altar_servers = altar_servers.get_copy()
-            final_calendar = copy.deepcopy(calendar)
-            sum_of_variances_final = sum_of_variances
-
-        iterations.update(1)
-        sys.stdout.flush()
-
-        calendar.clear()
-        queue_manager.clear_state()
-    return final_altar_servers, final_calendar
+    run_plan(arguments, get_input_key(arguments))
 
 
 if __name__ == "__main__":
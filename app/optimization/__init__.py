@@ -0,0 +1 @@
+"""A package containing the strategies that optimize the assignment of the altar servers."""
@@ -0,0 +1,447 @@
+"""A module that creates many candidate plans at once in lockstep.
+
+The calendar is compiled once into arrays: the masses in the order they are assigned, the queue
+each of them takes its servers from, the scheduling units that are statically eligible for it and
+its pre-assigned servers. A batch of plans is then created by walking these masses a single time.
+Every plan has its own queue orders, cursors, already chosen list and servers assigned per day,
+which are rows of NumPy arrays, so each step of the assignment is done for all plans together.
+
+For each plan, the servers are chosen exactly as assign_servers chooses them from the queues of
+the QueueManager. A plan that runs into a conflict is dropped instead of being started again.
+Since a restart shuffles all queues anew, the remaining plans are distributed like the plans of
+the rounds. All plans of a batch are scored together with the vectorized scoring.
+"""
+
+import logging
+from array import array
+
+import numpy as np
+from altar_servers.altar_servers import AltarServers
+from dates.calendar import Calendar
+from dates.day import Day
+from dates.holy_mass import HolyMass
+from events.event_calendar import EventCalendar
+from optimization.snapshot import PlanSnapshot
+from optimization.vectorized_scoring import VectorizedScoring
+
+logger = logging.getLogger("root")
+
+SCAN_WIDTH = 8
+
+
+class _CompiledMass:
+    """The static data of a mass that is required to assign servers to it."""
+
+    __slots__ = ("column", "eligible", "n_servers", "pre_assigned", "queue")
+
+    def __init__(
+        self: "_CompiledMass",
+        column: int,
+        queue: int,
+        n_servers: int,
+        eligible: np.ndarray,
+        pre_assigned: list[int],
+    ) -> None:
+        self.column = column
+        self.queue = queue
+        self.n_servers = n_servers
+        self.eligible = eligible
+        self.pre_assigned = pre_assigned
+
+
+class _CompiledUnits:
+    """The static data of the scheduling units and the queues."""
+
+    __slots__ = (
+        "n_servers",
+        "queue_members",
+        "server_blocks",
+        "unit_blocks",
+        "unit_servers",
+        "unit_sizes",
+    )
+
+    def __init__(self: "_CompiledUnits", altar_servers: AltarServers, event_ids: list[str]) -> None:
+        servers = altar_servers.altar_servers
+        units = sorted(altar_servers.scheduling_units, key=lambda x: x.index)
+        self.n_servers = len(servers)
+        self.unit_sizes = np.array([len(unit) for unit in units], dtype=np.int64)
+        self.unit_servers = np.full((len(units), max(map(len, units))), -1, dtype=np.int64)
+        for unit in units:
+            self.unit_servers[unit.index, : len(unit)] = [
+                altar_servers.get_server_index(server) for server in unit.servers
+            ]
+
+        units_with_name: dict[str, np.ndarray] = {}
+        for unit in units:
+            for server in unit.servers:
+                units_with_name.setdefault(server.name, np.zeros(len(units), dtype=bool))
+                units_with_name[server.name][unit.index] = True
+        self.server_blocks = np.array([units_with_name[server.name] for server in servers])
+        self.unit_blocks = np.array(
+            [
+                np.any([units_with_name[server.name] for server in unit.servers], axis=0)
+                for unit in units
+            ]
+        )
+
+        self.queue_members = [
+            np.array([event_id not in unit.avoid and not unit.no_regular for unit in units])
+            for event_id in event_ids
+        ]
+        self.queue_members.append(np.array([not unit.no_special for unit in units]))
+
+
+class PlanBatch:
+    """The plans of a batch that were created without conflicts, together with their scores."""
+
+    def __init__(
+        self: "PlanBatch",
+        servers: np.ndarray,
+        offsets: np.ndarray,
+        scores: list[float],
+        n_failed: int,
+    ) -> None:
+        """Create a plan batch.
+
+        :param servers: One row per plan with the indices of the assigned servers in the columns
+        of the masses, -1 for empty columns.
+        :param offsets: The first column of each mass in the order of the calendar and the number
+        of columns.
+        :param scores: The score of each plan.
+        :param n_failed: The number of plans that were dropped because of conflicts.
+        """
+        self.__servers = servers
+        self.__offsets = offsets
+        self.scores = scores
+        self.n_failed = n_failed
+
+    def __len__(self: "PlanBatch") -> int:
+        """Get the number of plans that were created without conflicts."""
+        return len(self.scores)
+
+    def snapshot(self: "PlanBatch", index: int) -> PlanSnapshot:
+        """Take a snapshot of a plan of the batch.
+
+        :param index: The index of the plan.
+        :return: The snapshot.
+        """
+        row = self.__servers[index]
+        is_assigned = row >= 0
+        assigned_before = np.concatenate(([0], np.cumsum(is_assigned)))
+        return PlanSnapshot(
+            array("i", row[is_assigned].astype(np.int32).tobytes()),
+            array("i", assigned_before[self.__offsets].astype(np.int32).tobytes()),
+        )
+
+
+class BatchConstruction:
+    """Creates batches of plans for a calendar, walking the calendar once per batch."""
+
+    def __init__(
+        self: "BatchConstruction",
+        calendar: Calendar,
+        altar_servers: AltarServers,
+        event_calendar: EventCalendar,
+    ) -> None:
+        """Compile the calendar, the scheduling units and the queues into arrays.
+
+        :param calendar: The calendar without any assigned servers.
+        :param altar_servers: The altar servers object.
+        :param event_calendar: The event calendar containing the weekday ids.
+        """
+        regular_queues = {
+            event_id: i
+            for i, event_id in enumerate(dict.fromkeys(event_calendar.get_list_of_weekday_ids()))
+        }
+        self.__units = _CompiledUnits(altar_servers, list(regular_queues))
+        units = sorted(altar_servers.scheduling_units, key=lambda x: x.index)
+
+        self.__days: list[list[_CompiledMass]] = []
+        offsets = [0]
+        columns = {}
+        for day in calendar.days:
+            for mass in day.masses:
+                columns[id(mass)] = offsets[-1]
+                n_pre_assigned = len(self.__pre_assigned_names(mass, day))
+                offsets.append(offsets[-1] + max(mass.event.n_servers, n_pre_assigned))
+        self.__offsets = np.array(offsets, dtype=np.int64)
+        self.__column_masses = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+        for day in calendar.days:
+            available = np.array([unit.is_available_on(day.date) for unit in units])
+            compiled_masses = []
+            for mass in sorted(day.masses, key=lambda x: x.event.time):
+                event = mass.event
+                identifier = event.treated_as if event.treated_as is not None else event.id
+                eligible = available & np.array(
+                    [
+                        (event.location is None or event.location in unit.locations)
+                        and event.id not in unit.avoid
+                        for unit in units
+                    ]
+                )
+                pre_assigned = []
+                for name in self.__pre_assigned_names(mass, day):
+                    try:
+                        pre_assigned.append(
+                            altar_servers.get_server_index(altar_servers.get_server_by_name(name))
+                        )
+                    except KeyError:
+                        logger.warning("Server %s not found.", name)
+                compiled_masses.append(
+                    _CompiledMass(
+                        columns[id(mass)],
+                        regular_queues.get(identifier, len(regular_queues)),
+                        event.n_servers,
+                        eligible,
+                        pre_assigned,
+                    )
+                )
+            self.__days.append(compiled_masses)
+
+        self.__scoring = VectorizedScoring(calendar, altar_servers, event_calendar)
+
+    @staticmethod
+    def __pre_assigned_names(mass: HolyMass, day: Day) -> list[str]:
+        """Get the names of the servers that are pre-assigned to a mass.
+
+        :param mass: The mass.
+        :param day: The day of the mass.
+        :return: The names of the servers.
+        """
+        servers = mass.event.servers
+        if servers is None:
+            return []
+        if isinstance(servers, dict):
+            return [name for date, names in servers.items() if date == day.date for name in names]
+        return list(servers)
+
+    def create_seeded_plans(self: "BatchConstruction", n_plans: int, seed: int) -> PlanBatch:
+        """Create a batch of plans that only depends on the given seed.
+
+        :param n_plans: The number of plans to create.
+        :param seed: The seed of the generator that draws the orders of the scheduling units.
+        :return: The batch of plans.
+        """
+        return self.create_plans(n_plans, np.random.default_rng(seed))
+
+    def recreate_plan(
+        self: "BatchConstruction", n_plans: int, seed: int, score: float
+    ) -> PlanSnapshot:
+        """Create the best plan of a seeded batch again.
+
+        The best plan is the first one with the given score. Even if only the first plans of the
+        batch were considered, no plan before the best of them has the same score.
+
+        :param n_plans: The number of plans of the batch.
+        :param seed: The seed of the batch.
+        :param score: The score of the best plan.
+        :return: The snapshot of the plan.
+        """
+        batch = self.create_seeded_plans(n_plans, seed)
+        return batch.snapshot(batch.scores.index(score))
+
+    def create_plans(
+        self: "BatchConstruction", n_plans: int, generator: np.random.Generator
+    ) -> PlanBatch:
+        """Create a batch of plans from random orders of the scheduling units.
+
+        The queues of every plan are built from its own order of the scheduling units, like the
+        QueueManager builds them from a new shuffle before every round.
+
+        :param n_plans: The number of plans to create.
+        :param generator: The generator that draws the orders.
+        :return: The batch of plans.
+        """
+        return self.create_plans_from_orders(
+            generator.permuted(
+                np.tile(np.arange(len(self.__units.unit_sizes)), (n_plans, 1)), axis=1
+            )
+        )
+
+    def create_plans_from_orders(self: "BatchConstruction", permutations: np.ndarray) -> PlanBatch:
+        """Create a batch of plans and score the ones that were created without conflicts.
+
+        :param permutations: The order of the indices of the scheduling units for every plan.
+        :return: The batch of plans.
+        """
+        n_plans = len(permutations)
+        state = _BatchState(self.__units, permutations, int(self.__offsets[-1]))
+        for compiled_masses in self.__days:
+            state.start_day()
+            for mass in compiled_masses:
+                state.assign_mass(mass)
+
+        servers = state.servers[state.alive]
+        rows, columns = np.nonzero(servers >= 0)
+        statistics = self.__scoring.statistics_of_services(
+            servers[rows, columns] + rows * self.__units.n_servers,
+            self.__column_masses[columns],
+            len(servers),
+        )
+        return PlanBatch(
+            servers,
+            self.__offsets,
+            [sum(row) for row in statistics.tolist()],
+            n_plans - len(servers),
+        )
+
+
+class _BatchState:
+    """The state of the plans of a batch while the servers are assigned.
+
+    The state of each plan corresponds to the state of the QueueManager and the AltarServers
+    object during a round. The queue of a plan is a row of the order of its scheduling units
+    together with a cursor, which replaces moving the first unit of a deque to its end. The units
+    that are either already chosen or share a server with a unit assigned on the current day are
+    kept together as blocked, so the availability of a unit is a single lookup.
+    """
+
+    def __init__(
+        self: "_BatchState", units: _CompiledUnits, permutations: np.ndarray, n_columns: int
+    ) -> None:
+        n_plans, n_units = permutations.shape
+        self.units = units
+        self.queues = [
+            permutations[members[permutations]].reshape(n_plans, -1)
+            for members in units.queue_members
+        ]
+        self.cursors = [np.zeros(n_plans, dtype=np.int64) for _ in self.queues]
+        self.chosen = np.zeros((n_plans, n_units), dtype=bool)
+        self.n_chosen = np.zeros(n_plans, dtype=np.int64)
+        self.assigned_today = np.zeros((n_plans, n_units), dtype=bool)
+        self.blocked = np.zeros((n_plans, n_units), dtype=bool)
+        self.did_not_fit = np.zeros((n_plans, n_units), dtype=bool)
+        self.has_did_not_fit = False
+        self.alive = np.ones(n_plans, dtype=bool)
+        self.servers = np.full((n_plans, n_columns), -1, dtype=np.int64)
+
+    def start_day(self: "_BatchState") -> None:
+        """Forget the servers that were assigned on the previous day."""
+        self.assigned_today[:] = False
+        np.copyto(self.blocked, self.chosen)
+
+    def assign_mass(self: "_BatchState", mass: _CompiledMass) -> None:
+        """Assign servers to a mass in all plans.
+
+        :param mass: The compiled mass.
+        """
+        all_rows = np.arange(len(self.alive))
+        for i, server in enumerate(mass.pre_assigned):
+            self.servers[:, mass.column + i] = server
+            self.assigned_today |= self.units.server_blocks[server]
+            self.blocked |= self.units.server_blocks[server]
+            self.__count_chosen(all_rows)
+        n_assigned = np.full(len(self.alive), len(mass.pre_assigned), dtype=np.int64)
+
+        while True:
+            rows = np.flatnonzero(self.alive & (n_assigned < mass.n_servers))
+            if not rows.size:
+                break
+            rows, units = self.__choose(rows, mass)
+            fits = n_assigned[rows] + self.units.unit_sizes[units] <= mass.n_servers
+            if not fits.all():
+                self.did_not_fit[rows[~fits], units[~fits]] = True
+                self.has_did_not_fit = True
+                rows = rows[fits]
+                units = units[fits]
+
+            unit_servers = self.units.unit_servers[units]
+            for i in range(unit_servers.shape[1]):
+                has_server = unit_servers[:, i] >= 0
+                self.servers[rows[has_server], mass.column + n_assigned[rows[has_server]] + i] = (
+                    unit_servers[has_server, i]
+                )
+            n_assigned[rows] += self.units.unit_sizes[units]
+            unit_blocks = self.units.unit_blocks[units]
+            self.assigned_today[rows] |= unit_blocks
+            self.blocked[rows] |= unit_blocks
+            self.chosen[rows, units] = True
+            self.__count_chosen(rows)
+
+        if self.has_did_not_fit:
+            self.did_not_fit[:] = False
+            self.has_did_not_fit = False
+
+    def __count_chosen(self: "_BatchState", rows: np.ndarray) -> None:
+        """Count a chosen scheduling unit and empty the already chosen list once it is full.
+
+        :param rows: The plans in which a unit was chosen.
+        """
+        self.n_chosen[rows] += 1
+        self.__empty_chosen(rows[self.n_chosen[rows] == self.units.n_servers])
+
+    def __empty_chosen(self: "_BatchState", rows: np.ndarray) -> None:
+        """Empty the already chosen list.
+
+        :param rows: The plans whose list is emptied.
+        """
+        self.chosen[rows] = False
+        self.n_chosen[rows] = 0
+        self.blocked[rows] = self.assigned_today[rows]
+
+    def __scan(
+        self: "_BatchState", rows: np.ndarray, mass: _CompiledMass, start: int, width: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Find the first unit in a part of the queues that is either available or did not fit.
+
+        :param rows: The plans to scan the queues of.
+        :param mass: The compiled mass.
+        :param start: The position after the cursor at which the scan starts.
+        :param width: The number of units to scan.
+        :return: The number of units before the found one, whether a unit was found and the
+        found units.
+        """
+        queue = self.queues[mass.queue]
+        length = queue.shape[1]
+        positions = (
+            self.cursors[mass.queue][rows, None] + np.arange(start, start + width)
+        ) % length
+        candidates = np.take(queue, rows[:, None] * length + positions)
+        blocked_indices = rows[:, None] * self.blocked.shape[1] + candidates
+        hits = mass.eligible[candidates] & ~np.take(self.blocked, blocked_indices)
+        if self.has_did_not_fit:
+            hits |= np.take(self.did_not_fit, blocked_indices)
+        first = hits.argmax(axis=1)
+        indices = np.arange(len(rows))
+        return start + first, hits[indices, first], candidates[indices, first]
+
+    def __choose(
+        self: "_BatchState", rows: np.ndarray, mass: _CompiledMass
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Choose the next scheduling unit from the queue of a mass in multiple plans.
+
+        The queue of each plan is scanned from its cursor, first only the next few units, then the
+        whole queue for the plans without a result. If a unit that did not fit before comes
+        first, the plan fails. If no unit is available, the already chosen list is emptied and
+        only the unit after the first one is checked again, like QueueManager.get_su_from_queues
+        does. Plans that fail are marked as not alive.
+
+        :param rows: The plans that need a scheduling unit.
+        :param mass: The compiled mass.
+        :return: The plans that got a unit and the chosen units.
+        """
+        length = self.queues[mass.queue].shape[1]
+        width = min(length, SCAN_WIDTH)
+        skipped, found, units = self.__scan(rows, mass, 0, width)
+        if width < length and not found.all():
+            missing = ~found
+            skipped[missing], found[missing], units[missing] = self.__scan(
+                rows[missing], mass, width, length - width
+            )
+
+        exhausted = ~found
+        if exhausted.any():
+            exhausted_rows = rows[exhausted]
+            self.__empty_chosen(exhausted_rows)
+            _, found[exhausted], units[exhausted] = self.__scan(exhausted_rows, mass, 1, 1)
+            skipped[exhausted] = length + 1
+
+        cursors = self.cursors[mass.queue]
+        cursors[rows] = (cursors[rows] + skipped + 1) % length
+        failed = ~found
+        if self.has_did_not_fit:
+            failed |= self.did_not_fit[rows, units]
+        self.alive[rows[failed]] = False
+        return rows[~failed], units[~failed]
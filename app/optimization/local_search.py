@@ -0,0 +1,415 @@
+"""A module that improves a constructed plan by moving scheduling units between masses.
+
+The local search starts from a plan created by the queues and applies random moves with
+simulated annealing:
+
+- Replace: a scheduling unit assigned to a mass is replaced by another unit of the same size.
+- Swap: two scheduling units of the same size that are assigned to different masses are swapped.
+
+Only moves that keep the plan valid are considered. A unit may only be assigned to a mass if it
+would be taken from the queue of the mass, if all of its servers are available on the date and
+at the location, if it does not avoid the event and if none of its servers is assigned on the
+same day. Pre-assigned servers are never moved, and neither are the servers fixed by the caller,
+e.g. the assignments that a repair of a plan keeps.
+
+The score is the same as the one of AltarServers.calculate_statistics. It is kept up to date
+from running sums, so evaluating a move only touches the servers of the moved units.
+"""
+
+import datetime
+import math
+import random
+from array import array
+from bisect import bisect_left, bisect_right
+
+from altar_servers.altar_servers import AltarServers
+from altar_servers.running_statistics import population_variance
+from dates.calendar import Calendar
+from dates.holy_mass import HolyMass
+from events.event_calendar import EventCalendar
+from optimization.snapshot import PlanSnapshot
+
+SWAP_PROBABILITY = 0.5
+CALIBRATION_MOVES = 200
+
+
+class _Mass:
+    """The information about a mass that is required by the local search."""
+
+    __slots__ = ("date", "day", "event_id", "fixed", "servers", "units")
+
+    def __init__(self: "_Mass", date: int, day: int, event_id: str) -> None:
+        self.date = date
+        self.day = day
+        self.event_id = event_id
+        self.servers: list[int] = []
+        self.fixed: set[int] = set()
+        self.units: list[int] = []
+
+
+class LocalSearch:
+    """A simulated annealing search over the assignments of a plan."""
+
+    def __init__(
+        self: "LocalSearch",
+        calendar: Calendar,
+        altar_servers: AltarServers,
+        event_calendar: EventCalendar,
+        snapshot: PlanSnapshot,
+        fixed: list[set[int]] | None = None,
+    ) -> None:
+        """Prepare the local search for a plan.
+
+        :param calendar: The calendar the snapshot was taken of.
+        :param altar_servers: The altar servers object the snapshot was taken with.
+        :param event_calendar: The event calendar.
+        :param snapshot: The snapshot of the plan to improve.
+        :param fixed: The indices of the servers of each mass that must not be moved besides the
+        pre-assigned ones, in the order of the snapshot.
+        """
+        self.__offsets = snapshot.offsets
+        n_servers = len(altar_servers.altar_servers)
+        units = sorted(altar_servers.scheduling_units, key=lambda x: x.index)
+        self.__unit_servers = [
+            tuple(altar_servers.get_server_index(server) for server in unit.servers)
+            for unit in units
+        ]
+        self.__server_unit = [
+            altar_servers.get_scheduling_unit_by_name(server.name).index
+            for server in altar_servers.altar_servers
+        ]
+        self.__weekday_ids = list(dict.fromkeys(event_calendar.get_list_of_weekday_ids()))
+        regular_ids = set(self.__weekday_ids)
+
+        self.__masses: list[_Mass] = []
+        self.__eligible: list[list[int]] = []
+        self.__eligible_sets: list[set[int]] = []
+        self.__day_servers: list[dict[int, int]] = [{} for _ in calendar.days]
+        for day_index, day in enumerate(calendar.days):
+            for holy_mass in day.masses:
+                event = holy_mass.event
+                mass = _Mass(day.date.toordinal(), day_index, event.id)
+                mass.servers = list(snapshot.servers_of(len(self.__masses)))
+                mass.fixed = self.__get_fixed_servers(holy_mass, day.date, altar_servers)
+                if fixed is not None:
+                    mass.fixed |= fixed[len(self.__masses)]
+                for server in mass.servers:
+                    self.__day_servers[day_index][server] = (
+                        self.__day_servers[day_index].get(server, 0) + 1
+                    )
+
+                queue_id = event.treated_as if event.treated_as is not None else event.id
+                eligible = [
+                    unit.index
+                    for unit in units
+                    if (
+                        (queue_id not in unit.avoid and not unit.no_regular)
+                        if queue_id in regular_ids
+                        else not unit.no_special
+                    )
+                    and unit.is_available_on(day.date)
+                    and (event.location is None or event.location in unit.locations)
+                    and event.id not in unit.avoid
+                ]
+                self.__masses.append(mass)
+                self.__eligible.append(eligible)
+                self.__eligible_sets.append(set(eligible))
+
+        for mass in self.__masses:
+            mass.units = self.__get_movable_units(mass)
+        self.__movable_masses = [i for i, mass in enumerate(self.__masses) if mass.units]
+
+        self.__n_servers = n_servers
+        self.__counts = [0] * n_servers
+        self.__count_total = 0
+        self.__count_square_total = 0
+        self.__event_counts = {event_id: [0] * n_servers for event_id in self.__weekday_ids}
+        self.__event_totals = dict.fromkeys(self.__weekday_ids, 0)
+        self.__event_square_totals = dict.fromkeys(self.__weekday_ids, 0)
+        self.__dates: list[list[int]] = [[] for _ in range(n_servers)]
+        self.__n_distances = 0
+        self.__distance_total = 0
+        self.__distance_square_total = 0
+        for mass in self.__masses:
+            for server in mass.servers:
+                self.__add_service(server, mass)
+
+        self.__best_score = self.score()
+        self.__best_servers = [list(mass.servers) for mass in self.__masses]
+
+    @staticmethod
+    def __get_fixed_servers(
+        holy_mass: HolyMass, date: datetime.date, altar_servers: AltarServers
+    ) -> set[int]:
+        """Get the indices of the servers that are pre-assigned to a mass."""
+        names = holy_mass.event.servers
+        if names is None:
+            return set()
+        if isinstance(names, dict):
+            names = names.get(date, [])
+
+        fixed = set()
+        for name in names:
+            try:
+                fixed.add(altar_servers.get_server_index(altar_servers.get_server_by_name(name)))
+            except KeyError:
+                continue
+        return fixed
+
+    def __get_movable_units(self: "LocalSearch", mass: _Mass) -> list[int]:
+        """Get the units whose servers are all assigned to the mass and not pre-assigned."""
+        units = []
+        for server in mass.servers:
+            unit = self.__server_unit[server]
+            if unit in units or server in mass.fixed:
+                continue
+            if all(
+                member in mass.servers and member not in mass.fixed
+                for member in self.__unit_servers[unit]
+            ):
+                units.append(unit)
+        return units
+
+    def score(self: "LocalSearch") -> float:
+        """Get the score of the current plan, which equals AltarServers.calculate_statistics.
+
+        :return: The sum of the variances.
+        """
+        return sum(
+            [
+                population_variance(
+                    self.__count_total, self.__count_square_total, self.__n_servers
+                ),
+                population_variance(
+                    self.__distance_total, self.__distance_square_total, self.__n_distances
+                ),
+            ]
+            + [
+                population_variance(
+                    self.__event_totals[event_id],
+                    self.__event_square_totals[event_id],
+                    self.__n_servers,
+                )
+                for event_id in self.__weekday_ids
+            ]
+        )
+
+    @property
+    def best_score(self: "LocalSearch") -> float:
+        """The lowest score found so far."""
+        return self.__best_score
+
+    def best_snapshot(self: "LocalSearch") -> PlanSnapshot:
+        """Get a snapshot of the best plan found so far.
+
+        :return: The snapshot.
+        """
+        snapshot = PlanSnapshot(array("i"), self.__offsets)
+        for servers in self.__best_servers:
+            snapshot.server_indices.extend(servers)
+        return snapshot
+
+    def __change_distance(self: "LocalSearch", distance: int, sign: int) -> None:
+        self.__n_distances += sign
+        self.__distance_total += sign * distance
+        self.__distance_square_total += sign * distance * distance
+
+    def __add_service(self: "LocalSearch", server: int, mass: _Mass) -> None:
+        count = self.__counts[server]
+        self.__counts[server] = count + 1
+        self.__count_total += 1
+        self.__count_square_total += 2 * count + 1
+
+        if mass.event_id in self.__event_counts:
+            counts = self.__event_counts[mass.event_id]
+            count = counts[server]
+            counts[server] = count + 1
+            self.__event_totals[mass.event_id] += 1
+            self.__event_square_totals[mass.event_id] += 2 * count + 1
+
+        dates = self.__dates[server]
+        i = bisect_right(dates, mass.date)
+        if 0 < i < len(dates):
+            self.__change_distance(dates[i] - dates[i - 1], -1)
+        if i > 0:
+            self.__change_distance(mass.date - dates[i - 1], 1)
+        if i < len(dates):
+            self.__change_distance(dates[i] - mass.date, 1)
+        dates.insert(i, mass.date)
+
+        day_servers = self.__day_servers[mass.day]
+        day_servers[server] = day_servers.get(server, 0) + 1
+
+    def __remove_service(self: "LocalSearch", server: int, mass: _Mass) -> None:
+        count = self.__counts[server]
+        self.__counts[server] = count - 1
+        self.__count_total -= 1
+        self.__count_square_total -= 2 * count - 1
+
+        if mass.event_id in self.__event_counts:
+            counts = self.__event_counts[mass.event_id]
+            count = counts[server]
+            counts[server] = count - 1
+            self.__event_totals[mass.event_id] -= 1
+            self.__event_square_totals[mass.event_id] -= 2 * count - 1
+
+        dates = self.__dates[server]
+        i = bisect_left(dates, mass.date)
+        del dates[i]
+        if i > 0:
+            self.__change_distance(mass.date - dates[i - 1], -1)
+        if i < len(dates):
+            self.__change_distance(dates[i] - mass.date, -1)
+        if 0 < i < len(dates):
+            self.__change_distance(dates[i] - dates[i - 1], 1)
+
+        day_servers = self.__day_servers[mass.day]
+        day_servers[server] -= 1
+        if day_servers[server] == 0:
+            del day_servers[server]
+
+    def __replace_unit(self: "LocalSearch", mass_index: int, old: int, new: int) -> None:
+        """Replace a unit assigned to a mass by another unit of the same size."""
+        mass = self.__masses[mass_index]
+        for old_server, new_server in zip(
+            self.__unit_servers[old], self.__unit_servers[new], strict=True
+        ):
+            self.__remove_service(old_server, mass)
+            mass.servers[mass.servers.index(old_server)] = new_server
+        for new_server in self.__unit_servers[new]:
+            self.__add_service(new_server, mass)
+        mass.units[mass.units.index(old)] = new
+
+    def __is_free_on(self: "LocalSearch", unit: int, day: int) -> bool:
+        """Check if none of the servers of a unit is assigned on a day."""
+        day_servers = self.__day_servers[day]
+        return not any(server in day_servers for server in self.__unit_servers[unit])
+
+    def __random_move(self: "LocalSearch", rng: random.Random) -> tuple | None:
+        """Draw a random valid move.
+
+        :param rng: The random number generator.
+        :return: The move as a tuple of (mass, old unit, new unit) replacements, or None if the
+        drawn move is not valid.
+        """
+        first = rng.choice(self.__movable_masses)
+        first_mass = self.__masses[first]
+        unit = rng.choice(first_mass.units)
+        size = len(self.__unit_servers[unit])
+
+        if rng.random() < SWAP_PROBABILITY:
+            second = rng.choice(self.__movable_masses)
+            second_mass = self.__masses[second]
+            other = rng.choice(second_mass.units)
+            if (
+                first == second
+                or len(self.__unit_servers[other]) != size
+                or other not in self.__eligible_sets[first]
+                or unit not in self.__eligible_sets[second]
+                or (
+                    first_mass.day != second_mass.day
+                    and not (
+                        self.__is_free_on(unit, second_mass.day)
+                        and self.__is_free_on(other, first_mass.day)
+                    )
+                )
+            ):
+                return None
+            return (first, unit, other), (second, other, unit)
+
+        if not self.__eligible[first]:
+            return None
+        other = rng.choice(self.__eligible[first])
+        if len(self.__unit_servers[other]) != size or not self.__is_free_on(other, first_mass.day):
+            return None
+        return ((first, unit, other),)
+
+    def __apply(self: "LocalSearch", move: tuple) -> None:
+        for mass_index, old, new in move:
+            self.__replace_unit(mass_index, old, new)
+
+    def __undo(self: "LocalSearch", move: tuple) -> None:
+        for mass_index, old, new in reversed(move):
+            self.__replace_unit(mass_index, new, old)
+
+    def __calibrate_temperature(self: "LocalSearch", rng: random.Random) -> float:
+        """Estimate a start temperature from the mean increase of the score of random moves."""
+        score = self.score()
+        increases = []
+        for _ in range(CALIBRATION_MOVES):
+            move = self.__random_move(rng)
+            if move is None:
+                continue
+            self.__apply(move)
+            delta = self.score() - score
+            self.__undo(move)
+            if delta > 0:
+                increases.append(delta)
+        return sum(increases) / len(increases) if increases else 0.0
+
+    def run(self: "LocalSearch", iterations: int, rng: random.Random) -> float:
+        """Apply random moves with simulated annealing and remember the best plan.
+
+        The temperature is calibrated from random moves and cools down linearly to zero, so the
+        last iterations only accept moves that do not make the plan worse.
+
+        :param iterations: The number of moves to draw.
+        :param rng: The random number generator.
+        :return: The lowest score found.
+        """
+        if not self.__movable_masses or iterations <= 0:
+            return self.__best_score
+
+        start_temperature = self.__calibrate_temperature(rng)
+        score = self.score()
+        current_is_best = score <= self.__best_score
+        for iteration in range(iterations):
+            move = self.__random_move(rng)
+            if move is None:
+                continue
+
+            self.__apply(move)
+            new_score = self.score()
+            delta = new_score - score
+            temperature = start_temperature * (1 - iteration / iterations)
+            if delta <= 0 or (temperature > 0 and rng.random() < math.exp(-delta / temperature)):
+                if current_is_best and new_score > self.__best_score:
+                    self.__undo(move)
+                    self.__best_servers = [list(mass.servers) for mass in self.__masses]
+                    self.__apply(move)
+                score = new_score
+                if score < self.__best_score:
+                    self.__best_score = score
+                    current_is_best = True
+                elif score > self.__best_score:
+                    current_is_best = False
+            else:
+                self.__undo(move)
+
+        if current_is_best:
+            self.__best_servers = [list(mass.servers) for mass in self.__masses]
+        return self.__best_score
+
+
+def improve_plan(
+    calendar: Calendar,
+    altar_servers: AltarServers,
+    event_calendar: EventCalendar,
+    iterations: int,
+    rng: random.Random,
+) -> float:
+    """Improve the plan assigned to a calendar with the local search.
+
+    :param calendar: The calendar with all altar servers assigned.
+    :param altar_servers: The altar servers object.
+    :param event_calendar: The event calendar.
+    :param iterations: The number of moves to draw.
+    :param rng: The random number generator.
+    :return: The score of the improved plan, which is now assigned to the calendar.
+    """
+    local_search = LocalSearch(
+        calendar, altar_servers, event_calendar, PlanSnapshot.take(calendar, altar_servers)
+    )
+    score = local_search.run(iterations, rng)
+    local_search.best_snapshot().restore(calendar, altar_servers)
+    return score
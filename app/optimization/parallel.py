@@ -0,0 +1,366 @@
+"""A module that distributes the optimization rounds over multiple processes.
+
+Every worker process builds its own calendar, queues and altar servers from the validated plan
+config and runs tasks of rounds, whose seeds are derived from the seed of the run. Only the scores
+of the rounds are sent back to the parent process, which records them in the history of the run
+and replays the best round at the end.
+"""
+
+import contextlib
+import logging
+import random
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from functools import partial
+from typing import TYPE_CHECKING
+
+from altar_servers.altar_servers import AltarServers
+from altar_servers.queue_manager import QueueManager
+from altar_servers.server_handler import Backtracker
+from dates.calendar import Calendar
+from events.event_calendar import EventCalendar
+from optimization.plan_setup import PlanConfig, PlanSetup
+from optimization.round_history import (
+    Checkpointer,
+    RoundHistory,
+    derive_seed,
+    rebuild_best_plan,
+)
+from optimization.rounds import count_batch, run_rounds
+from optimization.stopping import StoppingPolicy
+from plan_info.plan_info import OptimizerSettings
+from tqdm import tqdm
+
+if TYPE_CHECKING:
+    from optimization.batch_construction import BatchConstruction
+
+logger = logging.getLogger("root")
+
+ROUNDS_PER_TASK = 100
+TASKS_PER_WORKER = 2
+
+WORKER_SETUPS = 4
+
+_worker_setups: OrderedDict[str, tuple[PlanSetup, "BatchConstruction | None"]] = OrderedDict()
+
+
+def _init_worker(config: PlanConfig | None = None, *, batched: bool = False) -> None:
+    """Prepare a worker process and build the objects of a plan ahead of its first task.
+
+    :param config: The plan config, if the objects should be built ahead.
+    :param batched: If True, the batch construction is compiled as well.
+    """
+    if config is not None:
+        _get_worker_setup(config, batched=batched)
+    logger.setLevel(logging.WARNING)
+
+
+def start_worker_pool(workers: int) -> ProcessPoolExecutor:
+    """Start a pool of worker processes, which can be shared by runs of different plan configs.
+
+    :param workers: The number of worker processes.
+    :return: The pool.
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def _get_worker_setup(
+    config: PlanConfig, *, batched: bool
+) -> tuple[PlanSetup, "BatchConstruction | None"]:
+    """Get the objects of a plan in a worker process, which are built once per plan config.
+
+    A worker keeps the objects of the last few configs, so it can work on the tasks of
+    different runs.
+
+    :param config: The plan config.
+    :param batched: If True, the batch construction is compiled as well.
+    :return: The objects of the plan and the batch construction, if requested.
+    """
+    key = config.get_key()
+    setup, batch_construction = _worker_setups.pop(key, (None, None))
+    if setup is None:
+        setup = PlanSetup(config)
+    if batched and batch_construction is None:
+        from optimization.batch_construction import BatchConstruction  # noqa: PLC0415
+
+        batch_construction = BatchConstruction(
+            setup.calendar, setup.altar_servers, setup.event_calendar
+        )
+    _worker_setups[key] = setup, batch_construction
+    while len(_worker_setups) > WORKER_SETUPS:
+        _worker_setups.popitem(last=False)
+    return setup, batch_construction
+
+
+def _run_rounds(
+    config: PlanConfig,
+    run_seed: int,
+    settings: OptimizerSettings,
+    deadline: float | None,
+    round_indices: list[int],
+) -> tuple:
+    """Create multiple plans in a worker process and keep the one with the lowest score.
+
+    :param config: The plan config.
+    :param run_seed: The seed of the run.
+    :param settings: The limits of this task.
+    :param deadline: The wall-clock time at which the time budget of the whole run ends.
+    :param round_indices: The indices of the rounds, whose seeds are derived from the seed of the
+    run.
+    :return: The lowest score, the indices and scores of the finished rounds, the number of rounds
+    and the number of full restarts avoided by backtracking.
+    """
+    if deadline is not None:
+        settings = settings.model_copy(update={"time_budget": max(0.0, deadline - time.time())})
+
+    setup, _ = _get_worker_setup(config, batched=False)
+    setup.calendar.clear()
+    stopping_policy = StoppingPolicy(settings)
+    history = RoundHistory(run_seed=run_seed)
+    history.schedule(round_indices)
+    backtracker = Backtracker() if settings.backtracking else None
+    best_score, _ = run_rounds(
+        setup.calendar,
+        setup.queue_manager,
+        setup.altar_servers,
+        setup.event_calendar,
+        stopping_policy,
+        backtracker=backtracker,
+        history=history,
+    )
+    avoided_restarts = backtracker.avoided_restarts if backtracker is not None else 0
+    return best_score, history.rounds, stopping_policy.rounds, avoided_restarts
+
+
+def _create_batch(
+    config: PlanConfig, run_seed: int, batch_size: int, round_index: int
+) -> tuple[int, list[float]]:
+    """Create a batch of plans in a worker process.
+
+    :param config: The plan config.
+    :param run_seed: The seed of the run.
+    :param batch_size: The number of plans of the batch.
+    :param round_index: The index of the round of the batch, whose seed is derived from the seed
+    of the run.
+    :return: The index of the round and the scores of the plans that were created without
+    conflicts.
+    """
+    _, batch_construction = _get_worker_setup(config, batched=True)
+    batch = batch_construction.create_seeded_plans(batch_size, derive_seed(run_seed, round_index))
+    return round_index, batch.scores
+
+
+def _use_pool(
+    executor: Executor | None, workers: int, config: PlanConfig, *, batched: bool
+) -> contextlib.AbstractContextManager[Executor]:
+    """Use a shared pool of worker processes or start a pool for a single run.
+
+    :param executor: The shared pool, or None.
+    :param workers: The number of worker processes of a new pool.
+    :param config: The plan config, from which the workers of a new pool build their objects.
+    :param batched: If True, the workers of a new pool compile the batch construction as well.
+    :return: A context that shuts down a new pool, but not the shared one.
+    """
+    if executor is not None:
+        return contextlib.nullcontext(executor)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=partial(_init_worker, batched=batched),
+        initargs=(config,),
+    )
+
+
+def _get_task_rounds(
+    stopping_policy: StoppingPolicy, submitted_rounds: int, batch_size: int | None
+) -> int:
+    """Get the number of rounds of the next task.
+
+    :param stopping_policy: The stopping policy.
+    :param submitted_rounds: The number of rounds that were submitted or finished so far.
+    :param batch_size: The number of plans of a batch, if the tasks create batches.
+    :return: The number of rounds, which is at most zero, if no more rounds are needed.
+    """
+    rounds = batch_size or ROUNDS_PER_TASK
+    if stopping_policy.max_rounds is not None:
+        rounds = min(rounds, stopping_policy.max_rounds - submitted_rounds)
+    return rounds
+
+
+def _submit(
+    executor: Executor,
+    config: PlanConfig,
+    settings: OptimizerSettings,
+    deadline: float | None,
+    history: RoundHistory,
+) -> Future:
+    """Submit a task that creates plans.
+
+    A task of batches creates a single batch, which is one round of the history.
+
+    :param executor: The executor of the worker processes.
+    :param config: The plan config.
+    :param settings: The limits of the task.
+    :param deadline: The wall-clock time at which the time budget of the whole run ends.
+    :param history: The history the rounds of the task are taken from.
+    :return: The future of the task.
+    """
+    if settings.batch_size:
+        return executor.submit(
+            _create_batch, config, history.run_seed, settings.batch_size, history.take_round()
+        )
+    return executor.submit(
+        _run_rounds,
+        config,
+        history.run_seed,
+        settings,
+        deadline,
+        history.take_rounds(settings.max_rounds),
+    )
+
+
+def _record_task(
+    task: int,
+    result: tuple,
+    history: RoundHistory,
+    stopping_policy: StoppingPolicy,
+    *,
+    batched: bool,
+) -> tuple[float, int, int]:
+    """Record the rounds of a finished task in the history.
+
+    :param task: The number of the task in the order of submission.
+    :param result: The result of the task.
+    :param history: The history of the run.
+    :param stopping_policy: The stopping policy, which decides how many plans of a batch count.
+    :param batched: If True, the task created a batch of plans.
+    :return: The lowest score, the number of rounds and the number of full restarts avoided by
+    backtracking of the task.
+    """
+    avoided_restarts = 0
+    if batched:
+        round_index, scores = result
+        rounds, score = count_batch(scores, stopping_policy)
+        history.record(round_index, score, rounds)
+    else:
+        score, records, rounds, avoided_restarts = result
+        for round_index, round_score in records:
+            history.record(round_index, round_score)
+    if score < stopping_policy.best_score:
+        logger.info("%d WAS BETTER %d", task, score)
+    return score, rounds, avoided_restarts
+
+
+def optimize_assignments_parallel(  # noqa: PLR0913, PLR0917
+    config: PlanConfig,
+    calendar: Calendar,
+    queue_manager: QueueManager,
+    altar_servers: AltarServers,
+    event_calendar: EventCalendar,
+    stopping_policy: StoppingPolicy,
+    workers: int,
+    *,
+    backtracking: bool = False,
+    batch_size: int | None = None,
+    history: RoundHistory | None = None,
+    checkpointer: Checkpointer | None = None,
+    executor: Executor | None = None,
+) -> tuple:
+    """Create multiple plans on multiple processes and keep the one with the lowest score.
+
+    The rounds are split into tasks, which are submitted until the stopping policy ends the run.
+    The time budget and the target score are also passed to the tasks, so they stop early. Every
+    round has its own seed from the history, whose best round is replayed at the end. The tasks
+    are recorded in the order they were submitted, and rounds with equal scores are ordered by
+    their index, so with only a maximum number of rounds, the result depends neither on the
+    number of workers nor on the order in which the tasks finish.
+
+    With batches of plans, every task creates one batch, which is a round of the history. Only
+    the first plans of the batches up to the maximum number of rounds count, like in a run on a
+    single process.
+
+    :param config: The plan config the worker processes build their objects from.
+    :param calendar: The calendar without any assigned servers.
+    :param queue_manager: The queue manager, which replays the best round.
+    :param altar_servers: The altar servers object.
+    :param event_calendar: The event calendar, which is needed to replay the best batch.
+    :param stopping_policy: The policy that decides when the optimization stops.
+    :param workers: The number of worker processes.
+    :param backtracking: If True, conflicts only roll back the last days of a plan.
+    :param batch_size: If given, the workers create this number of plans at once.
+    :param history: The history of the run. If None, a new run with a random seed is started.
+    :param checkpointer: If given, the history is written to checkpoints while the tasks run.
+    :param executor: If given, the tasks are submitted to this pool of worker processes, which may
+    be shared with other runs. Otherwise, a pool is started for this run.
+    :return: The resulting altar servers object and the calendar object with all altar servers
+    assigned.
+    """
+    history = history or RoundHistory(run_seed=random.getrandbits(64))
+    avoided_restarts = 0
+    remaining_time = stopping_policy.remaining_time()
+    deadline = None if remaining_time is None else time.time() + remaining_time
+    iterations = tqdm(total=stopping_policy.max_rounds, initial=stopping_policy.rounds)
+    with _use_pool(executor, workers, config, batched=bool(batch_size)) as pool:
+        futures: dict[Future, tuple[int, int]] = {}
+        finished: dict[int, tuple[int, tuple]] = {}
+        submitted_rounds = stopping_policy.rounds
+        n_tasks = 0
+        n_recorded_tasks = 0
+        while True:
+            while (
+                len(futures) + len(finished) < workers * TASKS_PER_WORKER
+                and not stopping_policy.should_stop()
+            ):
+                rounds = _get_task_rounds(stopping_policy, submitted_rounds, batch_size)
+                if rounds <= 0:
+                    break
+                settings = OptimizerSettings(
+                    max_rounds=rounds,
+                    target_score=stopping_policy.target_score,
+                    backtracking=backtracking,
+                    batch_size=batch_size,
+                )
+                futures[_submit(pool, config, settings, deadline, history)] = n_tasks, rounds
+                submitted_rounds += rounds
+                n_tasks += 1
+
+            if not futures:
+                break
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                task, task_rounds = futures.pop(future)
+                finished[task] = task_rounds, future.result()
+            while n_recorded_tasks in finished:
+                task_rounds, result = finished.pop(n_recorded_tasks)
+                score, rounds, task_avoided_restarts = _record_task(
+                    n_recorded_tasks, result, history, stopping_policy, batched=bool(batch_size)
+                )
+                n_recorded_tasks += 1
+                avoided_restarts += task_avoided_restarts
+                submitted_rounds -= task_rounds - rounds
+                if checkpointer is not None:
+                    checkpointer.update()
+
+                iterations.update(rounds)
+                sys.stdout.flush()
+                stopping_policy.update(rounds, score)
+
+    batch_construction = None
+    if batch_size:
+        from optimization.batch_construction import BatchConstruction  # noqa: PLC0415
+
+        batch_construction = BatchConstruction(calendar, altar_servers, event_calendar)
+    elif backtracking:
+        logger.info("Durch Backtracking vermiedene Neustarts: %d", avoided_restarts)
+    rebuild_best_plan(
+        history,
+        calendar,
+        queue_manager,
+        altar_servers,
+        backtracking=backtracking,
+        batch_construction=batch_construction,
+        batch_size=batch_size,
+    )
+    return altar_servers.altar_servers, calendar
@@ -0,0 +1,57 @@
+"""A module that contains the config of a plan and the objects required to create it."""
+
+import hashlib
+from pathlib import Path
+
+from altar_servers.altar_servers import AltarServers
+from altar_servers.queue_manager import QueueManager
+from dates.date_handler import create_calendar
+from events.event_calendar import EventCalendar
+from plan_info.plan_info import PlanInfo
+from pydantic import BaseModel
+
+
+class PlanConfig(BaseModel):
+    """The raw content of the three config files of a plan."""
+
+    altar_servers: str
+    holy_masses: str
+    plan_info: str
+
+    @classmethod
+    def from_directory(cls: type["PlanConfig"], directory: Path) -> "PlanConfig":
+        """Read the three config files from a directory.
+
+        :param directory: The directory containing the config files.
+        :return: The plan config.
+        """
+        return cls(
+            altar_servers=(directory / "altar_servers.json").read_text(),
+            holy_masses=(directory / "holy_masses.json").read_text(),
+            plan_info=(directory / "plan_info.json").read_text(),
+        )
+
+    def get_key(self: "PlanConfig") -> str:
+        """Get a key of the raw content of the config files.
+
+        :return: The key.
+        """
+        return hashlib.sha256(self.model_dump_json().encode()).hexdigest()
+
+
+class PlanSetup:
+    """All objects that are required to create a plan, built from a plan config."""
+
+    def __init__(self: "PlanSetup", config: PlanConfig) -> None:
+        """Validate the config and build the calendar, the altar servers and the queues.
+
+        :param config: The plan config.
+        """
+        self.event_calendar = EventCalendar.model_validate_json(config.holy_masses)
+        self.plan_info = PlanInfo.model_validate_json(config.plan_info)
+        self.calendar = create_calendar(
+            self.plan_info.start_date, self.plan_info.end_date, self.event_calendar
+        )
+        self.altar_servers = AltarServers.model_validate_json(config.altar_servers)
+        self.altar_servers.build_availability(self.plan_info.start_date, self.plan_info.end_date)
+        self.queue_manager = QueueManager(self.event_calendar, self.altar_servers)
@@ -0,0 +1,334 @@
+"""A module that repairs a published plan after the configs of its servers or masses changed.
+
+Every run stores the plan together with the configs it was created from as the plan state. A
+repair compares the current configs with the stored ones and goes through the calendar of the
+current configs in order. A scheduling unit of the published plan stays assigned to its mass as
+long as the queue manager would still take it for the mass. Servers that were removed from the
+roster, are on vacation now or no longer fit the mass are dropped, and the open places are filled
+from the queues like in a new plan. Afterwards, the local search only moves the units that were
+filled in, so every other assignment stays as it was published.
+"""
+
+import datetime
+import json
+import random
+from collections import Counter
+from pathlib import Path
+
+from altar_servers.altar_server import AltarServer
+from altar_servers.server_handler import fill_mass, pre_assign
+from dates.calendar import Calendar
+from dates.date_handler import create_calendar
+from dates.day import Day
+from dates.holy_mass import HolyMass
+from events.event_calendar import EventCalendar
+from exporters.exported_plan import ExportedMass, ExportedPlan
+from optimization.local_search import LocalSearch
+from optimization.plan_setup import PlanConfig, PlanSetup
+from optimization.snapshot import PlanSnapshot
+from plan_info.plan_info import PlanInfo
+from pydantic import BaseModel, ValidationError
+from utils.exceptions import BadSituationError
+
+MAX_FILL_ATTEMPTS = 10
+REPAIR_SEARCH_ITERATIONS = 2000
+
+
+class PlanState(BaseModel):
+    """A published plan together with the raw configs it was created from."""
+
+    config: PlanConfig
+    plan: ExportedPlan
+
+    @classmethod
+    def take(
+        cls: type["PlanState"], config: PlanConfig, calendar: Calendar, plan_info: PlanInfo
+    ) -> "PlanState":
+        """Take the plan of a calendar.
+
+        :param config: The plan config the plan was created from.
+        :param calendar: The calendar with all altar servers assigned.
+        :param plan_info: The plan info.
+        :return: The plan state.
+        """
+        plan = ExportedPlan.from_calendar(calendar, plan_info.start_date, plan_info.end_date)
+        return cls(config=config, plan=plan)
+
+    @classmethod
+    def load(cls: type["PlanState"], path: Path) -> "PlanState | None":
+        """Read a plan state.
+
+        :param path: The path of the plan state.
+        :return: The plan state, or None, if there is no valid plan state.
+        """
+        try:
+            return cls.model_validate_json(path.read_text())
+        except (OSError, ValidationError):
+            return None
+
+    def save(self: "PlanState", path: Path) -> None:
+        """Write the plan state.
+
+        :param path: The path of the plan state.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.model_dump_json())
+
+
+def _get_servers(config: PlanConfig) -> dict[str, dict]:
+    """Get the validated servers of a plan config by their names.
+
+    The servers are validated one by one, like for the key of a cached result, because
+    AltarServers replaces the names of the siblings by the sibling objects.
+
+    :param config: The plan config.
+    :return: The dumped servers.
+    """
+    servers = {}
+    for raw_server in json.loads(config.altar_servers)["altar_servers"]:
+        server = AltarServer.model_validate(raw_server)
+        servers.setdefault(server.name, server.model_dump(exclude={"services"}))
+    return servers
+
+
+def _get_masses(config: PlanConfig) -> dict[tuple[datetime.date, str, int], dict]:
+    """Get the events of the masses of the calendar of a plan config.
+
+    :param config: The plan config.
+    :return: The dumped events by the date, the id and the number of the mass among the masses of
+    the same event on the date.
+    """
+    plan_info = PlanInfo.model_validate_json(config.plan_info)
+    event_calendar = EventCalendar.model_validate_json(config.holy_masses)
+    masses = {}
+    occurrences = Counter()
+    for day in create_calendar(plan_info.start_date, plan_info.end_date, event_calendar).days:
+        for mass in sorted(day.masses, key=lambda x: x.event.time):
+            occurrence = occurrences[day.date, mass.event.id]
+            occurrences[day.date, mass.event.id] += 1
+            masses[day.date, mass.event.id, occurrence] = mass.event.model_dump(exclude={"skip"})
+    return masses
+
+
+class ConfigChanges(BaseModel):
+    """The differences between the configs of a published plan and the current configs."""
+
+    added_servers: list[str]
+    removed_servers: list[str]
+    changed_servers: list[str]
+    added_masses: int
+    removed_masses: int
+    changed_masses: int
+
+    @classmethod
+    def between(
+        cls: type["ConfigChanges"], old_config: PlanConfig, new_config: PlanConfig
+    ) -> "ConfigChanges":
+        """Compare the servers and the masses of two plan configs.
+
+        :param old_config: The plan config of the published plan.
+        :param new_config: The current plan config.
+        :return: The changes.
+        """
+        old_servers = _get_servers(old_config)
+        new_servers = _get_servers(new_config)
+        old_masses = _get_masses(old_config)
+        new_masses = _get_masses(new_config)
+        return cls(
+            added_servers=sorted(new_servers.keys() - old_servers.keys()),
+            removed_servers=sorted(old_servers.keys() - new_servers.keys()),
+            changed_servers=sorted(
+                name
+                for name in old_servers.keys() & new_servers.keys()
+                if old_servers[name] != new_servers[name]
+            ),
+            added_masses=len(new_masses.keys() - old_masses.keys()),
+            removed_masses=len(old_masses.keys() - new_masses.keys()),
+            changed_masses=sum(
+                old_masses[key] != new_masses[key] for key in old_masses.keys() & new_masses.keys()
+            ),
+        )
+
+    def __str__(self: "ConfigChanges") -> str:
+        """Return a summary of the changes."""
+        return (
+            f"Ministranten: {len(self.added_servers)} neu, {len(self.removed_servers)} entfernt, "
+            f"{len(self.changed_servers)} geändert; Messen: {self.added_masses} neu, "
+            f"{self.removed_masses} entfallen, {self.changed_masses} geändert"
+        )
+
+
+class RepairChange(BaseModel):
+    """The servers of a mass that were removed and added by a repair.
+
+    The reasons of the removed servers are the ones of QueueManager.get_rejection_reason, or
+    "removed", if the server is not on the roster anymore, "siblings", if the siblings of the
+    server changed, "too_many", if the mass needs fewer servers now, and "mass_removed", if the
+    mass does not take place anymore.
+    """
+
+    date: datetime.date
+    time: datetime.time
+    event_id: str
+    removed: dict[str, str] = {}
+    added: list[str] = []
+    missing: int = 0
+
+    def __str__(self: "RepairChange") -> str:
+        """Return a description of the change."""
+        description = f"{self.date} {self.time:%H:%M} {self.event_id}:"
+        if self.removed:
+            removed = ", ".join(f"{name} ({reason})" for name, reason in self.removed.items())
+            description += f" entfernt {removed}"
+        if self.added:
+            description += f" hinzugefügt {', '.join(self.added)}"
+        if self.missing:
+            description += f" {self.missing} fehlen"
+        return description
+
+
+class RepairReport(BaseModel):
+    """The outcome of a repair."""
+
+    seconds: float
+    score: float
+    config_changes: ConfigChanges
+    changes: list[RepairChange]
+
+
+def _keep_servers(names: list[str], day: Day, mass: HolyMass, setup: PlanSetup) -> dict[str, str]:
+    """Assign the pre-assigned servers and the servers of the published plan that are still valid.
+
+    A scheduling unit is kept only if all of its servers were assigned to the mass.
+
+    :param names: The names of the servers of the mass on the published plan.
+    :param day: The day of the mass.
+    :param mass: The mass.
+    :param setup: The objects of the current configs.
+    :return: The reasons of the servers that were not kept by their names.
+    """
+    altar_servers = setup.altar_servers
+    n_assigned = pre_assign(mass, day, altar_servers)
+    reasons = {}
+    units = []
+    for name in names:
+        try:
+            unit = altar_servers.get_scheduling_unit_by_name(name)
+        except KeyError:
+            reasons[name] = "removed"
+            continue
+        if unit not in units:
+            units.append(unit)
+
+    for unit in units:
+        if not all(server.name in names for server in unit.servers):
+            reason = "siblings"
+        elif n_assigned + len(unit) > mass.event.n_servers:
+            reason = "too_many"
+        else:
+            reason = setup.queue_manager.get_rejection_reason(unit, day, mass)
+        if reason is None:
+            n_assigned += altar_servers.assign_scheduling_unit(unit, mass)
+        else:
+            reasons.update((server.name, reason) for server in unit.servers if server.name in names)
+    return reasons
+
+
+def _fill(day: Day, mass: HolyMass, setup: PlanSetup) -> None:
+    """Fill the open places of a mass from the queues.
+
+    If the queues run into a conflict, the places that were filled so far are kept and the queues
+    are asked again. After too many conflicts, the mass is left incomplete.
+
+    :param day: The day of the mass.
+    :param mass: The mass.
+    :param setup: The objects of the current configs.
+    """
+    for _ in range(MAX_FILL_ATTEMPTS):
+        try:
+            fill_mass(day, mass, setup.queue_manager, setup.altar_servers, len(mass.servers))
+        except BadSituationError:
+            continue
+        return
+
+
+def repair_plan(
+    plan: ExportedPlan, setup: PlanSetup, iterations: int, rng: random.Random
+) -> list[RepairChange]:
+    """Assign the published plan to the calendar of the current configs and repair it.
+
+    The masses of the published plan are matched by their date and their event id.
+
+    :param plan: The published plan.
+    :param setup: The objects of the current configs, whose calendar contains the repaired plan
+    afterwards.
+    :param iterations: The number of moves of the local search over the filled in units.
+    :param rng: The random number generator of the queues and of the local search.
+    :return: The changes of the masses, ordered by date and time.
+    """
+    calendar, altar_servers = setup.calendar, setup.altar_servers
+    calendar.clear()
+    setup.queue_manager.start_round(rng.getrandbits(64))
+
+    published: dict[tuple[datetime.date, str], list[ExportedMass]] = {}
+    for published_mass in plan.masses:
+        published.setdefault((published_mass.date, published_mass.event_id), []).append(
+            published_mass
+        )
+
+    matches: dict[int, ExportedMass | None] = {}
+    reasons: dict[int, dict[str, str]] = {}
+    fixed: dict[int, set[int]] = {}
+    filled = False
+    for day in calendar.days:
+        for mass in sorted(day.masses, key=lambda x: x.event.time):
+            candidates = published.get((day.date, mass.event.id))
+            matches[id(mass)] = candidates.pop(0) if candidates else None
+            names = matches[id(mass)].servers if matches[id(mass)] is not None else []
+            reasons[id(mass)] = _keep_servers(names, day, mass, setup)
+            fixed[id(mass)] = set(map(altar_servers.get_server_index, mass.servers))
+            if len(mass.servers) < mass.event.n_servers:
+                _fill(day, mass, setup)
+                filled = filled or len(mass.servers) > len(fixed[id(mass)])
+
+    if filled and iterations > 0:
+        local_search = LocalSearch(
+            calendar,
+            altar_servers,
+            setup.event_calendar,
+            PlanSnapshot.take(calendar, altar_servers),
+            [fixed[id(mass)] for day in calendar.days for mass in day.masses],
+        )
+        local_search.run(iterations, rng)
+        local_search.best_snapshot().restore(calendar, altar_servers)
+
+    changes = [
+        RepairChange(
+            date=published_mass.date,
+            time=published_mass.time,
+            event_id=published_mass.event_id,
+            removed=dict.fromkeys(published_mass.servers, "mass_removed"),
+        )
+        for candidates in published.values()
+        for published_mass in candidates
+    ]
+    for day in calendar.days:
+        for mass in day.masses:
+            published_mass = matches[id(mass)]
+            old_names = set(published_mass.servers) if published_mass is not None else set()
+            new_names = {server.name for server in mass.servers}
+            missing = max(0, mass.event.n_servers - len(mass.servers))
+            if old_names != new_names or missing:
+                changes.append(
+                    RepairChange(
+                        date=day.date,
+                        time=mass.event.time,
+                        event_id=mass.event.id,
+                        removed={
+                            name: reasons[id(mass)][name] for name in sorted(old_names - new_names)
+                        },
+                        added=sorted(new_names - old_names),
+                        missing=missing,
+                    )
+                )
+    return sorted(changes, key=lambda x: (x.date, x.time))
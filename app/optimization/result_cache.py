@@ -0,0 +1,175 @@
+"""A module that contains the cache of the best plans of finished runs.
+
+A result is stored under a key of the validated config files and the optimizer settings, so the
+same configs do not have to be optimized again. The configs are validated and dumped again before
+they are hashed, so a change in the formatting of a config file does not change the key. Every
+change of their content does, so a cached result never belongs to an outdated config.
+"""
+
+import hashlib
+import json
+import logging
+from array import array
+from pathlib import Path
+
+from altar_servers.altar_server import AltarServer
+from altar_servers.altar_servers import AltarServers
+from dates.calendar import Calendar
+from events.event_calendar import EventCalendar
+from optimization.plan_setup import PlanConfig
+from optimization.snapshot import PlanSnapshot
+from plan_info.plan_info import OptimizerSettings, PlanInfo
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger("root")
+
+CACHE_DIRECTORY = Path("output/cache")
+CACHE_SIZE_LIMIT = 32 * 1024 * 1024
+CACHE_VERSION = 1
+
+
+def get_result_key(config: PlanConfig, settings: OptimizerSettings, seed: int | None) -> str:
+    """Get the key of the result of a run.
+
+    The servers are validated one by one, because AltarServers replaces the names of the siblings
+    by the sibling objects, which cannot be dumped.
+
+    :param config: The plan config.
+    :param settings: The optimizer settings.
+    :param seed: The seed of the run, if one is given.
+    :return: The key.
+    """
+    plan_info = PlanInfo.model_validate_json(config.plan_info)
+    altar_servers = "".join(
+        AltarServer.model_validate(server).model_dump_json()
+        for server in json.loads(config.altar_servers)["altar_servers"]
+    )
+    content = (
+        f"{CACHE_VERSION}{altar_servers}"
+        f"{EventCalendar.model_validate_json(config.holy_masses).model_dump_json()}"
+        f"{plan_info.model_dump_json(exclude={'optimizer'})}"
+        f"{settings.model_dump_json()}{seed}"
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class CachedResult(BaseModel):
+    """The best plan of a run and its score."""
+
+    score: float
+    server_indices: list[int]
+    offsets: list[int]
+
+    @classmethod
+    def take(
+        cls: type["CachedResult"], calendar: Calendar, altar_servers: AltarServers, score: float
+    ) -> "CachedResult":
+        """Take the plan of a calendar.
+
+        :param calendar: The calendar with the assigned servers.
+        :param altar_servers: The altar servers object the servers belong to.
+        :param score: The score of the plan.
+        :return: The result.
+        """
+        snapshot = PlanSnapshot.take(calendar, altar_servers)
+        return cls(
+            score=score,
+            server_indices=snapshot.server_indices.tolist(),
+            offsets=snapshot.offsets.tolist(),
+        )
+
+    def fits(self: "CachedResult", calendar: Calendar, altar_servers: AltarServers) -> bool:
+        """Check if the plan can be restored to a calendar.
+
+        :param calendar: The calendar.
+        :param altar_servers: The altar servers object.
+        :return: True, if the calendar has as many masses and servers as the plan.
+        """
+        n_masses = sum(len(day.masses) for day in calendar.days)
+        n_servers = len(altar_servers.altar_servers)
+        return len(self.offsets) == n_masses + 1 and all(
+            0 <= i < n_servers for i in self.server_indices
+        )
+
+    def restore(self: "CachedResult", calendar: Calendar, altar_servers: AltarServers) -> None:
+        """Assign the servers of the plan to a calendar.
+
+        :param calendar: The calendar.
+        :param altar_servers: The altar servers object.
+        """
+        PlanSnapshot(array("i", self.server_indices), array("i", self.offsets)).restore(
+            calendar, altar_servers
+        )
+
+
+class ResultCache:
+    """A directory with one file per cached result.
+
+    When the files take more than the size limit, the least recently used ones are deleted.
+    Reading a result counts as using it.
+    """
+
+    def __init__(
+        self: "ResultCache", directory: Path = CACHE_DIRECTORY, size_limit: int = CACHE_SIZE_LIMIT
+    ) -> None:
+        """Create a result cache.
+
+        :param directory: The directory of the cache.
+        :param size_limit: The maximal number of bytes of all cached results.
+        """
+        self.__directory = directory
+        self.__size_limit = size_limit
+
+    def load(self: "ResultCache", key: str) -> CachedResult | None:
+        """Read a cached result.
+
+        :param key: The key of the result.
+        :return: The result, or None, if there is no valid result with this key.
+        """
+        path = self.__path_of(key)
+        try:
+            result = CachedResult.model_validate_json(path.read_text())
+        except (OSError, ValidationError):
+            return None
+        path.touch()
+        return result
+
+    def store(self: "ResultCache", key: str, result: CachedResult) -> None:
+        """Write a result to the cache and delete old results, if the cache is too large.
+
+        :param key: The key of the result.
+        :param result: The result.
+        """
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        path = self.__path_of(key)
+        temporary_path = path.with_suffix(".tmp")
+        temporary_path.write_text(result.model_dump_json())
+        temporary_path.replace(path)
+        self.evict()
+
+    def evict(self: "ResultCache") -> None:
+        """Delete the least recently used results until the cache is within its size limit."""
+        entries = []
+        for path in self.__directory.glob("*.json"):
+            try:
+                status = path.stat()
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        entries.sort()
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in entries[:-1]:
+            if size <= self.__size_limit:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+            logger.info("Alter Plan wurde aus dem Cache gelöscht: %s", path.name)
+
+    def __path_of(self: "ResultCache", key: str) -> Path:
+        """Get the path of the file of a result.
+
+        :param key: The key of the result.
+        :return: The path.
+        """
+        return self.__directory / f"{key}.json"
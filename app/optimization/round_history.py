@@ -0,0 +1,280 @@
+"""A module that contains the seeds of the rounds of a run and the checkpoints of its progress.
+
+Every round of a run has its own seed, which is derived from the seed of the run and the index of
+the round. A round only depends on its seed, so the history of a run stores the index and the score
+of every finished round instead of the plans. The best plan is rebuilt by replaying the round with
+its seed. The history is written to a checkpoint from time to time, so an interrupted run can be
+resumed without repeating the finished rounds.
+
+With batches of plans, every batch is a round of the history. Its plans are drawn with the seed of
+the round, and it is recorded with the score of its best plan and the number of its plans that
+count as rounds of the stopping policy. The best plan is rebuilt by creating its batch again.
+"""
+
+import hashlib
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from altar_servers.altar_servers import AltarServers
+from altar_servers.queue_manager import QueueManager
+from altar_servers.server_handler import Backtracker, assign_servers
+from dates.calendar import Calendar
+from optimization.plan_setup import PlanConfig
+from optimization.stopping import StoppingPolicy
+from plan_info.plan_info import OptimizerSettings, PlanInfo
+from pydantic import BaseModel, ValidationError
+from utils import instrumentation
+
+if TYPE_CHECKING:
+    from optimization.batch_construction import BatchConstruction
+
+logger = logging.getLogger("root")
+
+CHECKPOINT_INTERVAL = 30.0
+
+
+def derive_seed(run_seed: int, round_index: int) -> int:
+    """Derive the seed of a round from the seed of the run.
+
+    :param run_seed: The seed of the run.
+    :param round_index: The index of the round.
+    :return: The seed of the round.
+    """
+    digest = hashlib.blake2b(f"{run_seed}:{round_index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def get_run_key(config: PlanConfig, settings: OptimizerSettings) -> str:
+    """Get a key of everything that changes the plan created for a seed.
+
+    The limits of the optimizer in the plan info are left out, so a run can be resumed with
+    other limits.
+
+    :param config: The plan config.
+    :param settings: The optimizer settings.
+    :return: The key.
+    """
+    plan_info = PlanInfo.model_validate_json(config.plan_info)
+    content = (
+        f"{config.altar_servers}{config.holy_masses}"
+        f"{plan_info.model_dump_json(exclude={'optimizer'})}{settings.backtracking}"
+    )
+    if settings.batch_size:
+        content += f"batch_size={settings.batch_size}"
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class RoundHistory(BaseModel):
+    """The indices and scores of the finished rounds of a run.
+
+    The rounds are handed out by their index. Rounds that were handed out, but did not finish
+    before the run was interrupted, are handed out again first after resuming it.
+    """
+
+    run_key: str = ""
+    run_seed: int
+    next_round: int = 0
+    rounds: list[tuple[int, float]] = []
+    batch_rounds: dict[int, int] = {}
+    elapsed: float = 0.0
+
+    def model_post_init(self: "RoundHistory", *_: str) -> None:
+        """Find the rounds that were handed out, but did not finish."""
+        finished = {round_index for round_index, _ in self.rounds}
+        self.__pending = deque(
+            round_index for round_index in range(self.next_round) if round_index not in finished
+        )
+
+    def seed_of(self: "RoundHistory", round_index: int) -> int:
+        """Get the seed of a round.
+
+        :param round_index: The index of the round.
+        :return: The seed.
+        """
+        return derive_seed(self.run_seed, round_index)
+
+    def schedule(self: "RoundHistory", round_indices: list[int]) -> None:
+        """Hand out the given rounds before any new ones.
+
+        :param round_indices: The indices of the rounds.
+        """
+        self.__pending.extend(round_indices)
+
+    def take_rounds(self: "RoundHistory", n_rounds: int) -> list[int]:
+        """Hand out the next rounds.
+
+        :param n_rounds: The number of rounds.
+        :return: The indices of the rounds.
+        """
+        round_indices = [
+            self.__pending.popleft() for _ in range(min(n_rounds, len(self.__pending)))
+        ]
+        n_new_rounds = n_rounds - len(round_indices)
+        round_indices.extend(range(self.next_round, self.next_round + n_new_rounds))
+        self.next_round += n_new_rounds
+        return round_indices
+
+    def take_round(self: "RoundHistory") -> int:
+        """Hand out the next round.
+
+        :return: The index of the round.
+        """
+        return self.take_rounds(1)[0]
+
+    def record(
+        self: "RoundHistory", round_index: int, score: float, batch_rounds: int | None = None
+    ) -> None:
+        """Record a finished round.
+
+        :param round_index: The index of the round.
+        :param score: The score of the plan of the round, or of the best plan of a batch.
+        :param batch_rounds: If the round is a batch of plans, the number of its plans that count
+        as rounds.
+        """
+        self.rounds.append((round_index, score))
+        if batch_rounds is not None:
+            self.batch_rounds[round_index] = batch_rounds
+
+    def counted_rounds(self: "RoundHistory") -> list[tuple[int, float]]:
+        """Get the finished rounds as they are counted by the stopping policy.
+
+        :return: The number of rounds and the score of every finished round, which is one round
+        or the counted plans of a batch.
+        """
+        return [
+            (self.batch_rounds.get(round_index, 1), score) for round_index, score in self.rounds
+        ]
+
+    def best(self: "RoundHistory") -> tuple[int, float] | None:
+        """Get the round with the lowest score.
+
+        Rounds with equal scores are ordered by their index, so the best round is the first one
+        with the lowest score, like in a run without a history, no matter in which order the
+        rounds finished.
+
+        :return: The seed and the score of the round, or None, if no round has finished.
+        """
+        if not self.rounds:
+            return None
+        round_index, score = min(self.rounds, key=lambda x: (x[1], x[0]))
+        return self.seed_of(round_index), score
+
+    def save(self: "RoundHistory", path: Path) -> None:
+        """Write the history to a file. The file is replaced at once, so it is never incomplete.
+
+        :param path: The path of the file.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix(".tmp")
+        temporary_path.write_text(self.model_dump_json())
+        temporary_path.replace(path)
+
+    @classmethod
+    def load(cls: type["RoundHistory"], path: Path, run_key: str) -> "RoundHistory | None":
+        """Read the history of a run from a file.
+
+        :param path: The path of the file.
+        :param run_key: The key of the run that is resumed.
+        :return: The history, or None, if there is no valid history of the same run.
+        """
+        try:
+            history = cls.model_validate_json(path.read_text())
+        except (OSError, ValidationError):
+            return None
+        if history.run_key != run_key:
+            logger.warning("Der Checkpoint gehört zu einer anderen Konfiguration.")
+            return None
+        return history
+
+
+class Checkpointer:
+    """Writes the history of a run to a checkpoint at regular intervals."""
+
+    def __init__(
+        self: "Checkpointer",
+        path: Path,
+        history: RoundHistory,
+        stopping_policy: StoppingPolicy,
+        interval: float = CHECKPOINT_INTERVAL,
+    ) -> None:
+        """Create a checkpointer.
+
+        :param path: The path of the checkpoint.
+        :param history: The history of the run.
+        :param stopping_policy: The stopping policy, whose clock measures the time of the run.
+        :param interval: The minimal number of seconds between two checkpoints.
+        """
+        self.__path = path
+        self.__history = history
+        self.__stopping_policy = stopping_policy
+        self.__interval = interval
+        self.__last_save = time.monotonic()
+
+    def update(self: "Checkpointer") -> None:
+        """Write a checkpoint, if the interval has passed since the last one."""
+        if time.monotonic() - self.__last_save >= self.__interval:
+            self.save()
+
+    def save(self: "Checkpointer") -> None:
+        """Write a checkpoint."""
+        self.__history.elapsed = self.__stopping_policy.elapsed()
+        self.__history.save(self.__path)
+        self.__last_save = time.monotonic()
+
+
+def replay_round(
+    seed: int,
+    calendar: Calendar,
+    queue_manager: QueueManager,
+    altar_servers: AltarServers,
+    backtracker: Backtracker | None = None,
+) -> None:
+    """Create the plan of a round again from its seed.
+
+    :param seed: The seed of the round.
+    :param calendar: The calendar, which afterwards contains the plan.
+    :param queue_manager: The queue manager.
+    :param altar_servers: The altar servers object.
+    :param backtracker: A backtracker, if the round was created with backtracking.
+    """
+    calendar.clear()
+    queue_manager.start_round(seed)
+    assign_servers(calendar, queue_manager, altar_servers, backtracker)
+
+
+def rebuild_best_plan(  # noqa: PLR0913
+    history: RoundHistory,
+    calendar: Calendar,
+    queue_manager: QueueManager,
+    altar_servers: AltarServers,
+    *,
+    backtracking: bool = False,
+    batch_construction: "BatchConstruction | None" = None,
+    batch_size: int | None = None,
+) -> None:
+    """Create the plan of the best round of a run again from its seed.
+
+    The round was already counted by the instrumentation when it was created, so its replay is
+    only measured as a phase of its own.
+
+    :param history: The history of the run.
+    :param calendar: The calendar, which afterwards contains the plan.
+    :param queue_manager: The queue manager.
+    :param altar_servers: The altar servers object.
+    :param backtracking: If True, the rounds were created with backtracking.
+    :param batch_construction: If given, the rounds are batches of plans of this construction.
+    :param batch_size: The number of plans of every batch.
+    """
+    seed, score = history.best()
+    logger.info("Bester Plan wird aus Seed %d wiederhergestellt (Wert: %f)", seed, score)
+    with instrumentation.phase("rebuild_best_plan"), instrumentation.paused():
+        if batch_construction is not None:
+            snapshot = batch_construction.recreate_plan(batch_size, seed, score)
+            snapshot.restore(calendar, altar_servers)
+            return
+        replay_round(
+            seed, calendar, queue_manager, altar_servers, Backtracker() if backtracking else None
+        )
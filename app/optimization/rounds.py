@@ -0,0 +1,158 @@
+"""A module that contains the loop that creates plans until the stopping policy ends it."""
+
+import logging
+import random
+import sys
+from typing import TYPE_CHECKING
+
+from altar_servers.altar_servers import AltarServers
+from altar_servers.queue_manager import QueueManager
+from altar_servers.server_handler import Backtracker, assign_servers
+from dates.calendar import Calendar
+from events.event_calendar import EventCalendar
+from optimization.round_history import Checkpointer, RoundHistory
+from optimization.snapshot import PlanSnapshot
+from optimization.stopping import StoppingPolicy
+from tqdm import tqdm
+from utils import instrumentation
+
+if TYPE_CHECKING:
+    from optimization.batch_construction import BatchConstruction
+
+logger = logging.getLogger("root")
+
+
+def run_rounds(  # noqa: PLR0913
+    calendar: Calendar,
+    queue_manager: QueueManager,
+    altar_servers: AltarServers,
+    event_calendar: EventCalendar,
+    stopping_policy: StoppingPolicy,
+    *,
+    progress: tqdm | None = None,
+    backtracker: Backtracker | None = None,
+    history: RoundHistory | None = None,
+    checkpointer: Checkpointer | None = None,
+) -> tuple[float, PlanSnapshot | None]:
+    """Create plans until the stopping policy ends the run and keep the one with the lowest score.
+
+    At least one plan is created. The calendar and the queues are cleared after every round. With
+    a history, every round is started with its own seed and recorded in the history, and no
+    snapshot is taken, because the best plan can be rebuilt from its seed.
+
+    :param calendar: The calendar.
+    :param queue_manager: The queue manager.
+    :param altar_servers: The altar servers object.
+    :param event_calendar: The event calendar.
+    :param stopping_policy: The policy that decides when to stop.
+    :param progress: The progress bar that is updated after every round.
+    :param backtracker: If given, conflicts only roll back the last days of a plan.
+    :param history: If given, the seeds of the rounds are taken from it and the rounds are
+    recorded in it.
+    :param checkpointer: If given, the history is written to checkpoints while the rounds run.
+    :return: The lowest score and the snapshot of the corresponding plan, which is None with a
+    history.
+    """
+    best_score = sys.maxsize
+    best_snapshot = None
+    while True:
+        if history is not None:
+            round_index = history.take_round()
+            queue_manager.start_round(history.seed_of(round_index))
+        with instrumentation.phase("assign_servers"):
+            assign_servers(calendar, queue_manager, altar_servers, backtracker)
+        with instrumentation.phase("calculate_statistics"):
+            score = sum(altar_servers.calculate_statistics(event_calendar))
+        if score < best_score:
+            logger.info("%d WAS BETTER %d", stopping_policy.rounds, score)
+            best_score = score
+            if history is None:
+                best_snapshot = PlanSnapshot.take(calendar, altar_servers)
+
+        if history is not None:
+            history.record(round_index, score)
+        if checkpointer is not None:
+            checkpointer.update()
+        if progress is not None:
+            progress.update(1)
+            sys.stdout.flush()
+
+        calendar.clear()
+        if history is None:
+            queue_manager.clear_state()
+        if stopping_policy.update(1, score):
+            return best_score, best_snapshot
+
+
+def count_batch(scores: list[float], stopping_policy: StoppingPolicy) -> tuple[int, float]:
+    """Get the number of plans of a batch that count as rounds and the lowest score among them.
+
+    If a batch has more plans than rounds are left, only the first ones count.
+
+    :param scores: The scores of the plans of the batch that were created without conflicts.
+    :param stopping_policy: The stopping policy.
+    :return: The number of plans that count as rounds and their lowest score, which is
+    sys.maxsize, if no plan counts.
+    """
+    n_rounds = len(scores)
+    remaining_rounds = stopping_policy.remaining_rounds()
+    if remaining_rounds is not None:
+        n_rounds = min(n_rounds, remaining_rounds)
+    return n_rounds, min(scores[:n_rounds], default=sys.maxsize)
+
+
+def run_batched_rounds(  # noqa: PLR0913
+    batch_construction: "BatchConstruction",
+    stopping_policy: StoppingPolicy,
+    batch_size: int,
+    *,
+    progress: tqdm | None = None,
+    history: RoundHistory | None = None,
+    checkpointer: Checkpointer | None = None,
+) -> tuple[float, PlanSnapshot | None]:
+    """Create batches of plans until the stopping policy ends the run and keep the best plan.
+
+    Every plan of a batch that was created without conflicts counts as a round. Plans with
+    conflicts are dropped, so batches are created until at least one plan exists. With a history,
+    every batch is a round of the history, whose plans are drawn with the seed of the round, and
+    no snapshot is taken, because the best plan can be rebuilt from the seed of its batch.
+    Without a history, the seeds of the batches are drawn from the random module.
+
+    :param batch_construction: The construction that creates the batches of plans.
+    :param stopping_policy: The policy that decides when the optimization stops.
+    :param batch_size: The number of plans created at once.
+    :param progress: An optional progress bar that is advanced by the rounds of every batch.
+    :param history: If given, the seeds of the batches are taken from it and the batches are
+    recorded in it.
+    :param checkpointer: If given, the history is written to checkpoints while the batches run.
+    :return: The lowest score and the snapshot of the corresponding plan, which is None with a
+    history.
+    """
+    best_score = sys.maxsize
+    best_snapshot = None
+    while True:
+        if history is not None:
+            round_index = history.take_round()
+            seed = history.seed_of(round_index)
+        else:
+            seed = random.getrandbits(64)
+        with instrumentation.phase("create_batch"):
+            batch = batch_construction.create_seeded_plans(batch_size, seed)
+        n_rounds, score = count_batch(batch.scores, stopping_policy)
+        if score < best_score:
+            best_index = batch.scores.index(score)
+            logger.info("%d WAS BETTER %d", stopping_policy.rounds + best_index, score)
+            best_score = score
+            if history is None:
+                best_snapshot = batch.snapshot(best_index)
+
+        if history is not None:
+            history.record(round_index, score, n_rounds)
+        if checkpointer is not None:
+            checkpointer.update()
+        if progress is not None:
+            progress.update(n_rounds)
+            sys.stdout.flush()
+
+        if stopping_policy.update(n_rounds, score) and best_score < sys.maxsize:
+            return best_score, best_snapshot
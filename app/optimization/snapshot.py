@@ -0,0 +1,90 @@
+"""A module that contains the compact snapshot of the servers assigned to a calendar."""
+
+from array import array
+
+from altar_servers.altar_servers import AltarServers
+from dates.calendar import Calendar
+
+
+class PlanSnapshot:
+    """A compact copy of the servers assigned to the masses of a calendar.
+
+    The indices of the servers of all masses are stored in one flat integer array, in the order of
+    the days and of the masses of each day. The servers of the i-th mass are found between the
+    i-th and the (i+1)-th offset.
+    """
+
+    __slots__ = ("offsets", "server_indices")
+
+    def __init__(self: "PlanSnapshot", server_indices: array, offsets: array) -> None:
+        """Create a plan snapshot.
+
+        :param server_indices: The indices of the assigned servers of all masses.
+        :param offsets: The start of the servers of each mass in the server indices.
+        """
+        self.server_indices = server_indices
+        self.offsets = offsets
+
+    @classmethod
+    def take(
+        cls: type["PlanSnapshot"], calendar: Calendar, altar_servers: AltarServers
+    ) -> "PlanSnapshot":
+        """Take a snapshot of the servers assigned to a calendar.
+
+        :param calendar: The calendar with the assigned servers.
+        :param altar_servers: The altar servers object the servers belong to.
+        :return: The snapshot.
+        """
+        server_indices = array("i")
+        offsets = array("i", [0])
+        for day in calendar.days:
+            for mass in day.masses:
+                server_indices.extend(map(altar_servers.get_server_index, mass.servers))
+                offsets.append(len(server_indices))
+        return cls(server_indices, offsets)
+
+    def servers_of(self: "PlanSnapshot", mass_index: int) -> array:
+        """Get the indices of the servers assigned to a mass.
+
+        :param mass_index: The index of the mass in the order of the calendar.
+        :return: The server indices.
+        """
+        return self.server_indices[self.offsets[mass_index] : self.offsets[mass_index + 1]]
+
+    def restore(self: "PlanSnapshot", calendar: Calendar, altar_servers: AltarServers) -> None:
+        """Replace the assignments of a calendar and the services of the servers by the snapshot.
+
+        :param calendar: The calendar the snapshot was taken of.
+        :param altar_servers: The altar servers object the snapshot was taken with.
+        """
+        calendar.clear()
+        altar_servers.clear_state()
+
+        servers = altar_servers.altar_servers
+        mass_index = 0
+        for day in calendar.days:
+            for mass in day.masses:
+                mass.add_servers([servers[i] for i in self.servers_of(mass_index)])
+                mass_index += 1
+
+            for mass in sorted(day.masses, key=lambda x: x.event.time):
+                for server in mass.servers:
+                    altar_servers.add_service(server, mass)
+
+    def __eq__(self: "PlanSnapshot", other: object) -> bool:
+        """Check if two snapshots contain the same assignments."""
+        if not isinstance(other, PlanSnapshot):
+            return NotImplemented
+        return self.offsets == other.offsets and self.server_indices == other.server_indices
+
+    def __hash__(self: "PlanSnapshot") -> int:
+        """Return the hash value of the snapshot."""
+        return hash((self.offsets.tobytes(), self.server_indices.tobytes()))
+
+    def __getstate__(self: "PlanSnapshot") -> tuple:
+        """Return the state of the snapshot for pickling."""
+        return self.server_indices, self.offsets
+
+    def __setstate__(self: "PlanSnapshot", state: tuple) -> None:
+        """Restore the state of the snapshot after unpickling."""
+        self.server_indices, self.offsets = state
@@ -0,0 +1,97 @@
+"""A module that contains the policies that decide when the optimization stops."""
+
+import sys
+import time
+
+from plan_info.plan_info import OptimizerSettings
+
+DEFAULT_MAX_ROUNDS = 5000
+STOPPING_LIMITS = ("max_rounds", "time_budget", "target_score", "stagnation_rounds")
+
+
+class StoppingPolicy:
+    """Decides after how many rounds the optimization stops and remembers why it stopped.
+
+    The optimization stops after a maximum number of rounds, after a time budget in seconds, once
+    a plan reaches a target score, or once a number of rounds in a row did not improve the best
+    score. Whichever of the configured limits is reached first ends the run.
+    """
+
+    def __init__(self: "StoppingPolicy", settings: OptimizerSettings, elapsed: float = 0.0) -> None:
+        """Create a stopping policy and start its clock.
+
+        :param settings: The optimizer settings containing the limits.
+        :param elapsed: The seconds that were already spent on the run before it was resumed.
+        """
+        self.max_rounds = settings.max_rounds
+        if all(getattr(settings, limit) is None for limit in STOPPING_LIMITS):
+            self.max_rounds = DEFAULT_MAX_ROUNDS
+        self.time_budget = settings.time_budget
+        self.target_score = settings.target_score
+        self.stagnation_rounds = settings.stagnation_rounds
+
+        self.rounds = 0
+        self.best_score = sys.maxsize
+        self.rounds_without_improvement = 0
+        self.reason: str | None = None
+        self.__start = time.monotonic() - elapsed
+
+    def elapsed(self: "StoppingPolicy") -> float:
+        """Get the seconds spent on the run, including the time before it was resumed.
+
+        :return: The elapsed seconds.
+        """
+        return time.monotonic() - self.__start
+
+    def remaining_time(self: "StoppingPolicy") -> float | None:
+        """Get the remaining time of the time budget.
+
+        :return: The remaining seconds or None, if there is no time budget.
+        """
+        if self.time_budget is None:
+            return None
+        return max(0.0, self.time_budget - self.elapsed())
+
+    def remaining_rounds(self: "StoppingPolicy") -> int | None:
+        """Get the number of rounds until the maximum number of rounds is reached.
+
+        :return: The remaining rounds or None, if there is no maximum number of rounds.
+        """
+        if self.max_rounds is None:
+            return None
+        return max(0, self.max_rounds - self.rounds)
+
+    def update(self: "StoppingPolicy", rounds: int, score: float) -> bool:
+        """Record finished rounds and check if the optimization should stop.
+
+        :param rounds: The number of finished rounds.
+        :param score: The best score of these rounds.
+        :return: True, if the optimization should stop. Otherwise, False.
+        """
+        self.rounds += rounds
+        if score < self.best_score:
+            self.best_score = score
+            self.rounds_without_improvement = 0
+        else:
+            self.rounds_without_improvement += rounds
+        return self.should_stop()
+
+    def should_stop(self: "StoppingPolicy") -> bool:
+        """Check if one of the limits is reached and remember the first one that was reached.
+
+        :return: True, if the optimization should stop. Otherwise, False.
+        """
+        if self.reason is not None:
+            return True
+        if self.target_score is not None and self.best_score <= self.target_score:
+            self.reason = "target_score"
+        elif self.max_rounds is not None and self.rounds >= self.max_rounds:
+            self.reason = "max_rounds"
+        elif (
+            self.stagnation_rounds is not None
+            and self.rounds_without_improvement >= self.stagnation_rounds
+        ):
+            self.reason = "stagnation_rounds"
+        elif self.time_budget is not None and self.remaining_time() <= 0:
+            self.reason = "time_budget"
+        return self.reason is not None
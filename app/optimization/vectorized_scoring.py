@@ -0,0 +1,171 @@
+"""A module that scores finished plans with NumPy instead of the running statistics.
+
+A plan is held as the pairs of server index and mass index of its services, which are the nonzero
+entries of a server x mass incidence matrix. The number of services per server and per weekday
+event id are counted with bincount, and the distances between consecutive services of a server
+are taken from the mass dates, sorted by server and date. Several plans are scored together by
+offsetting the server indices of each plan.
+
+The variances are calculated from integer sums like population_variance does, so the numerator and
+the denominator are only converted to floats for the final division. As long as both are smaller
+than 2**53, which holds for any realistic roster, the statistics are equal to the ones of
+AltarServers.calculate_statistics. Beyond that, they differ by the float rounding only.
+"""
+
+import statistics
+
+import numpy as np
+from altar_servers.altar_servers import AltarServers
+from dates.calendar import Calendar
+from events.event_calendar import EventCalendar
+from optimization.snapshot import PlanSnapshot
+
+
+def _population_variances(
+    totals: np.ndarray, square_totals: np.ndarray, n: np.ndarray | int
+) -> np.ndarray:
+    """Calculate population variances from sums and sums of squares of integers.
+
+    :param totals: The sums of the values.
+    :param square_totals: The sums of the squares of the values.
+    :param n: The numbers of values, which are at least one.
+    :return: The population variances.
+    """
+    return (n * square_totals - totals * totals) / (n * n)
+
+
+class VectorizedScoring:
+    """The scores of plans of a calendar, calculated with NumPy reductions."""
+
+    def __init__(
+        self: "VectorizedScoring",
+        calendar: Calendar,
+        altar_servers: AltarServers,
+        event_calendar: EventCalendar,
+    ) -> None:
+        """Collect the dates and the event ids of the masses of a calendar.
+
+        :param calendar: The calendar the plans are created for.
+        :param altar_servers: The altar servers object the plans are created with.
+        :param event_calendar: The event calendar containing the weekday ids.
+        """
+        event_indices = {
+            event_id: i
+            for i, event_id in enumerate(dict.fromkeys(event_calendar.get_list_of_weekday_ids()))
+        }
+        masses = [mass for day in calendar.days for mass in day.masses]
+
+        self.__n_servers = len(altar_servers.altar_servers)
+        self.__n_events = len(event_indices)
+        self.__mass_dates = np.array([mass.day.date.toordinal() for mass in masses], dtype=np.int64)
+        self.__mass_events = np.array(
+            [event_indices.get(mass.event.id, -1) for mass in masses], dtype=np.int64
+        )
+
+    def calculate_statistics(self: "VectorizedScoring", snapshot: PlanSnapshot) -> list[float]:
+        """Get the variances of AltarServers.calculate_statistics for the plan of a snapshot.
+
+        :param snapshot: The snapshot of the plan.
+        :return: The variance of the number of services, the variance of the distances between the
+        services and the variance of the number of services for each event id.
+        """
+        return self.statistics([snapshot])[0].tolist()
+
+    def scores(self: "VectorizedScoring", snapshots: list[PlanSnapshot]) -> np.ndarray:
+        """Get the scores of multiple plans, which are the sums of their statistics.
+
+        :param snapshots: The snapshots of the plans.
+        :return: The score of each plan.
+        """
+        return self.statistics(snapshots).sum(axis=1)
+
+    def statistics(self: "VectorizedScoring", snapshots: list[PlanSnapshot]) -> np.ndarray:
+        """Get the statistics of multiple plans.
+
+        :param snapshots: The snapshots of the plans.
+        :return: One row per plan with the variance of the number of services, the variance of the
+        distances between the services and the variance of the number of services for each event
+        id.
+        """
+        servers, masses = self.__services(snapshots)
+        return self.statistics_of_services(servers, masses, len(snapshots))
+
+    def statistics_of_services(
+        self: "VectorizedScoring", servers: np.ndarray, masses: np.ndarray, n_plans: int
+    ) -> np.ndarray:
+        """Get the statistics of multiple plans from the pairs of server index and mass index.
+
+        :param servers: The server indices of all services, offset by the index of the plan times
+        the number of servers.
+        :param masses: The indices of the masses of all services in the order of the calendar.
+        :param n_plans: The number of plans.
+        :return: One row per plan with the statistics, as returned by statistics.
+        """
+        n_servers = self.__n_servers
+        counts = np.bincount(servers, minlength=n_plans * n_servers).reshape(n_plans, n_servers)
+        result = np.empty((n_plans, 2 + self.__n_events))
+        result[:, 0] = _population_variances(
+            counts.sum(axis=1), (counts * counts).sum(axis=1), n_servers
+        )
+        result[:, 1] = self.__distance_variances(servers, masses, n_plans)
+
+        events = self.__mass_events[masses]
+        is_weekday_event = events >= 0
+        event_counts = np.bincount(
+            servers[is_weekday_event] * self.__n_events + events[is_weekday_event],
+            minlength=n_plans * n_servers * self.__n_events,
+        ).reshape(n_plans, n_servers, self.__n_events)
+        result[:, 2:] = _population_variances(
+            event_counts.sum(axis=1), (event_counts * event_counts).sum(axis=1), n_servers
+        )
+        return result
+
+    def __services(
+        self: "VectorizedScoring", snapshots: list[PlanSnapshot]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Get the services of multiple plans as pairs of server index and mass index.
+
+        The server indices of the i-th plan are offset by i times the number of servers, so the
+        servers of all plans are counted together.
+
+        :param snapshots: The snapshots of the plans.
+        :return: The server indices and the mass indices of all services.
+        """
+        servers = []
+        masses = []
+        for i, snapshot in enumerate(snapshots):
+            offsets = np.frombuffer(snapshot.offsets, dtype=np.int32)
+            servers.append(
+                np.frombuffer(snapshot.server_indices, dtype=np.int32).astype(np.int64)
+                + i * self.__n_servers
+            )
+            masses.append(np.repeat(np.arange(len(offsets) - 1), np.diff(offsets)))
+        return np.concatenate(servers), np.concatenate(masses)
+
+    def __distance_variances(
+        self: "VectorizedScoring", servers: np.ndarray, masses: np.ndarray, n_plans: int
+    ) -> np.ndarray:
+        """Get the variance of the distances between consecutive services of the servers per plan.
+
+        :param servers: The offset server indices of all services.
+        :param masses: The mass indices of all services.
+        :param n_plans: The number of plans.
+        :return: The variance of the distances of each plan.
+        """
+        dates = self.__mass_dates[masses]
+        order = np.lexsort((dates, servers))
+        servers = servers[order]
+        dates = dates[order]
+
+        is_distance = servers[1:] == servers[:-1]
+        distances = (dates[1:] - dates[:-1])[is_distance]
+        plans = servers[1:][is_distance] // self.__n_servers
+        n_distances = np.bincount(plans, minlength=n_plans)
+        if not n_distances.all():
+            msg = "pvariance requires at least one data point"
+            raise statistics.StatisticsError(msg)
+        return _population_variances(
+            np.bincount(plans, weights=distances, minlength=n_plans).astype(np.int64),
+            np.bincount(plans, weights=distances * distances, minlength=n_plans).astype(np.int64),
+            n_distances,
+        )
@@ -13,9 +13,30 @@ class WelcomeText(BaseModel):
     dismissal: str
 
 
+class OptimizerSettings(BaseModel):
+    """The settings of the optimization of the plan.
+
+    The optimization stops as soon as one of the given limits is reached. If no limit is given,
+    it stops after the default number of rounds. Afterwards, the best plan is improved by the
+    given number of local search iterations. With backtracking, conflicts during the creation of
+    a plan only roll back the last days instead of restarting the whole plan. With a batch size,
+    that many plans are created at once and plans with conflicts are dropped, so backtracking is
+    not used.
+    """
+
+    max_rounds: int | None = None
+    time_budget: float | None = None
+    target_score: float | None = None
+    stagnation_rounds: int | None = None
+    local_search_iterations: int = 0
+    backtracking: bool = False
+    batch_size: int | None = None
+
+
 class PlanInfo(BaseModel):
     """The plan info."""
 
     start_date: datetime.date
     end_date: datetime.date
     welcome_text: WelcomeText
+    optimizer: OptimizerSettings = OptimizerSettings()
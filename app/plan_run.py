@@ -0,0 +1,437 @@
+"""A module that contains the steps of a run that creates a plan.
+
+main.py only imports this module when a plan is created, so the fast paths of main.py do not pay
+for importing pydantic, tqdm and the optimization. PyLaTeX, NumPy, the process pool and the
+exporters are imported only by the steps that use them.
+"""
+
+import argparse
+import logging
+import os
+import random
+import time
+from pathlib import Path
+
+from altar_servers.altar_servers import AltarServers, get_distribution
+from altar_servers.queue_manager import QueueManager
+from altar_servers.server_handler import Backtracker
+from dates.calendar import Calendar
+from dates.date_handler import create_calendar
+from events.event_calendar import EventCalendar
+from optimization.local_search import improve_plan
+from optimization.plan_setup import PlanConfig, PlanSetup
+from optimization.repair import (
+    REPAIR_SEARCH_ITERATIONS,
+    ConfigChanges,
+    PlanState,
+    RepairReport,
+    repair_plan,
+)
+from optimization.result_cache import CachedResult, ResultCache, get_result_key
+from optimization.round_history import (
+    Checkpointer,
+    RoundHistory,
+    get_run_key,
+    rebuild_best_plan,
+)
+from optimization.rounds import run_batched_rounds, run_rounds
+from optimization.stopping import STOPPING_LIMITS, StoppingPolicy
+from plan_info.plan_info import OptimizerSettings, PlanInfo
+from tqdm import tqdm
+from utils import instrumentation
+
+logger = logging.getLogger("root")
+
+OUTPUT_PATH = Path("output")
+CHECKPOINT_PATH = Path("output/checkpoint.json")
+PLAN_KEY_PATH = Path("output/plan.key")
+PERFORMANCE_REPORT_PATH = Path("output/performance.json")
+PLAN_STATE_PATH = Path("output/plan_state.json")
+REPAIR_REPORT_PATH = Path("output/repair.json")
+
+
+def get_optimizer_settings(plan_info: PlanInfo, arguments: argparse.Namespace) -> OptimizerSettings:
+    """Combine the optimizer settings of the plan info with the command line arguments.
+
+    If any limit is given on the command line, the limits of the plan info are ignored.
+
+    :param plan_info: The plan info.
+    :param arguments: The parsed command line arguments.
+    :return: The optimizer settings.
+    """
+    settings = plan_info.optimizer
+    limits = {
+        name: getattr(arguments, name)
+        for name in STOPPING_LIMITS
+        if getattr(arguments, name) is not None
+    }
+    if limits:
+        settings = settings.model_copy(update={name: limits.get(name) for name in STOPPING_LIMITS})
+    for name in ("local_search_iterations", "backtracking", "batch_size"):
+        if getattr(arguments, name) is not None:
+            settings = settings.model_copy(update={name: getattr(arguments, name)})
+    return settings
+
+
+def create_run(
+    config: PlanConfig, settings: OptimizerSettings, arguments: argparse.Namespace
+) -> tuple[StoppingPolicy, RoundHistory | None, Checkpointer | None]:
+    """Start a new run or resume the run of the checkpoint.
+
+    The rounds of a resumed run are fed into the stopping policy again, so its limits count the
+    rounds and the time before the interruption.
+
+    :param config: The plan config.
+    :param settings: The optimizer settings.
+    :param arguments: The parsed command line arguments.
+    :return: The stopping policy, the history of the run and its checkpointer.
+    """
+    run_key = get_run_key(config, settings)
+    history = RoundHistory.load(CHECKPOINT_PATH, run_key) if arguments.resume else None
+    if history is not None:
+        logger.info(
+            "Optimierung wird nach %d Runden fortgesetzt",
+            sum(n_rounds for n_rounds, _ in history.counted_rounds()),
+        )
+    else:
+        if arguments.resume:
+            logger.info("Kein passender Checkpoint gefunden, neue Optimierung wird gestartet")
+        run_seed = arguments.seed if arguments.seed is not None else random.getrandbits(64)
+        history = RoundHistory(run_key=run_key, run_seed=run_seed)
+    logger.info("Seed der Optimierung: %d", history.run_seed)
+
+    stopping_policy = StoppingPolicy(settings, history.elapsed)
+    for n_rounds, score in history.counted_rounds():
+        stopping_policy.update(n_rounds, score)
+    return stopping_policy, history, Checkpointer(CHECKPOINT_PATH, history, stopping_policy)
+
+
+def create_plan(  # noqa: PLR0913, PLR0917
+    config: PlanConfig,
+    calendar: Calendar,
+    queue_manager: QueueManager,
+    altar_servers: AltarServers,
+    event_calendar: EventCalendar,
+    settings: OptimizerSettings,
+    arguments: argparse.Namespace,
+) -> tuple:
+    """Optimize the assignments and improve the best plan with the local search.
+
+    :param config: The plan config.
+    :param calendar: The calendar.
+    :param queue_manager: The queue manager.
+    :param altar_servers: The altar servers object.
+    :param event_calendar: The event calendar.
+    :param settings: The optimizer settings.
+    :param arguments: The parsed command line arguments.
+    :return: The resulting altar servers and the calendar with all altar servers assigned.
+    """
+    workers = arguments.workers or os.cpu_count()
+    stopping_policy, history, checkpointer = create_run(config, settings, arguments)
+    try:
+        if workers > 1:
+            from optimization.parallel import optimize_assignments_parallel  # noqa: PLC0415
+
+            final_altar_servers, final_calendar = optimize_assignments_parallel(
+                config,
+                calendar,
+                queue_manager,
+                altar_servers,
+                event_calendar,
+                stopping_policy,
+                workers,
+                backtracking=settings.backtracking,
+                batch_size=settings.batch_size,
+                history=history,
+                checkpointer=checkpointer,
+            )
+        else:
+            final_altar_servers, final_calendar = optimize_assignments(
+                calendar,
+                queue_manager,
+                altar_servers,
+                event_calendar,
+                stopping_policy,
+                backtracking=settings.backtracking,
+                batch_size=settings.batch_size,
+                history=history,
+                checkpointer=checkpointer,
+            )
+    finally:
+        if checkpointer is not None:
+            checkpointer.save()
+    logger.info(
+        "Optimierung nach %d Runden beendet (%s), bester Wert: %f",
+        stopping_policy.rounds,
+        stopping_policy.reason,
+        stopping_policy.best_score,
+    )
+    if settings.local_search_iterations > 0:
+        seed = history.run_seed if history is not None else arguments.seed
+        with instrumentation.phase("local_search"):
+            score = improve_plan(
+                final_calendar,
+                altar_servers,
+                event_calendar,
+                settings.local_search_iterations,
+                random.Random(seed),  # noqa: S311
+            )
+        logger.info("Lokale Suche abgeschlossen, bester Wert: %f", score)
+    return final_altar_servers, final_calendar
+
+
+def run_plan(arguments: argparse.Namespace, input_key: str) -> None:
+    """Create the plan of the config files and write it in the requested formats.
+
+    With instrumentation, a performance report of the run is written to the output folder, even
+    if the run fails.
+
+    :param arguments: The parsed command line arguments.
+    :param input_key: The key of the config files and the options, which is stored next to the
+    .tex file of the plan.
+    """
+    if not arguments.instrument:
+        _run_plan(arguments, input_key)
+        return
+
+    recorder = instrumentation.enable()
+    start = time.perf_counter()
+    try:
+        _run_plan(arguments, input_key)
+    finally:
+        instrumentation.disable()
+        recorder.write_report(
+            PERFORMANCE_REPORT_PATH,
+            total_seconds=time.perf_counter() - start,
+            workers=arguments.workers or os.cpu_count(),
+        )
+        logger.info("Leistungsbericht wurde gespeichert: %s", PERFORMANCE_REPORT_PATH)
+
+
+def _run_plan(arguments: argparse.Namespace, input_key: str) -> None:
+    """Create the plan of the config files and write it in the requested formats.
+
+    :param arguments: The parsed command line arguments.
+    :param input_key: The key of the config files and the options.
+    """
+    if arguments.repair:
+        _repair_plan(arguments)
+        return
+
+    logger.info("Konfiguration wird geladen...")
+    with instrumentation.phase("config_validation"):
+        config = PlanConfig.from_directory(Path("config"))
+        event_calendar = EventCalendar.model_validate_json(config.holy_masses)
+        plan_info = PlanInfo.model_validate_json(config.plan_info)
+        settings = get_optimizer_settings(plan_info, arguments)
+        result_key = get_result_key(config, settings, arguments.seed)
+
+    logger.info("Kalender wird erstellet...")
+    with instrumentation.phase("create_calendar"):
+        calendar = create_calendar(plan_info.start_date, plan_info.end_date, event_calendar)
+    logger.info("Abgeschlossen")
+    logger.info("Ministranten werden erstellt...")
+    with instrumentation.phase("create_altar_servers"):
+        altar_servers = AltarServers.model_validate_json(config.altar_servers)
+        altar_servers.build_availability(plan_info.start_date, plan_info.end_date)
+    logger.info("Abgeschlossen")
+    logger.info("Warteschlangen werden erstellt...")
+    with instrumentation.phase("create_queue_manager"):
+        queue_manager = QueueManager(event_calendar, altar_servers)
+    logger.info("Abgeschlossen")
+
+    result_cache = ResultCache()
+    cached_result = None if arguments.no_cache else result_cache.load(result_key)
+    if cached_result is not None and cached_result.fits(calendar, altar_servers):
+        logger.info("Plan aus dem Cache geladen, bester Wert: %f", cached_result.score)
+        cached_result.restore(calendar, altar_servers)
+        final_altar_servers, final_calendar = altar_servers.altar_servers, calendar
+        if instrumentation.active is not None:
+            instrumentation.active.count("cached_plans")
+    else:
+        logger.info("Ministranten werden eingeteilt...")
+        with instrumentation.phase("optimization"):
+            final_altar_servers, final_calendar = create_plan(
+                config, calendar, queue_manager, altar_servers, event_calendar, settings, arguments
+            )
+        score = sum(altar_servers.calculate_statistics(event_calendar))
+        result_cache.store(result_key, CachedResult.take(final_calendar, altar_servers, score))
+
+    logger.info("Statistik")
+    for server in get_distribution(final_altar_servers):
+        logger.info(server)
+
+    PlanState.take(config, final_calendar, plan_info).save(PLAN_STATE_PATH)
+    if "pdf" in arguments.format:
+        PLAN_KEY_PATH.unlink(missing_ok=True)
+    write_plan(final_calendar, plan_info, arguments.format, OUTPUT_PATH)
+    if "pdf" in arguments.format:
+        PLAN_KEY_PATH.write_text(input_key)
+
+
+def _repair_plan(arguments: argparse.Namespace) -> None:
+    """Repair the published plan after the configs changed and write it in the requested formats.
+
+    The changes are logged and written to a report in the output folder. The repaired plan becomes
+    the published plan of the next repair.
+
+    :param arguments: The parsed command line arguments.
+    """
+    state = PlanState.load(PLAN_STATE_PATH)
+    if state is None:
+        logger.error("Kein gespeicherter Plan gefunden, bitte zuerst einen Plan erstellen")
+        return
+
+    start = time.perf_counter()
+    logger.info("Konfiguration wird geladen...")
+    with instrumentation.phase("config_validation"):
+        config = PlanConfig.from_directory(Path("config"))
+        config_changes = ConfigChanges.between(state.config, config)
+        setup = PlanSetup(config)
+        settings = get_optimizer_settings(setup.plan_info, arguments)
+    logger.info("Änderungen seit dem letzten Plan: %s", config_changes)
+
+    logger.info("Plan wird repariert...")
+    with instrumentation.phase("repair"):
+        changes = repair_plan(
+            state.plan,
+            setup,
+            settings.local_search_iterations or REPAIR_SEARCH_ITERATIONS,
+            random.Random(arguments.seed),  # noqa: S311
+        )
+    report = RepairReport(
+        seconds=time.perf_counter() - start,
+        score=sum(setup.altar_servers.calculate_statistics(setup.event_calendar)),
+        config_changes=config_changes,
+        changes=changes,
+    )
+    for change in changes:
+        if change.missing:
+            logger.warning(change)
+        else:
+            logger.info(change)
+    logger.info(
+        "Reparatur nach %.3f s abgeschlossen, %d Messen geändert, bester Wert: %f",
+        report.seconds,
+        len(changes),
+        report.score,
+    )
+    REPAIR_REPORT_PATH.write_text(report.model_dump_json(indent=4))
+
+    PlanState.take(config, setup.calendar, setup.plan_info).save(PLAN_STATE_PATH)
+    if "pdf" in arguments.format:
+        PLAN_KEY_PATH.unlink(missing_ok=True)
+    write_plan(setup.calendar, setup.plan_info, arguments.format, OUTPUT_PATH)
+
+
+def write_plan(
+    calendar: Calendar, plan_info: PlanInfo, formats: list[str], directory: Path
+) -> None:
+    """Write the plan in the requested formats.
+
+    :param calendar: The calendar with all altar servers assigned.
+    :param plan_info: The plan info.
+    :param formats: The formats, see FORMATS of main.py.
+    :param directory: The output directory, which gets the files of the plan.
+    """
+    export_formats = [export_format for export_format in formats if export_format != "pdf"]
+    if export_formats:
+        from exporters.exporters import export_plan  # noqa: PLC0415
+
+        logger.info("Plan wird exportiert: %s", ", ".join(export_formats))
+        with instrumentation.phase("export"):
+            export_plan(
+                calendar, plan_info.start_date, plan_info.end_date, export_formats, directory
+            )
+        logger.info("Abgeschlossen")
+
+    if "pdf" in formats:
+        from utils.latex_handler import generate_pdf  # noqa: PLC0415
+
+        logger.info("PDF wird erstellt")
+        with instrumentation.phase("generate_pdf"):
+            generate_pdf(
+                calendar,
+                plan_info.start_date,
+                plan_info.end_date,
+                plan_info.welcome_text,
+                str(directory / "plan"),
+            )
+        logger.info("Abgeschlossen")
+
+
+def optimize_assignments(  # noqa: PLR0913
+    calendar: Calendar,
+    queue_manager: QueueManager,
+    altar_servers: AltarServers,
+    event_calendar: EventCalendar,
+    stopping_policy: StoppingPolicy,
+    *,
+    backtracking: bool = False,
+    batch_size: int | None = None,
+    history: RoundHistory | None = None,
+    checkpointer: Checkpointer | None = None,
+) -> tuple:
+    """Create multiple plans until keep the one with the lowest score in number of services.
+
+    Only a snapshot of the best plan is kept. The calendar and the services of the servers are
+    rebuilt from it once all rounds are done. With a history, only the seeds and scores of the
+    rounds are kept and the best plan is created again from its seed.
+
+    :param event_calendar:
+    :param queue_manager:
+    :param calendar: The calendar.
+    :param altar_servers: The raw altar server dictionary.
+    :param stopping_policy: The policy that decides when the optimization stops.
+    :param backtracking: If True, conflicts only roll back the last days of a plan.
+    :param batch_size: If given, this number of plans is created at once.
+    :param history: If given, the rounds are taken from and recorded in this history.
+    :param checkpointer: If given, the history is written to checkpoints.
+    :return: The resulting altar servers object and the calendar object with all altar servers
+    assigned.
+    """
+    iterations = tqdm(total=stopping_policy.max_rounds, initial=stopping_policy.rounds)
+    batch_construction = None
+    if batch_size:
+        from optimization.batch_construction import BatchConstruction  # noqa: PLC0415
+
+        batch_construction = BatchConstruction(calendar, altar_servers, event_calendar)
+
+    backtracker = Backtracker() if backtracking and not batch_size else None
+    if history is None or not history.rounds or not stopping_policy.should_stop():
+        if batch_construction is not None:
+            _, best_snapshot = run_batched_rounds(
+                batch_construction,
+                stopping_policy,
+                batch_size,
+                progress=iterations,
+                history=history,
+                checkpointer=checkpointer,
+            )
+        else:
+            _, best_snapshot = run_rounds(
+                calendar,
+                queue_manager,
+                altar_servers,
+                event_calendar,
+                stopping_policy,
+                progress=iterations,
+                backtracker=backtracker,
+                history=history,
+                checkpointer=checkpointer,
+            )
+    if backtracker is not None:
+        logger.info("Durch Backtracking vermiedene Neustarts: %d", backtracker.avoided_restarts)
+    if history is None:
+        best_snapshot.restore(calendar, altar_servers)
+    else:
+        rebuild_best_plan(
+            history,
+            calendar,
+            queue_manager,
+            altar_servers,
+            backtracking=backtracking,
+            batch_construction=batch_construction,
+            batch_size=batch_size,
+        )
+    return altar_servers.altar_servers, calendar
@@ -0,0 +1 @@
+"""A package containing the long-running plan service."""
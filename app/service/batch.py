@@ -0,0 +1,181 @@
+"""A module that contains the batch mode, which creates the plans of many config folders at once.
+
+A manifest lists the jobs, each with its config folder and the folder its plan is written to:
+
+    {
+        "jobs": [
+            {
+                "name": "st-peter",
+                "config_directory": "st-peter/config",
+                "output_directory": "st-peter/output",
+                "formats": ["pdf", "ics-servers"],
+                "optimizer": {"max_rounds": 5000}
+            }
+        ]
+    }
+
+Relative paths are relative to the folder of the manifest. All jobs share the worker processes of
+one plan service, so the start-up is paid once and the workers stay busy while other jobs are
+written. Each job logs to job.log in its output folder, and a summary of all jobs is written
+next to the manifest.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Literal
+
+from optimization.plan_setup import PlanSetup
+from plan_run import write_plan
+from pydantic import BaseModel, Field
+from service.plan_service import PlanJob, PlanService
+
+logger = logging.getLogger("root")
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# The formats of --format, see FORMATS of main.py.
+Format = Literal["pdf", "json", "csv", "ics", "ics-servers"]
+
+
+class BatchJob(PlanJob):
+    """A job of a manifest, which writes its plan to an output folder."""
+
+    name: str
+    output_directory: str
+    formats: list[Format] = Field(default_factory=lambda: ["pdf"])
+
+
+class BatchManifest(BaseModel):
+    """The jobs of a batch run."""
+
+    jobs: list[BatchJob] = Field(min_length=1)
+    parallel_jobs: int | None = None
+
+    def resolve_paths(self: "BatchManifest", directory: Path) -> None:
+        """Make the relative paths of the jobs relative to a folder.
+
+        :param directory: The folder of the manifest.
+        """
+        for job in self.jobs:
+            if job.config_directory is not None:
+                job.config_directory = str(directory / job.config_directory)
+            job.output_directory = str(directory / job.output_directory)
+
+
+class BatchJobSummary(BaseModel):
+    """The outcome of a job of a batch run."""
+
+    name: str
+    succeeded: bool
+    seconds: float
+    score: float | None = None
+    rounds: int | None = None
+    cached: bool | None = None
+    error: str | None = None
+
+
+class BatchSummary(BaseModel):
+    """The summary of a batch run."""
+
+    seconds: float
+    jobs: list[BatchJobSummary]
+
+
+def get_summary_path(manifest_path: Path) -> Path:
+    """Get the path of the summary of a manifest.
+
+    :param manifest_path: The path of the manifest.
+    :return: The path of the summary.
+    """
+    return manifest_path.with_name(f"{manifest_path.stem}.summary.json")
+
+
+def run_job(job: BatchJob, plan_service: PlanService) -> BatchJobSummary:
+    """Create the plan of a job, write it to its output folder and log to job.log there.
+
+    A failing job is logged and summarized, so it does not stop the other jobs.
+
+    :param job: The job.
+    :param plan_service: The plan service.
+    :return: The summary of the job.
+    """
+    output_directory = Path(job.output_directory)
+    output_directory.mkdir(parents=True, exist_ok=True)
+    handler = logging.FileHandler(output_directory / "job.log", mode="w", encoding="utf-8")
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    thread = threading.get_ident()
+    handler.addFilter(lambda record: record.thread == thread)
+    logging.getLogger().addHandler(handler)
+
+    def write(setup: PlanSetup) -> None:
+        write_plan(setup.calendar, setup.plan_info, job.formats, output_directory)
+
+    start = time.perf_counter()
+    try:
+        logger.info("Auftrag %s wird gestartet", job.name)
+        result = plan_service.create_plan(job, write)
+    except Exception as e:  # noqa: BLE001
+        logger.error("Auftrag %s ist fehlgeschlagen: %s", job.name, e)  # noqa: TRY400
+        return BatchJobSummary(
+            name=job.name, succeeded=False, seconds=time.perf_counter() - start, error=str(e)
+        )
+    finally:
+        logging.getLogger().removeHandler(handler)
+        handler.close()
+
+    summary = BatchJobSummary(
+        name=job.name,
+        succeeded=True,
+        seconds=time.perf_counter() - start,
+        score=result.score,
+        rounds=result.rounds,
+        cached=result.cached,
+    )
+    logger.info(
+        "Auftrag %s abgeschlossen nach %.1f s, %d Runden, bester Wert: %f",
+        job.name,
+        summary.seconds,
+        summary.rounds,
+        summary.score,
+    )
+    return summary
+
+
+def run_batch(
+    manifest_path: Path, plan_service: PlanService, workers: int
+) -> list[BatchJobSummary]:
+    """Run all jobs of a manifest and write the summary next to it.
+
+    As many jobs run at the same time as there are worker processes, unless the manifest sets
+    parallel_jobs, so some jobs are optimized while others are validated or written.
+
+    :param manifest_path: The path of the manifest.
+    :param plan_service: The plan service, whose worker processes are shared by the jobs.
+    :param workers: The number of worker processes.
+    :return: The summaries of the jobs in the order of the manifest.
+    """
+    manifest = BatchManifest.model_validate_json(manifest_path.read_text())
+    manifest.resolve_paths(manifest_path.parent)
+    logger.info("%d Aufträge werden bearbeitet", len(manifest.jobs))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=manifest.parallel_jobs or workers) as executor:
+        summaries = list(executor.map(lambda job: run_job(job, plan_service), manifest.jobs))
+
+    summary_path = get_summary_path(manifest_path)
+    summary_path.write_text(
+        BatchSummary(seconds=time.perf_counter() - start, jobs=summaries).model_dump_json(indent=4)
+    )
+    failed = [summary.name for summary in summaries if not summary.succeeded]
+    logger.info(
+        "%d von %d Aufträgen abgeschlossen, Zusammenfassung: %s",
+        len(summaries) - len(failed),
+        len(summaries),
+        summary_path,
+    )
+    if failed:
+        logger.warning("Fehlgeschlagene Aufträge: %s", ", ".join(failed))
+    return summaries
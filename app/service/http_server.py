@@ -0,0 +1,132 @@
+"""A module that contains the local HTTP API of the plan service.
+
+    GET  /health  Returns {"status": "ok"}.
+    POST /plans   Takes a PlanJob as JSON and returns the PlanResult as JSON.
+
+Every request is handled in a thread of its own, so multiple jobs run at the same time and share
+the worker processes of the service. The config directory of a job is resolved against the config
+root of the server, and directories outside of it are rejected, so clients cannot read other
+directories of the server. Errors are answered without details, which are only logged: invalid
+jobs, e.g. configs that fail the validation or name unknown servers, with 400, and any other error
+with 500.
+"""
+
+import logging
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from service.plan_service import PlanJob, PlanService
+
+logger = logging.getLogger("root")
+
+
+class PlanRequestHandler(BaseHTTPRequestHandler):
+    """Handles the requests of the plan service."""
+
+    server: "PlanServer"
+
+    def do_GET(self: "PlanRequestHandler") -> None:
+        """Answer a GET request."""
+        if self.path != "/health":
+            self.__respond(HTTPStatus.NOT_FOUND, '{"error": "Not found"}')
+            return
+        self.__respond(HTTPStatus.OK, '{"status": "ok"}')
+
+    def do_POST(self: "PlanRequestHandler") -> None:
+        """Answer a POST request by creating a plan."""
+        if self.path != "/plans":
+            self.__respond(HTTPStatus.NOT_FOUND, '{"error": "Not found"}')
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            job = PlanJob.model_validate_json(body)
+            resolve_config_directory(job, self.server.config_root)
+            result = self.server.plan_service.create_plan(job)
+        except (ValueError, KeyError, OSError) as e:
+            logger.warning("Ungültiger Auftrag: %s", e)
+            self.__respond(HTTPStatus.BAD_REQUEST, '{"error": "Invalid job"}')
+            return
+        except Exception:
+            logger.exception("Fehler beim Erstellen des Plans")
+            self.__respond(HTTPStatus.INTERNAL_SERVER_ERROR, '{"error": "Internal error"}')
+            return
+        self.__respond(HTTPStatus.OK, result.model_dump_json())
+
+    def log_message(self: "PlanRequestHandler", message_format: str, *args: object) -> None:
+        """Log a request to the logger of the application.
+
+        :param message_format: The format of the message.
+        :param args: The arguments of the message.
+        """
+        logger.info("%s - %s", self.address_string(), message_format % args)
+
+    def __respond(self: "PlanRequestHandler", status: HTTPStatus, body: str) -> None:
+        """Send a JSON response.
+
+        :param status: The status of the response.
+        :param body: The JSON body.
+        """
+        content = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def resolve_config_directory(job: PlanJob, config_root: Path) -> None:
+    """Resolve the config directory of a job against the config root.
+
+    :param job: The job, whose config directory is replaced by the resolved one.
+    :param config_root: The directory that contains all config directories clients may use.
+    :raises ValueError: If the config directory is outside of the config root.
+    """
+    if job.config_directory is None:
+        return
+    root = config_root.resolve()
+    directory = (root / job.config_directory).resolve()
+    if not directory.is_relative_to(root):
+        msg = f"The config directory {job.config_directory} is outside of the config root"
+        raise ValueError(msg)
+    job.config_directory = str(directory)
+
+
+class PlanServer(ThreadingHTTPServer):
+    """An HTTP server that hands the jobs to a plan service."""
+
+    daemon_threads = True
+
+    def __init__(
+        self: "PlanServer",
+        address: tuple[str, int],
+        plan_service: PlanService,
+        config_root: Path,
+    ) -> None:
+        """Create the server.
+
+        :param address: The host and the port.
+        :param plan_service: The plan service.
+        :param config_root: The directory that contains all config directories clients may use.
+        """
+        super().__init__(address, PlanRequestHandler)
+        self.plan_service = plan_service
+        self.config_root = config_root
+
+
+def serve(host: str, port: int, plan_service: PlanService, config_root: Path) -> None:
+    """Answer requests until the process is interrupted.
+
+    :param host: The host to listen on.
+    :param port: The port to listen on.
+    :param plan_service: The plan service.
+    :param config_root: The directory that contains all config directories clients may use.
+    """
+    with PlanServer((host, port), plan_service, config_root) as server:
+        logger.info("Plan-Service läuft auf http://%s:%d", host, port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Plan-Service wird beendet")
+        finally:
+            plan_service.close()
@@ -0,0 +1,225 @@
+"""A module that contains the plan service, which creates plans with warm state.
+
+The service keeps a pool of worker processes for all jobs. The workers keep the objects built from
+the last configs they worked on, and the service keeps the objects of every config it has seen,
+so a job for a known config neither validates the config files nor builds the calendar, the
+availability of the servers or the queues again. Each job gets objects of its own, so jobs for
+the same config can run at the same time.
+"""
+
+import json
+import random
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+
+from exporters.exported_plan import ExportedPlan
+from optimization.local_search import improve_plan
+from optimization.parallel import optimize_assignments_parallel, start_worker_pool
+from optimization.plan_setup import PlanConfig, PlanSetup
+from optimization.result_cache import CachedResult, ResultCache, get_result_key
+from optimization.round_history import RoundHistory
+from optimization.stopping import STOPPING_LIMITS, StoppingPolicy
+from plan_info.plan_info import OptimizerSettings
+from pydantic import BaseModel
+
+CACHED_CONFIGS = 8
+
+
+class PlanJob(BaseModel):
+    """A request for a plan, either from a config folder or from the inline content of the configs.
+
+    The given optimizer settings replace the ones of the plan info. If any limit is given, the
+    limits of the plan info are ignored, like the limits given on the command line.
+    """
+
+    config_directory: str | None = None
+    altar_servers: dict | None = None
+    holy_masses: dict | None = None
+    plan_info: dict | None = None
+    optimizer: OptimizerSettings | None = None
+    seed: int | None = None
+
+    def get_config(self: "PlanJob") -> PlanConfig:
+        """Get the plan config of the job.
+
+        :return: The plan config.
+        """
+        if self.config_directory is not None:
+            return PlanConfig.from_directory(Path(self.config_directory))
+        if self.altar_servers is None or self.holy_masses is None or self.plan_info is None:
+            msg = "Either config_directory or altar_servers, holy_masses and plan_info are required"
+            raise ValueError(msg)
+        return PlanConfig(
+            altar_servers=json.dumps(self.altar_servers),
+            holy_masses=json.dumps(self.holy_masses),
+            plan_info=json.dumps(self.plan_info),
+        )
+
+    def get_settings(self: "PlanJob", settings: OptimizerSettings) -> OptimizerSettings:
+        """Combine the optimizer settings of the plan info with the ones of the job.
+
+        :param settings: The optimizer settings of the plan info.
+        :return: The optimizer settings.
+        """
+        if self.optimizer is None:
+            return settings
+        update = self.optimizer.model_dump(exclude_unset=True)
+        if any(name in update for name in STOPPING_LIMITS):
+            update = dict.fromkeys(STOPPING_LIMITS) | update
+        return settings.model_copy(update=update)
+
+
+class PlanResult(BaseModel):
+    """The best plan of a job."""
+
+    score: float
+    rounds: int
+    cached: bool
+    plan: ExportedPlan
+
+
+class PlanService:
+    """Creates plans for jobs on a shared pool of worker processes."""
+
+    def __init__(self: "PlanService", workers: int, result_cache: ResultCache | None) -> None:
+        """Start the worker processes.
+
+        :param workers: The number of worker processes.
+        :param result_cache: The cache of the results, if results should be cached.
+        """
+        self.__workers = workers
+        self.__executor = start_worker_pool(workers)
+        self.__result_cache = result_cache
+        self.__lock = threading.Lock()
+        self.__setups: OrderedDict[str, list[PlanSetup]] = OrderedDict()
+
+    def create_plan(
+        self: "PlanService", job: PlanJob, write_plan: Callable[[PlanSetup], None] | None = None
+    ) -> PlanResult:
+        """Create the plan of a job or take it from the result cache.
+
+        :param job: The job.
+        :param write_plan: If given, it is called with the objects of the plan, whose calendar
+        contains the best plan, before they are handed to the next job.
+        :return: The result.
+        """
+        config = job.get_config()
+        setup = self.__acquire_setup(config)
+        try:
+            settings = job.get_settings(setup.plan_info.optimizer)
+            result_key = get_result_key(config, settings, job.seed)
+            cached_result = self.__load_result(result_key)
+            if cached_result is not None and cached_result.fits(
+                setup.calendar, setup.altar_servers
+            ):
+                cached_result.restore(setup.calendar, setup.altar_servers)
+                score, rounds, cached = cached_result.score, 0, True
+            else:
+                rounds = self.__optimize(config, setup, settings, job.seed)
+                score = sum(setup.altar_servers.calculate_statistics(setup.event_calendar))
+                self.__store_result(
+                    result_key, CachedResult.take(setup.calendar, setup.altar_servers, score)
+                )
+                cached = False
+            plan = ExportedPlan.from_calendar(
+                setup.calendar, setup.plan_info.start_date, setup.plan_info.end_date
+            )
+            if write_plan is not None:
+                write_plan(setup)
+        finally:
+            self.__release_setup(config, setup)
+        return PlanResult(score=score, rounds=rounds, cached=cached, plan=plan)
+
+    def close(self: "PlanService") -> None:
+        """Stop the worker processes."""
+        self.__executor.shutdown(cancel_futures=True)
+
+    def __optimize(
+        self: "PlanService",
+        config: PlanConfig,
+        setup: PlanSetup,
+        settings: OptimizerSettings,
+        seed: int | None,
+    ) -> int:
+        """Optimize the assignments of a job on the worker processes.
+
+        :param config: The plan config.
+        :param setup: The objects of the plan, which afterwards contain the best plan.
+        :param settings: The optimizer settings.
+        :param seed: The seed of the run, or None for a random seed.
+        :return: The number of rounds.
+        """
+        run_seed = seed if seed is not None else random.getrandbits(64)
+        stopping_policy = StoppingPolicy(settings)
+        optimize_assignments_parallel(
+            config,
+            setup.calendar,
+            setup.queue_manager,
+            setup.altar_servers,
+            setup.event_calendar,
+            stopping_policy,
+            self.__workers,
+            backtracking=settings.backtracking,
+            batch_size=settings.batch_size,
+            history=RoundHistory(run_seed=run_seed),
+            executor=self.__executor,
+        )
+        if settings.local_search_iterations > 0:
+            improve_plan(
+                setup.calendar,
+                setup.altar_servers,
+                setup.event_calendar,
+                settings.local_search_iterations,
+                random.Random(run_seed),  # noqa: S311
+            )
+        return stopping_policy.rounds
+
+    def __acquire_setup(self: "PlanService", config: PlanConfig) -> PlanSetup:
+        """Take the objects of a plan config that no other job uses, or build new ones.
+
+        :param config: The plan config.
+        :return: The objects of the plan.
+        """
+        key = config.get_key()
+        with self.__lock:
+            setups = self.__setups.get(key)
+            if setups:
+                self.__setups.move_to_end(key)
+                return setups.pop()
+        return PlanSetup(config)
+
+    def __release_setup(self: "PlanService", config: PlanConfig, setup: PlanSetup) -> None:
+        """Keep the objects of a plan config for the next job of the same config.
+
+        :param config: The plan config.
+        :param setup: The objects of the plan.
+        """
+        key = config.get_key()
+        with self.__lock:
+            self.__setups.setdefault(key, []).append(setup)
+            self.__setups.move_to_end(key)
+            while len(self.__setups) > CACHED_CONFIGS:
+                self.__setups.popitem(last=False)
+
+    def __load_result(self: "PlanService", result_key: str) -> CachedResult | None:
+        """Read a result from the result cache.
+
+        :param result_key: The key of the result.
+        :return: The result, or None, if it is not cached.
+        """
+        if self.__result_cache is None:
+            return None
+        with self.__lock:
+            return self.__result_cache.load(result_key)
+
+    def __store_result(self: "PlanService", result_key: str, result: CachedResult) -> None:
+        """Write a result to the result cache.
+
+        :param result_key: The key of the result.
+        :param result: The result.
+        """
+        if self.__result_cache is not None:
+            with self.__lock:
+                self.__result_cache.store(result_key, result)
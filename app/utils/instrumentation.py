@@ -0,0 +1,154 @@
+"""A module that contains the opt-in instrumentation of a run.
+
+The instrumentation measures the time of the phases of a run and counts the events of the
+assignment, e.g. restarts and rejected candidates. It is disabled unless it is enabled for a run.
+While it is disabled, the hot paths only check the active instrumentation for None and the phases
+return a shared context manager that does nothing.
+"""
+
+import contextlib
+import json
+import time
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+
+active: "Instrumentation | None" = None
+
+_NO_PHASE = contextlib.nullcontext()
+
+
+class Distribution:
+    """The number, sum, minimum and maximum of observed values."""
+
+    def __init__(self: "Distribution") -> None:
+        """Create an empty distribution."""
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+
+    def add(self: "Distribution", value: float) -> None:
+        """Add an observed value.
+
+        :param value: The value.
+        """
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def to_dict(self: "Distribution") -> dict:
+        """Get the summary of the distribution.
+
+        :return: The number, sum, mean, minimum and maximum of the values.
+        """
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+
+class Instrumentation:
+    """The phase timers, counters and observed values of a run."""
+
+    def __init__(self: "Instrumentation") -> None:
+        """Create an instrumentation without measurements."""
+        self.__phases: dict[str, Distribution] = {}
+        self.__observations: dict[str, Distribution] = {}
+        self.__counters: Counter[str] = Counter()
+
+    @contextlib.contextmanager
+    def phase(self: "Instrumentation", name: str) -> Iterator[None]:
+        """Measure the time of a phase. A phase that runs repeatedly is summarized over all runs.
+
+        :param name: The name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.__phases.setdefault(name, Distribution()).add(time.perf_counter() - start)
+
+    def count(self: "Instrumentation", name: str, n: int = 1) -> None:
+        """Increase a counter.
+
+        :param name: The name of the counter.
+        :param n: The increment.
+        """
+        self.__counters[name] += n
+
+    def observe(self: "Instrumentation", name: str, value: float) -> None:
+        """Add a value to a distribution, e.g. the rotations of a queue per call.
+
+        :param name: The name of the distribution.
+        :param value: The value.
+        """
+        self.__observations.setdefault(name, Distribution()).add(value)
+
+    def report(self: "Instrumentation") -> dict:
+        """Get all measurements.
+
+        :return: The seconds of the phases, the counters and the observed distributions.
+        """
+        return {
+            "phases": {name: phase.to_dict() for name, phase in self.__phases.items()},
+            "counters": dict(sorted(self.__counters.items())),
+            "observations": {
+                name: observation.to_dict() for name, observation in self.__observations.items()
+            },
+        }
+
+    def write_report(self: "Instrumentation", path: Path, **info: object) -> None:
+        """Write the measurements to a JSON file.
+
+        :param path: The path of the file.
+        :param info: Further information about the run, which is added to the report.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({**info, **self.report()}, indent=4, default=str))
+
+
+def enable() -> Instrumentation:
+    """Enable the instrumentation with a new set of measurements.
+
+    :return: The active instrumentation.
+    """
+    global active  # noqa: PLW0603
+    active = Instrumentation()
+    return active
+
+
+def disable() -> None:
+    """Disable the instrumentation."""
+    global active  # noqa: PLW0603
+    active = None
+
+
+@contextlib.contextmanager
+def paused() -> Iterator[None]:
+    """Stop counting and observing events for a while, e.g. while a plan is created again.
+
+    Phases that were started before keep measuring their time.
+    """
+    global active  # noqa: PLW0603
+    previous = active
+    active = None
+    try:
+        yield
+    finally:
+        active = previous
+
+
+def phase(name: str) -> contextlib.AbstractContextManager:
+    """Measure the time of a phase, if the instrumentation is enabled.
+
+    :param name: The name of the phase.
+    :return: The context manager of the phase.
+    """
+    if active is None:
+        return _NO_PHASE
+    return active.phase(name)
@@ -1,15 +1,24 @@
 """A that module contains logic to convert the list of masses into a PDF file via PyLaTeX."""
 
+import functools
+from collections.abc import Iterator
 from datetime import datetime
+from pathlib import Path
 
 from babel.dates import format_date, format_time
 from dates.calendar import Calendar
-from dates.day import Day
 from plan_info.plan_info import WelcomeText
 from pylatex import Command, Document, MultiColumn, NewPage, NoEscape, Tabular
-from pylatex.utils import bold
+from pylatex.utils import bold, escape_latex
 
 TABLE_WIDTH = 4
+TABLE_PLACEHOLDER = "%PLAN_TABLE%"
+ROW_END = r"\\"
+EMPTY_ROW = "&" * (TABLE_WIDTH - 1) + ROW_END
+HLINE = r"\hline"
+PLAN_FILEPATH = "output/plan"
+
+escape_server_name = functools.lru_cache(maxsize=4096)(escape_latex)
 
 
 class Plan(Document):
@@ -44,6 +53,7 @@ class Plan(Document):
                 )
             )
         self.append(NoEscape(r"\maketitle"))
+        self.__calendar = None
 
     def add_welcome_text(self: "Plan", welcome_text: WelcomeText) -> None:
         """Add the welcome text to the plan.
@@ -55,99 +65,130 @@ class Plan(Document):
             self.append(f"{body}\n\n")
         self.append(welcome_text.dismissal)
 
+    def add_table(self: "Plan", calendar: Calendar) -> None:
+        """Add the table with the masses and servers of a calendar to the plan.
+
+        The table only contains a placeholder. Its rows are rendered when the file is written.
+
+        :param calendar: The calendar with the assigned servers.
+        """
+        self.__calendar = calendar
+        patched_tabular = Tabular("llll", row_height=1.4)
+        patched_tabular._latex_name = "supertabular"  # noqa: SLF001
+        patched_tabular.append(NoEscape(TABLE_PLACEHOLDER))
+        self.append(patched_tabular)
+
+    def generate_tex(self: "Plan", filepath: str) -> None:
+        """Write the plan to a .tex file.
+
+        The document around the table is generated by PyLaTeX. The rows of the table are written
+        one by one, so they are never held in memory together.
+
+        :param filepath: The path of the file without the .tex extension.
+        """
+        if self.__calendar is None:
+            super().generate_tex(filepath)
+            return
+
+        head, tail = self.dumps().split(TABLE_PLACEHOLDER)
+        with Path(filepath + ".tex").open("w", encoding="utf-8") as file:
+            file.write(head)
+            separator = ""
+            for row in render_rows(self.__calendar):
+                file.write(separator + row)
+                separator = "%\n"
+            file.write(tail)
+
 
 def generate_pdf(
-        days: list, start_date: datetime.date, end_date: datetime.date, welcome_text: WelcomeText
+    calendar: Calendar,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    welcome_text: WelcomeText,
+    filepath: str = PLAN_FILEPATH,
 ) -> None:
     """Generate a PDF of the plan.
 
     First the welcome text is added. Then the table with all masses and servers is added. The
     tabular object is changed to a super tabular, which allows spanning over multiple pages.
-    :param days: The calendar days.
+    :param calendar: The calendar with the assigned servers.
     :param start_date: The start date of the plan.
     :param end_date: The end date of the plan.
     :param welcome_text: The welcome text.
+    :param filepath: The path of the PDF without the .pdf extension.
     """
     doc = Plan(start_date, end_date)
     doc.add_welcome_text(welcome_text)
 
     doc.append(NewPage())
+    doc.add_table(calendar)
 
-    patched_tabular = Tabular("llll", row_height=1.4)
-    patched_tabular._latex_name = "supertabular"  # noqa: SLF001
-    with doc.create(patched_tabular) as table:
-        fill_document(table, days)
-
-    doc.generate_pdf("output/plan", clean_tex=False)
+    doc.generate_pdf(filepath, clean_tex=False)
 
 
-def fill_document(table: Tabular, calendar: Calendar) -> None:
-    """Add the masses to the document.
+@functools.lru_cache(maxsize=1024)
+def format_day_date(date: datetime.date) -> str:
+    """Format the date of a day for the first column of the table.
 
-    :param table: The table containing the masses and servers.
-    :param days: The calendar days.
+    :param date: The date.
+    :return: The escaped date, e.g. "So. 04.01.".
     """
-    for day in calendar.days:
-        conditional_hline_start(day, table)
-        table_row = (format_date(day.date, "EEE dd.LL.", locale="de"),)
-        for i, mass in enumerate(sorted(day.masses, key=lambda x: x.event.time)):
-            if i != 0:
-                table.add_empty_row()
-
-            mass.servers = sorted(mass.servers, key=lambda x: x.name)
+    return escape_latex(format_date(date, "EEE dd.LL.", locale="de"))
 
-            if i == 0:
-                table_row += (format_time(mass.event.time, "H.mm", locale="de") + " Uhr",)
-            else:
-                table_row = ("", format_time(mass.event.time, "H.mm", locale="de") + " Uhr")
 
-            if mass.event.comment is not None:
-                table_row += (MultiColumn(2, align="l", data=bold(f"({mass.event.comment})")),)
-                table.add_row(table_row)
-                table_row = ("", "")
-
-            for altar_server in mass.servers:
-                table_row += (altar_server,)
-                table_row = conditional_write(table, table_row)
-            conditional_write(table, table_row, final=True)
+@functools.lru_cache(maxsize=1024)
+def format_mass_time(time: datetime.time) -> str:
+    """Format the time of a mass for the second column of the table.
 
-        conditional_hline_end(day, table)
-        table.add_empty_row()
+    :param time: The time.
+    :return: The escaped time, e.g. "9.30 Uhr".
+    """
+    return escape_latex(format_time(time, "H.mm", locale="de") + " Uhr")
 
 
-def conditional_hline_start(day: Day, table: Tabular) -> None:
-    """Add a horizontal line and the name of the day to the table if it is a day with a name.
+def format_bold_cell(size: int, align: str, text: str) -> str:
+    """Format a bold cell that spans multiple columns.
 
-    :param day: The calendar day.
-    :param table: The tabular object.
+    :param size: The number of columns.
+    :param align: The alignment of the text.
+    :param text: The text, which is escaped.
+    :return: The cell.
     """
-    if day.event_day.name is not None:
-        table.add_hline()
-        table.add_row((MultiColumn(TABLE_WIDTH, align="c", data=bold(day.event_day.name)),))
+    return MultiColumn(size, align=align, data=bold(text)).dumps()
 
 
-def conditional_hline_end(day: Day, table: Tabular) -> None:
-    """Add a horizontal line to the table if it is a special day with a name.
+def render_rows(calendar: Calendar) -> Iterator[str]:
+    """Render the rows of the table of the masses one by one.
 
-    :param day: The calendar day.
-    :param table: The tabular object
+    The servers of each mass are listed by name, two per row.
+    :param calendar: The calendar with the assigned servers.
+    :return: The rows in LaTeX syntax.
     """
-    if day.event_day.name is not None:
-        table.add_hline()
-
+    for day in calendar.days:
+        if day.event_day.name is not None:
+            yield HLINE
+            yield format_bold_cell(TABLE_WIDTH, "c", day.event_day.name) + ROW_END
 
-def conditional_write(table: Tabular, table_row: tuple, final: bool = False) -> tuple:
-    """Write a complete row to the tabular object.
+        row = [format_day_date(day.date)]
+        for i, mass in enumerate(sorted(day.masses, key=lambda x: x.event.time)):
+            if i != 0:
+                yield EMPTY_ROW
+                row = [""]
+            row.append(format_mass_time(mass.event.time))
 
-    :param final: Indicates if the row is the last row of the mass and should be written no matter the length.
-    :param table: The tabular object.
-    :param table_row: The row to write.
-    :return: A new row, if the row was written or, otherwise, the same row.
-    """
-    if len(table_row) == TABLE_WIDTH:
-        table.add_row(table_row)
-        table_row = ("", "")
-    elif len(table_row) == TABLE_WIDTH - 1 and final:
-        table_row += ("",)
-        table.add_row(table_row)
-    return table_row
+            if mass.event.comment is not None:
+                row.append(format_bold_cell(2, "l", f"({mass.event.comment})"))
+                yield "&".join(row) + ROW_END
+                row = ["", ""]
+
+            for altar_server in sorted(mass.servers, key=lambda x: x.name):
+                row.append(escape_server_name(altar_server.name))
+                if len(row) == TABLE_WIDTH:
+                    yield "&".join(row) + ROW_END
+                    row = ["", ""]
+            if len(row) == TABLE_WIDTH - 1:
+                yield "&".join(row) + "&" + ROW_END
+
+        if day.event_day.name is not None:
+            yield HLINE
+        yield EMPTY_ROW
@@ -0,0 +1 @@
+"""Benchmarks of the altar server plan creator."""
@@ -0,0 +1,103 @@
+"""Compare the rounds per second of the round loop and of the batched construction.
+
+Before timing, the plans of a batch are checked against the plans that assign_servers creates from
+the same shuffles of the scheduling units. Run from the repository root:
+
+    PYTHONPATH=app python benchmarks/batch_construction.py --servers 60 --rounds 3000
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+from altar_servers.server_handler import _assign_altar_servers
+from optimization.batch_construction import BatchConstruction
+from optimization.plan_setup import PlanSetup
+from optimization.rounds import run_batched_rounds, run_rounds
+from optimization.snapshot import PlanSnapshot
+from optimization.stopping import StoppingPolicy
+from plan_info.plan_info import OptimizerSettings
+from utils.exceptions import BadSituationError
+from workload import generate_workload
+
+
+def check_parity(setup: PlanSetup, batch_construction: BatchConstruction, n_plans: int) -> None:
+    """Check that a batch contains the plans that assign_servers creates from the same shuffles.
+
+    :param setup: The objects of the plan.
+    :param batch_construction: The batch construction of the same objects.
+    :param n_plans: The number of shuffles.
+    """
+    expected = []
+    permutations = []
+    for _ in range(n_plans):
+        setup.queue_manager.clear_state()
+        permutations.append([unit.index for unit in setup.altar_servers.scheduling_units])
+        try:
+            _assign_altar_servers(setup.calendar, setup.queue_manager, setup.altar_servers)
+            expected.append(PlanSnapshot.take(setup.calendar, setup.altar_servers))
+        except BadSituationError:
+            pass
+        setup.calendar.clear()
+    setup.queue_manager.clear_state()
+    batch = batch_construction.create_plans_from_orders(np.array(permutations))
+    if [batch.snapshot(i) for i in range(len(batch))] != expected:
+        msg = "The batch differs from the plans of assign_servers"
+        raise AssertionError(msg)
+
+
+def main() -> None:
+    """Run both strategies on the same synthetic workload and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=60)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--rounds", type=int, default=3000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    setup = PlanSetup(generate_workload(n_servers=arguments.servers, n_days=arguments.days))
+    batch_construction = BatchConstruction(
+        setup.calendar, setup.altar_servers, setup.event_calendar
+    )
+    random.seed(arguments.seed)
+    check_parity(setup, batch_construction, 50)
+
+    random.seed(arguments.seed)
+    start = time.perf_counter()
+    score, _ = run_rounds(
+        setup.calendar,
+        setup.queue_manager,
+        setup.altar_servers,
+        setup.event_calendar,
+        StoppingPolicy(OptimizerSettings(max_rounds=arguments.rounds)),
+    )
+    results = {
+        "rounds": {
+            "score": score,
+            "rounds_per_second": arguments.rounds / (time.perf_counter() - start),
+        }
+    }
+
+    for batch_size in arguments.batch_sizes:
+        random.seed(arguments.seed)
+        start = time.perf_counter()
+        score, _ = run_batched_rounds(
+            batch_construction,
+            StoppingPolicy(OptimizerSettings(max_rounds=arguments.rounds)),
+            batch_size,
+        )
+        results[f"batch_{batch_size}"] = {
+            "score": score,
+            "rounds_per_second": arguments.rounds / (time.perf_counter() - start),
+        }
+
+    print(  # noqa: T201
+        json.dumps({"servers": arguments.servers, "days": arguments.days, **results}, indent=4)
+    )
+
+
+if __name__ == "__main__":
+    main()
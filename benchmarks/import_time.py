@@ -0,0 +1,100 @@
+"""Measure the start-up time of main.py and check it against a budget.
+
+The import times are taken from python -X importtime in fresh interpreters. The fast paths of
+main.py, which recompile an unchanged plan or print the help, must not import any of the heavy
+modules and must import within the budget. Run from the repository root:
+
+    PYTHONPATH=app python benchmarks/import_time.py --budget-ms 100
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app"
+HEAVY_MODULES = ("pydantic", "tqdm", "pylatex", "babel", "dateutil", "numpy")
+
+
+def run_python(*arguments: str) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter with the app on the path.
+
+    :param arguments: The arguments of the interpreter.
+    :return: The finished process.
+    """
+    environment = {**os.environ, "PYTHONPATH": str(APP_PATH)}
+    return subprocess.run(  # noqa: S603
+        [sys.executable, *arguments], env=environment, capture_output=True, text=True, check=True
+    )
+
+
+def import_time(module: str, repeats: int) -> float:
+    """Get the cumulative import time of a module in milliseconds, the minimum of several runs.
+
+    :param module: The name of the module.
+    :param repeats: The number of runs.
+    :return: The import time.
+    """
+    times = []
+    for _ in range(repeats):
+        output = run_python("-X", "importtime", "-c", f"import {module}").stderr
+        for line in output.splitlines():
+            _, _, cumulative, name = (part.strip() for part in line.replace(":", "|").split("|"))
+            if name == module:
+                times.append(int(cumulative) / 1000)
+    return min(times)
+
+
+def heavy_modules(module: str) -> list[str]:
+    """Get the heavy modules that are loaded by importing a module.
+
+    :param module: The name of the module.
+    :return: The names of the loaded heavy modules.
+    """
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES} if m in sys.modules))"
+    return run_python("-c", code).stdout.split()
+
+
+def command_time(repeats: int, *arguments: str) -> float:
+    """Get the wall-clock time of a fresh interpreter in milliseconds, the minimum of several runs.
+
+    :param repeats: The number of runs.
+    :param arguments: The arguments of the interpreter.
+    :return: The time.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run_python(*arguments)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def main() -> None:
+    """Measure the start-up and print the results as JSON. Exit with an error above the budget."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    arguments = parser.parse_args()
+
+    results = {
+        "import_ms": {
+            module: import_time(module, arguments.repeats) for module in ("main", "plan_run")
+        },
+        "heavy_modules": {module: heavy_modules(module) for module in ("main", "plan_run")},
+        "interpreter_ms": command_time(arguments.repeats, "-c", "pass"),
+        "help_ms": command_time(arguments.repeats, str(APP_PATH / "main.py"), "--help"),
+    }
+    print(json.dumps(results, indent=4))  # noqa: T201
+
+    if results["heavy_modules"]["main"]:
+        sys.exit(f"main imports heavy modules: {results['heavy_modules']['main']}")
+    if results["import_ms"]["main"] > arguments.budget_ms:
+        sys.exit(f"Importing main takes more than {arguments.budget_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Compare the streaming LaTeX renderer with the PyLaTeX object tree it replaces.
+
+The reference builds the table as a PyLaTeX object tree, like latex_handler did before. Both files
+are checked to be byte-identical before the times and the peak memory are compared. Run from the
+repository root:
+
+    PYTHONPATH=app python benchmarks/latex_rendering.py --days 3650
+    PYTHONPATH=app python benchmarks/latex_rendering.py --config config
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from altar_servers.server_handler import Backtracker, assign_servers
+from babel.dates import format_date, format_time
+from dates.calendar import Calendar
+from optimization.plan_setup import PlanConfig, PlanSetup
+from pylatex import MultiColumn, NewPage, Tabular
+from pylatex.utils import bold
+from utils.latex_handler import TABLE_WIDTH, Plan
+from workload import generate_workload
+
+
+def write_reference(setup: PlanSetup, filepath: str) -> None:
+    """Write the plan with the table built as a PyLaTeX object tree.
+
+    :param setup: The objects of the plan with the assigned servers.
+    :param filepath: The path of the file without the .tex extension.
+    """
+    plan_info = setup.plan_info
+    doc = Plan(plan_info.start_date, plan_info.end_date)
+    doc.add_welcome_text(plan_info.welcome_text)
+    doc.append(NewPage())
+    patched_tabular = Tabular("llll", row_height=1.4)
+    patched_tabular._latex_name = "supertabular"  # noqa: SLF001
+    with doc.create(patched_tabular) as table:
+        fill_table(table, setup.calendar)
+    doc.generate_tex(filepath)
+
+
+def fill_table(table: Tabular, calendar: Calendar) -> None:
+    """Add the rows of the masses to the table.
+
+    :param table: The table.
+    :param calendar: The calendar with the assigned servers.
+    """
+    for day in calendar.days:
+        if day.event_day.name is not None:
+            table.add_hline()
+            table.add_row((MultiColumn(TABLE_WIDTH, align="c", data=bold(day.event_day.name)),))
+        table_row = (format_date(day.date, "EEE dd.LL.", locale="de"),)
+        for i, mass in enumerate(sorted(day.masses, key=lambda x: x.event.time)):
+            if i != 0:
+                table.add_empty_row()
+            time_cell = format_time(mass.event.time, "H.mm", locale="de") + " Uhr"
+            table_row = (*table_row, time_cell) if i == 0 else ("", time_cell)
+            if mass.event.comment is not None:
+                table_row += (MultiColumn(2, align="l", data=bold(f"({mass.event.comment})")),)
+                table.add_row(table_row)
+                table_row = ("", "")
+            for altar_server in sorted(mass.servers, key=lambda x: x.name):
+                table_row += (altar_server,)
+                if len(table_row) == TABLE_WIDTH:
+                    table.add_row(table_row)
+                    table_row = ("", "")
+            if len(table_row) == TABLE_WIDTH - 1:
+                table.add_row((*table_row, ""))
+        if day.event_day.name is not None:
+            table.add_hline()
+        table.add_empty_row()
+
+
+def write_streaming(setup: PlanSetup, filepath: str) -> None:
+    """Write the plan with the streaming renderer.
+
+    :param setup: The objects of the plan with the assigned servers.
+    :param filepath: The path of the file without the .tex extension.
+    """
+    plan_info = setup.plan_info
+    doc = Plan(plan_info.start_date, plan_info.end_date)
+    doc.add_welcome_text(plan_info.welcome_text)
+    doc.append(NewPage())
+    doc.add_table(setup.calendar)
+    doc.generate_tex(filepath)
+
+
+def measure(write: callable, setup: PlanSetup, filepath: str) -> dict:
+    """Measure the time and the peak memory of writing a plan.
+
+    :param write: The function that writes the plan.
+    :param setup: The objects of the plan with the assigned servers.
+    :param filepath: The path of the file without the .tex extension.
+    :return: The seconds and the peak memory in bytes.
+    """
+    start = time.perf_counter()
+    write(setup, filepath)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    write(setup, filepath)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_memory": peak}
+
+
+def main() -> None:
+    """Render the same plan with both renderers and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", type=Path, help="Use the config files of this directory.")
+    parser.add_argument("--servers", type=int, default=60)
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    if arguments.config is not None:
+        setup = PlanSetup(PlanConfig.from_directory(arguments.config))
+    else:
+        setup = PlanSetup(generate_workload(n_servers=arguments.servers, n_days=arguments.days))
+    random.seed(arguments.seed)
+    assign_servers(setup.calendar, setup.queue_manager, setup.altar_servers, Backtracker())
+
+    with tempfile.TemporaryDirectory() as directory:
+        reference_path = str(Path(directory) / "reference")
+        streaming_path = str(Path(directory) / "streaming")
+        results = {
+            "pylatex": measure(write_reference, setup, reference_path),
+            "streaming": measure(write_streaming, setup, streaming_path),
+        }
+        if Path(reference_path + ".tex").read_bytes() != Path(streaming_path + ".tex").read_bytes():
+            msg = "The streaming renderer differs from the PyLaTeX object tree"
+            raise AssertionError(msg)
+
+    print(  # noqa: T201
+        json.dumps({"days": len(setup.calendar.days), **results}, indent=4)
+    )
+
+
+if __name__ == "__main__":
+    main()
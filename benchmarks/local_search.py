@@ -0,0 +1,94 @@
+"""Compare random restarts with a few restarts followed by the local search.
+
+Run from the repository root:
+
+    PYTHONPATH=app python benchmarks/local_search.py --servers 60 --rounds 5000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from optimization.local_search import LocalSearch
+from optimization.plan_setup import PlanSetup
+from optimization.rounds import run_rounds
+from optimization.stopping import StoppingPolicy
+from plan_info.plan_info import OptimizerSettings
+from workload import generate_workload
+
+
+def run_restarts(setup: PlanSetup, rounds: int) -> tuple:
+    """Create plans with random restarts only.
+
+    :param setup: The objects of the plan.
+    :param rounds: The number of rounds.
+    :return: The best score, its snapshot and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    score, snapshot = run_rounds(
+        setup.calendar,
+        setup.queue_manager,
+        setup.altar_servers,
+        setup.event_calendar,
+        StoppingPolicy(OptimizerSettings(max_rounds=rounds)),
+    )
+    return score, snapshot, time.perf_counter() - start
+
+
+def main() -> None:
+    """Run both strategies on the same synthetic workload and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=60)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--rounds", type=int, default=5000)
+    parser.add_argument("--construction-rounds", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    setup = PlanSetup(generate_workload(n_servers=arguments.servers, n_days=arguments.days))
+
+    random.seed(arguments.seed)
+    restart_score, _, restart_seconds = run_restarts(setup, arguments.rounds)
+
+    random.seed(arguments.seed)
+    construction_score, snapshot, construction_seconds = run_restarts(
+        setup, arguments.construction_rounds
+    )
+    start = time.perf_counter()
+    local_search = LocalSearch(setup.calendar, setup.altar_servers, setup.event_calendar, snapshot)
+    local_search_score = local_search.run(arguments.iterations, random.Random(arguments.seed))  # noqa: S311
+    local_search_seconds = time.perf_counter() - start
+
+    local_search.best_snapshot().restore(setup.calendar, setup.altar_servers)
+    recalculated_score = sum(setup.altar_servers.recalculate_statistics(setup.event_calendar))
+    if recalculated_score != local_search_score:
+        msg = f"Local search score {local_search_score} != recalculated {recalculated_score}"
+        raise AssertionError(msg)
+
+    print(  # noqa: T201
+        json.dumps(
+            {
+                "servers": arguments.servers,
+                "days": arguments.days,
+                "restarts": {
+                    "rounds": arguments.rounds,
+                    "score": restart_score,
+                    "seconds": restart_seconds,
+                },
+                "local_search": {
+                    "construction_rounds": arguments.construction_rounds,
+                    "iterations": arguments.iterations,
+                    "construction_score": construction_score,
+                    "score": local_search_score,
+                    "seconds": construction_seconds + local_search_seconds,
+                },
+            },
+            indent=4,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
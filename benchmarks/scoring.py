@@ -0,0 +1,114 @@
+"""Compare the scoring backends on plans of synthetic rosters of different sizes.
+
+Run from the repository root:
+
+    PYTHONPATH=app python benchmarks/scoring.py --servers 50 200 1000 --plans 20
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+
+from altar_servers.server_handler import Backtracker, assign_servers
+from optimization.plan_setup import PlanSetup
+from optimization.snapshot import PlanSnapshot
+from optimization.vectorized_scoring import VectorizedScoring
+from workload import generate_workload
+
+
+def create_snapshots(setup: PlanSetup, n_plans: int) -> list[PlanSnapshot]:
+    """Create plans and take a snapshot of each.
+
+    :param setup: The objects of the plan.
+    :param n_plans: The number of plans.
+    :return: The snapshots.
+    """
+    snapshots = []
+    backtracker = Backtracker()
+    for _ in range(n_plans):
+        assign_servers(setup.calendar, setup.queue_manager, setup.altar_servers, backtracker)
+        snapshots.append(PlanSnapshot.take(setup.calendar, setup.altar_servers))
+        setup.calendar.clear()
+        setup.queue_manager.clear_state()
+    return snapshots
+
+
+def check_parity(expected: list[float], actual: list[float]) -> None:
+    """Check that the statistics of two backends are equal up to the float rounding.
+
+    :param expected: The statistics of AltarServers.calculate_statistics.
+    :param actual: The statistics of the vectorized scoring.
+    """
+    if len(expected) != len(actual) or not all(
+        math.isclose(x, y, rel_tol=1e-12, abs_tol=1e-12)
+        for x, y in zip(expected, actual, strict=True)
+    ):
+        msg = f"Statistics differ: {expected} != {actual}"
+        raise AssertionError(msg)
+
+
+def benchmark(n_servers: int, n_plans: int, seed: int) -> dict:
+    """Score the same plans with every backend.
+
+    :param n_servers: The number of servers.
+    :param n_plans: The number of plans.
+    :param seed: The seed of the random number generator.
+    :return: The seconds per plan of each backend.
+    """
+    setup = PlanSetup(generate_workload(n_servers=n_servers, seed=seed))
+    random.seed(seed)
+    snapshots = create_snapshots(setup, n_plans)
+    scoring = VectorizedScoring(setup.calendar, setup.altar_servers, setup.event_calendar)
+
+    seconds = {"running": 0.0, "recalculated": 0.0, "numpy": 0.0}
+    for snapshot in snapshots:
+        snapshot.restore(setup.calendar, setup.altar_servers)
+
+        start = time.perf_counter()
+        running = setup.altar_servers.calculate_statistics(setup.event_calendar)
+        seconds["running"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        recalculated = setup.altar_servers.recalculate_statistics(setup.event_calendar)
+        seconds["recalculated"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = scoring.calculate_statistics(snapshot)
+        seconds["numpy"] += time.perf_counter() - start
+
+        check_parity(running, recalculated)
+        check_parity(running, vectorized)
+
+    start = time.perf_counter()
+    scores = scoring.scores(snapshots)
+    seconds["numpy_batch"] = time.perf_counter() - start
+    for snapshot, score in zip(snapshots, scores.tolist(), strict=True):
+        snapshot.restore(setup.calendar, setup.altar_servers)
+        check_parity([sum(setup.altar_servers.calculate_statistics(setup.event_calendar))], [score])
+
+    return {
+        "servers": n_servers,
+        "masses": len(snapshots[0].offsets) - 1,
+        "plans": n_plans,
+        "seconds_per_plan": {backend: value / n_plans for backend, value in seconds.items()},
+    }
+
+
+def main() -> None:
+    """Run the benchmark for every roster size and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    results = [
+        benchmark(n_servers, arguments.plans, arguments.seed) for n_servers in arguments.servers
+    ]
+    print(json.dumps(results, indent=4))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
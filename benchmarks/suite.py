@@ -0,0 +1,272 @@
+"""Measure the scheduling engine on a set of synthetic workloads and compare against a baseline.
+
+Every scenario varies one dimension of the workload generator against the small default plan.
+The results are written as JSON, so runs of different versions can be compared. Run from the
+repository root:
+
+    PYTHONPATH=app python benchmarks/suite.py --output suite.json
+    PYTHONPATH=app python benchmarks/suite.py --scenarios small large --baseline suite.json
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from altar_servers.server_handler import Backtracker, _assign_altar_servers, assign_servers
+from dates.date_handler import create_calendar
+from optimization.plan_setup import PlanSetup
+from optimization.snapshot import PlanSnapshot
+from optimization.vectorized_scoring import VectorizedScoring
+from utils.exceptions import BadSituationError
+from utils.latex_handler import Plan
+from workload import generate_workload
+
+SCENARIOS = {
+    "small": {},
+    "siblings": {"sibling_fraction": 0.6},
+    "vacations": {"vacation_density": 2.0},
+    "locations": {"n_locations": 3},
+    "weekday_events": {"n_weekday_events": 10},
+    "special_events": {"n_special_events": 24},
+    "long_horizon": {"n_days": 730},
+    "large": {"n_servers": 300, "n_days": 365, "n_locations": 2, "n_special_events": 12},
+}
+SCORED_PLANS = 20
+
+
+def measure_rounds(setup: PlanSetup, n_rounds: int) -> dict:
+    """Measure the rounds of assign_servers with restarts from scratch.
+
+    Every attempt of a round either completes the plan or ends with a BadSituationError, after
+    which assign_servers starts the plan again.
+
+    :param setup: The objects of the plan.
+    :param n_rounds: The number of completed plans.
+    :return: The rounds per second and the share of attempts that were restarted.
+    """
+    attempts = 0
+    restarts = 0
+    start = time.perf_counter()
+    for _ in range(n_rounds):
+        while True:
+            attempts += 1
+            try:
+                _assign_altar_servers(setup.calendar, setup.queue_manager, setup.altar_servers)
+            except BadSituationError:
+                restarts += 1
+                setup.calendar.clear()
+                setup.queue_manager.clear_state()
+                continue
+            break
+        setup.calendar.clear()
+        setup.queue_manager.clear_state()
+    seconds = time.perf_counter() - start
+    return {"rounds_per_second": n_rounds / seconds, "restart_rate": restarts / attempts}
+
+
+def measure_backtracking(setup: PlanSetup, n_rounds: int) -> dict:
+    """Measure the rounds of assign_servers with backtracking.
+
+    :param setup: The objects of the plan.
+    :param n_rounds: The number of completed plans.
+    :return: The rounds per second and the rolled back and restarted plans per round.
+    """
+    backtracker = Backtracker()
+    start = time.perf_counter()
+    for _ in range(n_rounds):
+        assign_servers(setup.calendar, setup.queue_manager, setup.altar_servers, backtracker)
+        setup.calendar.clear()
+        setup.queue_manager.clear_state()
+    seconds = time.perf_counter() - start
+    return {
+        "rounds_per_second": n_rounds / seconds,
+        "avoided_restarts_per_round": backtracker.avoided_restarts / n_rounds,
+        "full_restarts_per_round": backtracker.full_restarts / n_rounds,
+    }
+
+
+def measure_scoring(setup: PlanSetup, n_plans: int) -> dict:
+    """Measure the scoring of the same plans with every backend.
+
+    :param setup: The objects of the plan.
+    :param n_plans: The number of plans.
+    :return: The seconds per plan of each backend.
+    """
+    snapshots = []
+    for _ in range(n_plans):
+        assign_servers(setup.calendar, setup.queue_manager, setup.altar_servers, Backtracker())
+        snapshots.append(PlanSnapshot.take(setup.calendar, setup.altar_servers))
+        setup.calendar.clear()
+        setup.queue_manager.clear_state()
+
+    seconds = {"running": 0.0, "recalculated": 0.0}
+    for snapshot in snapshots:
+        snapshot.restore(setup.calendar, setup.altar_servers)
+        start = time.perf_counter()
+        setup.altar_servers.calculate_statistics(setup.event_calendar)
+        seconds["running"] += time.perf_counter() - start
+        start = time.perf_counter()
+        setup.altar_servers.recalculate_statistics(setup.event_calendar)
+        seconds["recalculated"] += time.perf_counter() - start
+
+    scoring = VectorizedScoring(setup.calendar, setup.altar_servers, setup.event_calendar)
+    start = time.perf_counter()
+    scoring.scores(snapshots)
+    seconds["numpy_batch"] = time.perf_counter() - start
+    return {backend: value / n_plans for backend, value in seconds.items()}
+
+
+def measure_rendering(setup: PlanSetup, *, pdf: bool) -> dict:
+    """Measure the rendering of the plan that is currently assigned to the calendar.
+
+    :param setup: The objects of the plan with the assigned servers.
+    :param pdf: If True, the PDF is compiled as well.
+    :return: The seconds of the .tex file and of the PDF, which is None without a compiler.
+    """
+    plan_info = setup.plan_info
+    with tempfile.TemporaryDirectory() as directory:
+        doc = Plan(plan_info.start_date, plan_info.end_date)
+        doc.add_welcome_text(plan_info.welcome_text)
+        doc.add_table(setup.calendar)
+        filepath = str(Path(directory) / "plan")
+
+        start = time.perf_counter()
+        doc.generate_tex(filepath)
+        tex_seconds = time.perf_counter() - start
+
+        pdf_seconds = None
+        if pdf and (shutil.which("latexmk") or shutil.which("pdflatex")):
+            start = time.perf_counter()
+            doc.generate_pdf(filepath, clean_tex=False)
+            pdf_seconds = time.perf_counter() - start
+    return {"tex_seconds": tex_seconds, "pdf_seconds": pdf_seconds}
+
+
+def run_scenario(parameters: dict, n_rounds: int, seed: int, *, pdf: bool) -> dict:
+    """Run all measurements on the workload of a scenario.
+
+    :param parameters: The parameters of the workload generator.
+    :param n_rounds: The number of rounds of each strategy.
+    :param seed: The seed of the workload and of the rounds.
+    :param pdf: If True, the PDF is compiled as well.
+    :return: The size of the workload and the results of the measurements.
+    """
+    config = generate_workload(seed=seed, **parameters)
+
+    start = time.perf_counter()
+    setup = PlanSetup(config)
+    setup_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    create_calendar(setup.plan_info.start_date, setup.plan_info.end_date, setup.event_calendar)
+    calendar_seconds = time.perf_counter() - start
+
+    random.seed(seed)
+    results = {
+        "parameters": parameters,
+        "servers": len(setup.altar_servers.altar_servers),
+        "days": len(setup.calendar.days),
+        "masses": sum(len(day.masses) for day in setup.calendar.days),
+        "setup_seconds": setup_seconds,
+        "calendar_seconds": calendar_seconds,
+        "restarts": measure_rounds(setup, n_rounds),
+        "backtracking": measure_backtracking(setup, n_rounds),
+        "scoring_seconds_per_plan": measure_scoring(setup, min(n_rounds, SCORED_PLANS)),
+    }
+    assign_servers(setup.calendar, setup.queue_manager, setup.altar_servers, Backtracker())
+    results["rendering"] = measure_rendering(setup, pdf=pdf)
+    return results
+
+
+def get_revision() -> str | None:
+    """Get the git revision of the repository.
+
+    :return: The hash of the commit, or None, outside of a git repository.
+    """
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "HEAD"],  # noqa: S607
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return process.stdout.strip()
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    """Flatten the numbers of nested results into dotted keys.
+
+    :param results: The results.
+    :param prefix: The key of the results within their parent.
+    :return: The numbers by their dotted keys.
+    """
+    numbers = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            numbers.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            numbers[f"{prefix}{key}"] = value
+    return numbers
+
+
+def compare(results: dict, baseline: dict) -> dict[str, float]:
+    """Compare the results of the scenarios with those of a baseline.
+
+    :param results: The results of this run.
+    :param baseline: The results of the baseline run.
+    :return: The ratios of this run to the baseline by their dotted keys.
+    """
+    current = flatten(results["scenarios"])
+    previous = flatten(baseline["scenarios"])
+    return {
+        key: value / previous[key]
+        for key, value in current.items()
+        if key in previous and previous[key] and ".parameters." not in f".{key}"
+    }
+
+
+def main() -> None:
+    """Run the selected scenarios and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-pdf", action="store_true", help="Do not compile the PDF.")
+    parser.add_argument("--output", type=Path, help="Write the results to this file.")
+    parser.add_argument("--baseline", type=Path, help="Compare the results with this file.")
+    arguments = parser.parse_args()
+
+    results = {
+        "revision": get_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(tz=datetime.UTC).isoformat(),
+        "rounds": arguments.rounds,
+        "seed": arguments.seed,
+        "scenarios": {
+            name: run_scenario(
+                SCENARIOS[name], arguments.rounds, arguments.seed, pdf=not arguments.no_pdf
+            )
+            for name in arguments.scenarios
+        },
+    }
+    if arguments.baseline is not None:
+        results["ratios_to_baseline"] = compare(results, json.loads(arguments.baseline.read_text()))
+
+    output = json.dumps(results, indent=4)
+    if arguments.output is not None:
+        arguments.output.write_text(output)
+    print(output)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
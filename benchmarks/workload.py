@@ -0,0 +1,129 @@
+"""A module that generates synthetic plan configs for the benchmarks."""
+
+import datetime
+import json
+import random
+
+from optimization.plan_setup import PlanConfig
+
+START_DATE = datetime.date(2026, 1, 1)
+WEEKDAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+WEEKDAY_EVENTS = (
+    (6, "sunday_morning", 4, "09:30:00"),
+    (6, "sunday_evening", 2, "18:00:00"),
+    (5, "saturday", 2, "19:00:00"),
+    (2, "wednesday", 2, "08:00:00"),
+    (4, "friday", 2, "18:30:00"),
+    (6, "sunday_late", 3, "11:00:00"),
+    (1, "tuesday", 2, "08:00:00"),
+    (3, "thursday", 2, "19:00:00"),
+    (0, "monday", 2, "08:00:00"),
+    (5, "saturday_morning", 2, "08:00:00"),
+)
+
+
+def generate_workload(  # noqa: PLR0913
+    n_servers: int = 60,
+    sibling_fraction: float = 0.2,
+    vacation_density: float = 0.5,
+    n_days: int = 180,
+    seed: int = 0,
+    *,
+    n_locations: int = 1,
+    n_weekday_events: int = 4,
+    n_special_events: int = 0,
+) -> PlanConfig:
+    """Generate a plan config with a weekly mass schedule and random servers.
+
+    With more than one location, the weekday events take turns between the locations, the first
+    one being the main church. Every server serves in the main church and in each other location
+    with a probability of one half. The special events are spread over the plan. Every other one
+    is a feast on a date of its own, which is treated as the Sunday morning mass, the others are
+    custom events with a comment on top of the masses of their date.
+
+    :param n_servers: The number of servers.
+    :param sibling_fraction: The fraction of servers that are in a pair of siblings.
+    :param vacation_density: The mean number of two-week vacations per server.
+    :param n_days: The number of days of the plan.
+    :param seed: The seed of the random number generator.
+    :param n_locations: The number of locations.
+    :param n_weekday_events: The number of weekly masses, at most 10.
+    :param n_special_events: The number of special events.
+    :return: The plan config.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    end_date = START_DATE + datetime.timedelta(days=n_days - 1)
+    names = [f"Ministrant {i:04d}" for i in range(n_servers)]
+
+    servers = [{"name": name} for name in names]
+    n_pairs = int(n_servers * sibling_fraction) // 2
+    for i in range(n_pairs):
+        servers[2 * i]["siblings"] = [names[2 * i + 1]]
+        servers[2 * i + 1]["siblings"] = [names[2 * i]]
+
+    for server in servers:
+        n_vacations = int(vacation_density) + (rng.random() < vacation_density % 1)
+        vacations = []
+        for _ in range(n_vacations):
+            start = START_DATE + datetime.timedelta(days=rng.randrange(n_days))
+            end = start + datetime.timedelta(days=13)
+            vacations.append({"start": start.isoformat(), "end": end.isoformat()})
+        server["vacations"] = vacations
+
+    locations = [f"Kirche {i + 1}" for i in range(n_locations)] if n_locations > 1 else []
+    if locations:
+        for server in servers:
+            server["locations"] = [locations[0]] + [
+                location
+                for location in locations[1:]
+                if rng.random() < 0.5  # noqa: PLR2004
+            ]
+
+    scale = max(1, n_servers // 60)
+    weekday = {}
+    for i, (day, event_id, n_event_servers, time) in enumerate(WEEKDAY_EVENTS[:n_weekday_events]):
+        event = {"id": event_id, "n_servers": n_event_servers * scale, "time": time}
+        if locations:
+            event["location"] = locations[i % len(locations)]
+        weekday.setdefault(str(day), {"id": WEEKDAY_NAMES[day], "events": []})["events"].append(
+            event
+        )
+
+    holy_masses = {"weekday": weekday, "easter": {}, "date": {}, "custom": {}}
+    for i in range(n_special_events):
+        date = START_DATE + datetime.timedelta(days=(i + 1) * n_days // (n_special_events + 1))
+        if i % 2 == 0:
+            holy_masses["date"][date.isoformat()] = {
+                "id": f"feast_{i}",
+                "name": f"Fest {i + 1}",
+                "events": [
+                    {
+                        "id": f"feast_{i}",
+                        "treated_as": "sunday_morning",
+                        "n_servers": 6 * scale,
+                        "time": "10:00:00",
+                    }
+                ],
+            }
+        else:
+            holy_masses["custom"][date.isoformat()] = {
+                "id": f"special_{i}",
+                "events": [
+                    {
+                        "id": f"special_{i}",
+                        "n_servers": 3 * scale,
+                        "time": "17:00:00",
+                        "comment": "Sondermesse",
+                    }
+                ],
+            }
+    plan_info = {
+        "start_date": START_DATE.isoformat(),
+        "end_date": end_date.isoformat(),
+        "welcome_text": {"greeting": "Hallo", "body": ["Text"], "dismissal": "Tschüss"},
+    }
+    return PlanConfig(
+        altar_servers=json.dumps({"altar_servers": servers}),
+        holy_masses=json.dumps(holy_masses),
+        plan_info=json.dumps(plan_info),
+    )
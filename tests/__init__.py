@@ -0,0 +1 @@
+"""Tests of the altar server plan creator."""
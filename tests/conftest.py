@@ -0,0 +1,24 @@
+"""Fixtures shared by the tests."""
+
+import pytest
+from optimization.plan_setup import PlanConfig, PlanSetup
+from workload import generate_workload
+
+
+@pytest.fixture
+def config() -> PlanConfig:
+    """Get a small synthetic plan config.
+
+    :return: The plan config.
+    """
+    return generate_workload(n_servers=30, n_days=60, seed=0)
+
+
+@pytest.fixture
+def setup(config: PlanConfig) -> PlanSetup:
+    """Get the objects of the small synthetic plan config.
+
+    :param config: The plan config.
+    :return: The plan setup.
+    """
+    return PlanSetup(config)
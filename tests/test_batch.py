@@ -0,0 +1,22 @@
+"""Tests of the manifests of the batch mode."""
+
+from typing import get_args
+
+import pytest
+from main import FORMATS
+from pydantic import ValidationError
+from service.batch import BatchManifest, Format
+
+
+def test_formats_match_the_command_line() -> None:
+    assert get_args(Format) == FORMATS
+
+
+def test_manifest_rejects_unknown_formats() -> None:
+    job = {"name": "st-peter", "config_directory": "config", "output_directory": "output"}
+    manifest = BatchManifest.model_validate({"jobs": [job | {"formats": ["json", "ics"]}]})
+    assert manifest.jobs[0].formats == ["json", "ics"]
+    assert BatchManifest.model_validate({"jobs": [job]}).jobs[0].formats == ["pdf"]
+
+    with pytest.raises(ValidationError):
+        BatchManifest.model_validate({"jobs": [job | {"formats": ["pdf", "docx"]}]})
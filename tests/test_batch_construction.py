@@ -0,0 +1,68 @@
+"""Tests of the batches of plans and their seeds."""
+
+from optimization.batch_construction import BatchConstruction
+from optimization.plan_setup import PlanSetup
+from optimization.round_history import RoundHistory, rebuild_best_plan
+from optimization.rounds import run_batched_rounds
+from optimization.stopping import StoppingPolicy
+from plan_info.plan_info import OptimizerSettings
+
+BATCH_SIZE = 32
+
+
+def create_batch_construction(setup: PlanSetup) -> BatchConstruction:
+    """Compile the batch construction of a plan setup.
+
+    :param setup: The plan setup.
+    :return: The batch construction.
+    """
+    return BatchConstruction(setup.calendar, setup.altar_servers, setup.event_calendar)
+
+
+def test_seed_creates_the_same_batch(setup: PlanSetup) -> None:
+    batch_construction = create_batch_construction(setup)
+    batches = [batch_construction.create_seeded_plans(BATCH_SIZE, 1234) for _ in range(2)]
+
+    assert batches[0].scores == batches[1].scores
+    assert [batches[0].snapshot(i) for i in range(len(batches[0]))] == [
+        batches[1].snapshot(i) for i in range(len(batches[1]))
+    ]
+
+
+def test_rebuild_best_plan_of_batches(setup: PlanSetup) -> None:
+    batch_construction = create_batch_construction(setup)
+    history = RoundHistory(run_seed=7)
+    stopping_policy = StoppingPolicy(OptimizerSettings(max_rounds=50))
+    best_score, snapshot = run_batched_rounds(
+        batch_construction, stopping_policy, BATCH_SIZE, history=history
+    )
+    assert snapshot is None
+    assert stopping_policy.rounds == 50
+    assert sum(n_rounds for n_rounds, _ in history.counted_rounds()) == 50
+    assert history.best()[1] == best_score
+
+    rebuild_best_plan(
+        history,
+        setup.calendar,
+        setup.queue_manager,
+        setup.altar_servers,
+        batch_construction=batch_construction,
+        batch_size=BATCH_SIZE,
+    )
+    assert sum(setup.altar_servers.calculate_statistics(setup.event_calendar)) == best_score
+
+
+def test_runs_with_the_same_seed_keep_the_same_plan(setup: PlanSetup) -> None:
+    batch_construction = create_batch_construction(setup)
+    results = []
+    for _ in range(2):
+        history = RoundHistory(run_seed=7)
+        run_batched_rounds(
+            batch_construction,
+            StoppingPolicy(OptimizerSettings(max_rounds=50)),
+            BATCH_SIZE,
+            history=history,
+        )
+        results.append((history.rounds, history.batch_rounds, history.best()))
+
+    assert results[0] == results[1]
@@ -0,0 +1,108 @@
+"""Tests of the exporters of the final plan."""
+
+import datetime
+import json
+from pathlib import Path
+
+import pytest
+from exporters.csv_exporter import export_csv
+from exporters.exported_plan import ExportedMass, ExportedPlan
+from exporters.ics_exporter import get_uid, render_calendar
+from exporters.json_exporter import export_json
+
+
+@pytest.fixture
+def plan() -> ExportedPlan:
+    """Get a plan with two masses.
+
+    :return: The plan.
+    """
+    return ExportedPlan(
+        start_date=datetime.date(2026, 1, 1),
+        end_date=datetime.date(2026, 1, 31),
+        masses=[
+            ExportedMass(
+                date=datetime.date(2026, 1, 4),
+                time=datetime.time(9, 30),
+                event_id="sunday_morning",
+                servers=["Anna", "Ben"],
+            ),
+            ExportedMass(
+                date=datetime.date(2026, 1, 6),
+                time=datetime.time(18),
+                event_id="epiphany",
+                day_name="Heilige Drei Könige",
+                comment="Sternsinger",
+                location="St. Peter, Nord",
+                servers=["Clara"],
+            ),
+        ],
+    )
+
+
+def test_export_json(plan: ExportedPlan, tmp_path: Path) -> None:
+    export_json(plan, tmp_path)
+
+    content = json.loads((tmp_path / "plan.json").read_text(encoding="utf-8"))
+    assert content == {
+        "start_date": "2026-01-01",
+        "end_date": "2026-01-31",
+        "masses": [
+            {
+                "date": "2026-01-04",
+                "time": "09:30:00",
+                "event_id": "sunday_morning",
+                "day_name": None,
+                "comment": None,
+                "location": None,
+                "servers": ["Anna", "Ben"],
+            },
+            {
+                "date": "2026-01-06",
+                "time": "18:00:00",
+                "event_id": "epiphany",
+                "day_name": "Heilige Drei Könige",
+                "comment": "Sternsinger",
+                "location": "St. Peter, Nord",
+                "servers": ["Clara"],
+            },
+        ],
+    }
+    assert ExportedPlan.model_validate(content) == plan
+
+
+def test_export_csv(plan: ExportedPlan, tmp_path: Path) -> None:
+    export_csv(plan, tmp_path)
+
+    assert (tmp_path / "plan.csv").read_text(encoding="utf-8").splitlines() == [
+        "date,time,event_id,day_name,comment,location,server",
+        "2026-01-04,09:30,sunday_morning,,,,Anna",
+        "2026-01-04,09:30,sunday_morning,,,,Ben",
+        '2026-01-06,18:00,epiphany,Heilige Drei Könige,Sternsinger,"St. Peter, Nord",Clara',
+    ]
+
+
+def test_ics_uids_do_not_depend_on_the_position(plan: ExportedPlan) -> None:
+    uids = [get_uid(mass) for mass in plan.masses]
+    assert uids == [
+        "20260104T093000-sunday_morning@mini-plan",
+        "20260106T180000-epiphany-St. Peter\\, Nord@mini-plan",
+    ]
+
+    calendar = render_calendar(plan, "Clara")
+    assert f"UID:{uids[1]}\r\n" in calendar
+    assert uids[0] not in calendar
+
+
+def test_ics_uids_escape_the_event_id() -> None:
+    mass = ExportedMass(
+        date=datetime.date(2026, 1, 4),
+        time=datetime.time(9, 30),
+        event_id="sunday;morning,\nlate",
+        servers=["Anna"],
+    )
+
+    assert get_uid(mass) == "20260104T093000-sunday\\;morning\\,\\nlate@mini-plan"
+    assert "\n" not in render_calendar(
+        ExportedPlan(start_date=mass.date, end_date=mass.date, masses=[mass])
+    ).replace("\r\n", "")
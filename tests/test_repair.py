@@ -0,0 +1,85 @@
+"""Tests of the repair of a published plan."""
+
+import json
+import random
+
+from altar_servers.server_handler import assign_servers
+from exporters.exported_plan import ExportedPlan
+from optimization.plan_setup import PlanConfig, PlanSetup
+from optimization.repair import ConfigChanges, repair_plan
+
+REMOVED_SERVER = "Ministrant 0020"
+
+
+def publish_plan(setup: PlanSetup) -> ExportedPlan:
+    """Create a plan and export it.
+
+    :param setup: The plan setup.
+    :return: The exported plan.
+    """
+    setup.queue_manager.start_round(0)
+    assign_servers(setup.calendar, setup.queue_manager, setup.altar_servers)
+    return ExportedPlan.from_calendar(
+        setup.calendar, setup.plan_info.start_date, setup.plan_info.end_date
+    )
+
+
+def remove_server(config: PlanConfig, name: str) -> PlanConfig:
+    """Remove a server from the roster of a plan config.
+
+    :param config: The plan config.
+    :param name: The name of the server.
+    :return: The changed plan config.
+    """
+    altar_servers = json.loads(config.altar_servers)
+    altar_servers["altar_servers"] = [
+        server for server in altar_servers["altar_servers"] if server["name"] != name
+    ]
+    return config.model_copy(update={"altar_servers": json.dumps(altar_servers)})
+
+
+def test_repair_keeps_untouched_masses(config: PlanConfig, setup: PlanSetup) -> None:
+    published = publish_plan(setup)
+    new_config = remove_server(config, REMOVED_SERVER)
+    new_setup = PlanSetup(new_config)
+
+    changes = repair_plan(published, new_setup, 200, random.Random(0))  # noqa: S311
+    repaired = ExportedPlan.from_calendar(
+        new_setup.calendar, new_setup.plan_info.start_date, new_setup.plan_info.end_date
+    )
+
+    affected = [mass for mass in published.masses if REMOVED_SERVER in mass.servers]
+    assert affected
+    assert len(changes) == len(affected)
+    for change in changes:
+        assert change.removed == {REMOVED_SERVER: "removed"}
+        assert len(change.added) == 1
+        assert change.missing == 0
+
+    assert len(repaired.masses) == len(published.masses)
+    for old_mass, new_mass in zip(published.masses, repaired.masses, strict=True):
+        if REMOVED_SERVER in old_mass.servers:
+            assert REMOVED_SERVER not in new_mass.servers
+            assert set(old_mass.servers) - {REMOVED_SERVER} <= set(new_mass.servers)
+        else:
+            assert new_mass == old_mass
+
+
+def test_repair_of_an_unchanged_config_keeps_the_plan(config: PlanConfig, setup: PlanSetup) -> None:
+    published = publish_plan(setup)
+    new_setup = PlanSetup(config)
+
+    assert repair_plan(published, new_setup, 200, random.Random(0)) == []  # noqa: S311
+    repaired = ExportedPlan.from_calendar(
+        new_setup.calendar, new_setup.plan_info.start_date, new_setup.plan_info.end_date
+    )
+    assert repaired == published
+
+
+def test_config_changes_between_configs(config: PlanConfig) -> None:
+    changes = ConfigChanges.between(config, remove_server(config, REMOVED_SERVER))
+
+    assert changes.removed_servers == [REMOVED_SERVER]
+    assert changes.added_servers == []
+    assert changes.changed_servers == []
+    assert changes.added_masses == changes.removed_masses == changes.changed_masses == 0
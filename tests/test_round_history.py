@@ -0,0 +1,78 @@
+"""Tests of the seeds of the rounds and the replay of the best plan."""
+
+from optimization.plan_setup import PlanConfig, PlanSetup
+from optimization.round_history import RoundHistory, rebuild_best_plan, replay_round
+from optimization.rounds import run_rounds
+from optimization.snapshot import PlanSnapshot
+from optimization.stopping import StoppingPolicy
+from plan_info.plan_info import OptimizerSettings
+from utils import instrumentation
+
+
+def test_replaying_a_seed_rebuilds_the_same_plan(config: PlanConfig) -> None:
+    snapshots = []
+    for _ in range(2):
+        setup = PlanSetup(config)
+        replay_round(1234, setup.calendar, setup.queue_manager, setup.altar_servers)
+        snapshots.append(PlanSnapshot.take(setup.calendar, setup.altar_servers))
+
+    assert snapshots[0] == snapshots[1]
+
+
+def test_rebuild_best_plan_restores_the_best_score(setup: PlanSetup) -> None:
+    history = RoundHistory(run_seed=7)
+    best_score, _ = run_rounds(
+        setup.calendar,
+        setup.queue_manager,
+        setup.altar_servers,
+        setup.event_calendar,
+        StoppingPolicy(OptimizerSettings(max_rounds=10)),
+        history=history,
+    )
+    assert len(history.rounds) == 10
+    assert history.best()[1] == best_score
+
+    rebuild_best_plan(history, setup.calendar, setup.queue_manager, setup.altar_servers)
+    assert sum(setup.altar_servers.calculate_statistics(setup.event_calendar)) == best_score
+
+
+def test_resumed_history_hands_out_the_unfinished_rounds_first() -> None:
+    history = RoundHistory(run_seed=7)
+    round_indices = [history.take_round() for _ in range(3)]
+    history.record(round_indices[0], 1.0)
+    history.record(round_indices[2], 2.0)
+
+    resumed = RoundHistory.model_validate_json(history.model_dump_json())
+    assert resumed.take_round() == round_indices[1]
+    assert resumed.take_round() == 3
+
+
+def test_best_round_is_the_first_of_equal_scores() -> None:
+    history = RoundHistory(run_seed=7)
+    for round_index, score in [(3, 1.0), (2, 2.0), (1, 1.0), (0, 3.0)]:
+        history.record(round_index, score)
+
+    assert history.best() == (history.seed_of(1), 1.0)
+
+
+def test_rebuild_best_plan_is_not_counted_again(setup: PlanSetup) -> None:
+    history = RoundHistory(run_seed=7)
+    recorder = instrumentation.enable()
+    try:
+        run_rounds(
+            setup.calendar,
+            setup.queue_manager,
+            setup.altar_servers,
+            setup.event_calendar,
+            StoppingPolicy(OptimizerSettings(max_rounds=10)),
+            history=history,
+        )
+        counters = recorder.report()["counters"]
+        rebuild_best_plan(history, setup.calendar, setup.queue_manager, setup.altar_servers)
+    finally:
+        instrumentation.disable()
+
+    report = recorder.report()
+    assert report["counters"] == counters
+    assert report["phases"]["assign_servers"]["count"] == 10
+    assert report["phases"]["rebuild_best_plan"]["count"] == 1
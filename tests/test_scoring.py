@@ -0,0 +1,91 @@
+"""Tests of the scoring backends and the running statistics."""
+
+import itertools
+import random
+import statistics
+
+import pytest
+from altar_servers.running_statistics import RunningStatistics, population_variance
+from altar_servers.server_handler import assign_servers
+from optimization.plan_setup import PlanSetup
+from optimization.snapshot import PlanSnapshot
+from optimization.vectorized_scoring import VectorizedScoring
+
+SEEDS = [0, 1, 2, 3, 4]
+
+
+def create_plan(setup: PlanSetup, seed: int) -> PlanSnapshot:
+    """Create the plan of a seed.
+
+    :param setup: The plan setup, whose calendar contains the plan afterwards.
+    :param seed: The seed of the round.
+    :return: The snapshot of the plan.
+    """
+    setup.calendar.clear()
+    setup.queue_manager.start_round(seed)
+    assign_servers(setup.calendar, setup.queue_manager, setup.altar_servers)
+    return PlanSnapshot.take(setup.calendar, setup.altar_servers)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_vectorized_scoring_matches_altar_servers(setup: PlanSetup, seed: int) -> None:
+    snapshot = create_plan(setup, seed)
+    scoring = VectorizedScoring(setup.calendar, setup.altar_servers, setup.event_calendar)
+
+    running = setup.altar_servers.calculate_statistics(setup.event_calendar)
+    recalculated = setup.altar_servers.recalculate_statistics(setup.event_calendar)
+    vectorized = scoring.calculate_statistics(snapshot)
+
+    assert running == recalculated
+    assert vectorized == pytest.approx(running, rel=1e-12, abs=1e-12)
+
+
+def test_vectorized_scores_of_multiple_plans(setup: PlanSetup) -> None:
+    snapshots = []
+    expected = []
+    for seed in SEEDS:
+        snapshots.append(create_plan(setup, seed))
+        expected.append(sum(setup.altar_servers.calculate_statistics(setup.event_calendar)))
+    scoring = VectorizedScoring(setup.calendar, setup.altar_servers, setup.event_calendar)
+
+    assert scoring.scores(snapshots).tolist() == pytest.approx(expected, rel=1e-12)
+
+
+def test_running_statistics_match_pvariance(setup: PlanSetup) -> None:
+    create_plan(setup, 0)
+    altar_servers = setup.altar_servers
+    event_ids = setup.event_calendar.get_list_of_weekday_ids()
+    running_statistics = RunningStatistics(len(altar_servers.altar_servers))
+    for day in setup.calendar.days:
+        for mass in sorted(day.masses, key=lambda x: x.event.time):
+            for server in mass.servers:
+                running_statistics.add_service(altar_servers.get_server_index(server), mass)
+
+    services = [server.services for server in altar_servers.altar_servers]
+    expected = [
+        statistics.pvariance([len(x) for x in services]),
+        statistics.pvariance(
+            [
+                (second.day.date - first.day.date).days
+                for x in services
+                for first, second in itertools.pairwise(x)
+            ]
+        ),
+    ] + [
+        statistics.pvariance([sum(mass.event.id == event_id for mass in x) for x in services])
+        for event_id in dict.fromkeys(event_ids)
+    ]
+    assert running_statistics.variances(event_ids) == expected
+
+
+def test_population_variance_matches_pvariance() -> None:
+    rng = random.Random(0)  # noqa: S311
+    for n in range(1, 50):
+        values = [rng.randrange(-1000, 1000) for _ in range(n)]
+        variance = population_variance(sum(values), sum(x * x for x in values), n)
+        assert variance == statistics.pvariance(values)
+
+
+def test_population_variance_requires_values() -> None:
+    with pytest.raises(statistics.StatisticsError):
+        population_variance(0, 0, 0)